@@ -0,0 +1,59 @@
+"""
+Measures chat intent classification latency: refitting the TF-IDF model per query
+(the old behaviour) vs the shared prefit classifier, one query at a time and batched.
+
+Usage:
+    python -m benchmarks.bench_chat --queries 1000
+"""
+import argparse
+import time
+import pandas as pd
+from src.fraud_analysis import INTENT_PHRASES, IntentClassifier, classify_intents, get_intent_classifier
+
+SAMPLE_QUERIES = [
+    "How many overlapping fraudsters did we find?",
+    "What is the overlap percentage?",
+    "Explain epsilon",
+    "Compare bank vs insurer",
+    "Download excel",
+    "How many credit invisible customers can we help?",
+    "tell me something",
+]
+
+def run(n_queries: int):
+    queries = (SAMPLE_QUERIES * (n_queries // len(SAMPLE_QUERIES) + 1))[:n_queries]
+    get_intent_classifier()
+    rows = []
+
+    start = time.perf_counter()
+    for q in queries[:100]:
+        IntentClassifier(INTENT_PHRASES).classify([q])
+    rows.append({'mode': 'refit per query', 'queries': min(100, n_queries), 'seconds': time.perf_counter() - start})
+
+    start = time.perf_counter()
+    for q in queries:
+        classify_intents([q])
+    rows.append({'mode': 'prefit, one at a time', 'queries': n_queries, 'seconds': time.perf_counter() - start})
+
+    start = time.perf_counter()
+    classify_intents(queries)
+    rows.append({'mode': 'prefit, batched', 'queries': n_queries, 'seconds': time.perf_counter() - start})
+
+    clf = get_intent_classifier()
+    start = time.perf_counter()
+    for q in queries:
+        clf.vectorizer.transform([q])
+    rows.append({'mode': 'transform only', 'queries': n_queries, 'seconds': time.perf_counter() - start})
+
+    df = pd.DataFrame(rows)
+    df['us_per_query'] = df['seconds'] / df['queries'] * 1e6
+    return df
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--queries', type=int, default=1000)
+    args = parser.parse_args()
+    print(run(args.queries).to_string(index=False, float_format=lambda v: f"{v:.4f}"))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+"""
+Load-tests the asyncio chat service over localhost and reports p50/p99 latency.
+
+Usage:
+    python -m benchmarks.bench_chat_service --clients 10 100 --queries 20
+"""
+import argparse
+import asyncio
+import pandas as pd
+from src.chat_service import ChatService, run_load
+
+async def _run(clients, queries: int, max_batch: int, max_delay: float):
+    rows = []
+    for n_clients in clients:
+        service = ChatService(max_batch=max_batch, max_delay=max_delay)
+        port = await service.start('127.0.0.1', 0)
+        try:
+            load = await run_load('127.0.0.1', port, n_clients=n_clients, queries_per_client=queries)
+            server = service.latency_stats()
+        finally:
+            await service.close()
+        rows.append({'clients': n_clients, **load, 'server_p50_ms': server['p50_ms'],
+                     'server_p99_ms': server['p99_ms'], 'batches': server['batches']})
+    return pd.DataFrame(rows)
+
+def run(clients, queries: int, max_batch: int = 64, max_delay: float = 0.002):
+    return asyncio.run(_run(clients, queries, max_batch, max_delay))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--clients', type=int, nargs='+', default=[10, 100])
+    parser.add_argument('--queries', type=int, default=20)
+    parser.add_argument('--max-batch', type=int, default=64)
+    parser.add_argument('--max-delay', type=float, default=0.002)
+    args = parser.parse_args()
+    print(run(args.clients, args.queries, args.max_batch, args.max_delay).to_string(index=False, float_format=lambda v: f"{v:.2f}"))
+
+if __name__ == "__main__":
+    main()
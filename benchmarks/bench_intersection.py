@@ -0,0 +1,68 @@
+"""
+Compares the legacy set-based overlap against the intersection backends.
+
+Usage:
+    python -m benchmarks.bench_intersection --sizes 1000000 2000000
+"""
+import argparse
+import binascii
+import time
+import numpy as np
+import pandas as pd
+from src.bloom import approximate_overlap
+from src.id_codec import hex_to_key64
+from src.intersection import BACKENDS, intersection_size
+
+def random_hex_hashes(n: int, rng: np.random.Generator) -> pd.Series:
+    text = binascii.hexlify(rng.bytes(32 * n)).decode()
+    return pd.Series([text[i:i + 64] for i in range(0, len(text), 64)])
+
+def make_cohorts(n: int, overlap: float = 0.5, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    shared = random_hex_hashes(int(n * overlap), rng)
+    left = pd.concat([shared, random_hex_hashes(n - len(shared), rng)], ignore_index=True)
+    right = pd.concat([random_hex_hashes(n - len(shared), rng), shared], ignore_index=True)
+    return left, right
+
+def _time(fn, repeat: int):
+    best, result = float('inf'), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+def run(sizes, repeat: int = 3):
+    rows = []
+    for n in sizes:
+        left, right = make_cohorts(n)
+        left_keys, right_keys = hex_to_key64(left), hex_to_key64(right)
+        legacy_s, expected = _time(lambda: len(set(left).intersection(set(right))), repeat)
+        rows.append({'n': n, 'encoding': 'hex', 'backend': 'legacy-set', 'seconds': legacy_s, 'speedup': 1.0})
+        for encoding, (a, b) in (('hex', (left, right)), ('key64', (left_keys, right_keys))):
+            for backend in sorted(BACKENDS):
+                if backend == 'psi':
+                    # Orders of magnitude slower by design; see bench_psi
+                    continue
+                seconds, got = _time(lambda: intersection_size(a, b, backend=backend), repeat)
+                assert got == expected, (backend, encoding, got, expected)
+                rows.append({'n': n, 'encoding': encoding, 'backend': backend,
+                             'seconds': seconds, 'speedup': legacy_s / seconds})
+            for fpr in (0.01, 0.001):
+                seconds, approx = _time(lambda: approximate_overlap(a, b, fpr=fpr, capacity=max(len(a), len(b))), repeat)
+                rows.append({'n': n, 'encoding': encoding, 'backend': f'bloom({fpr:g})',
+                             'seconds': seconds, 'speedup': legacy_s / seconds,
+                             'abs_error': abs(approx['estimate'] - expected),
+                             'error_bound': approx['error_bound'],
+                             'filter_mb': approx['filter_bytes'] / 1e6})
+    return pd.DataFrame(rows)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100_000, 1_000_000])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+    print(run(args.sizes, args.repeat).to_string(index=False, float_format=lambda v: f"{v:.3f}"))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,31 @@
+"""
+Measures PSI throughput (blindings per second).
+
+Usage:
+    python -m benchmarks.bench_psi --sizes 1000 10000 --jobs 1 4
+"""
+import argparse
+import pandas as pd
+from benchmarks.bench_intersection import make_cohorts
+from src.psi import run_psi
+
+def run(sizes, jobs, batch_size: int):
+    rows = []
+    for n in sizes:
+        left, right = make_cohorts(n)
+        for n_jobs in jobs:
+            result = run_psi(left, right, n_jobs=n_jobs, batch_size=batch_size)
+            rows.append({'n': n, 'jobs': n_jobs, 'matches': len(result['intersection']),
+                         'seconds': result['seconds'], 'exps_per_second': result['exps_per_second']})
+    return pd.DataFrame(rows)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000])
+    parser.add_argument('--jobs', type=int, nargs='+', default=[1, 0])
+    parser.add_argument('--batch-size', type=int, default=256)
+    args = parser.parse_args()
+    print(run(args.sizes, args.jobs, args.batch_size).to_string(index=False, float_format=lambda v: f"{v:.2f}"))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+"""
+Compares dataset load time and memory: full CSV parse vs column-pruned,
+memory-mapped Parquet.
+
+Usage:
+    python -m benchmarks.bench_storage --rows 1000000
+"""
+import argparse
+import os
+import tempfile
+import time
+import pandas as pd
+from src.data_gen import iter_bank_data, write_chunks
+from src.fraud_analysis import ANALYSIS_COLUMNS
+from src.storage import read_dataset
+
+def _load(path, columns):
+    start = time.perf_counter()
+    df = read_dataset(path, columns)
+    seconds = time.perf_counter() - start
+    return seconds, df.memory_usage(deep=True).sum() / 2**20
+
+def run(rows: int, repeat: int = 3):
+    columns = ANALYSIS_COLUMNS['fraud']['bank']
+    out = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for fmt in ('csv', 'parquet'):
+            path = os.path.join(tmp, f"bank_data.{fmt}")
+            write_chunks(iter_bank_data("Global Bank", n_customers=rows, seed=10), path)
+            size_mb = os.path.getsize(path) / 2**20
+            for label, cols in (('all columns', None), ('analysis columns', columns)):
+                seconds, memory_mb = min(_load(path, cols) for _ in range(repeat))
+                out.append({'format': fmt, 'columns': label, 'file_mb': size_mb,
+                            'seconds': seconds, 'memory_mb': memory_mb})
+    return pd.DataFrame(out)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+    print(run(args.rows, args.repeat).to_string(index=False, float_format=lambda v: f"{v:.2f}"))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+"""
+Benchmark suite: data generation, ID hashing, the three overlaps, private means,
+intent classification and the export writers, over a range of row counts.
+
+Results are written as JSON. With --baseline, each (case, n) is compared against
+a stored run and slowdowns beyond --threshold are reported as regressions (exit
+status 1).
+
+Usage:
+    python -m benchmarks.suite --sizes 1000 100000 --output bench.json
+    python -m benchmarks.suite --sizes 1000 100000 --baseline bench.json
+
+Cases have a default row cap (MAX_ROWS) so a run at 10^8 only times the cases
+that are practical at that scale; --max-rows lifts the caps. Overlap inputs
+above 10^6 rows use key64 IDs instead of hex strings to fit in memory.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+import numpy as np
+import pandas as pd
+from benchmarks.bench_intersection import random_hex_hashes
+from src.cohorts import COHORT_INDEX
+from src.data_gen import generate_bank_data, hash_customer_ids
+from src.export import export_bytes
+from src.fraud_analysis import (_classify_intent, classify_intents, compute_fraud_overlap,
+                                compute_inclusion_overlap, compute_trading_overlap)
+from src.privacy import compute_private_mean
+
+DEFAULT_SIZES = [1_000, 10_000, 100_000]
+DEFAULT_THRESHOLD = 0.2
+# Largest row count each case runs at unless --max-rows says otherwise
+MAX_ROWS = {
+    'generate_bank_data': 10_000_000,
+    'hash_customer_ids': 10_000_000,
+    'compute_fraud_overlap': 100_000_000,
+    'compute_inclusion_overlap': 100_000_000,
+    'compute_trading_overlap': 100_000_000,
+    'compute_private_mean': 100_000_000,
+    'classify_intent': 1_000,
+    'classify_intents': 1_000_000,
+    'export_xlsx': 1_000_000,
+    'export_csv': 10_000_000,
+    'export_parquet': 10_000_000,
+}
+QUERIES = ["How many overlapping fraudsters did we find?", "Explain epsilon", "Compare bank vs insurer",
+           "Download excel", "tell me something"]
+
+def _keys(n: int, rng: np.random.Generator):
+    if n > 1_000_000:
+        return pd.Series(rng.integers(0, 2**63, size=n, dtype=np.int64).astype(np.uint64))
+    return random_hex_hashes(n, rng)
+
+def overlap_frames(n: int, seed: int = 0):
+    """Bank, insurer and brokerage frames of n rows each, half of their IDs shared."""
+    rng = np.random.default_rng(seed)
+    shared = _keys(n // 2, rng)
+
+    def ids():
+        return pd.concat([shared, _keys(n - len(shared), rng)], ignore_index=True)
+
+    bank = pd.DataFrame({'Customer_ID_Hash': ids(), 'Is_Flagged_Fraud': rng.integers(0, 2, n),
+                         'Credit_History_Months': rng.integers(0, 120, n)})
+    insurer = pd.DataFrame({'Customer_ID_Hash': ids(), 'Is_Flagged_Fraud': rng.integers(0, 2, n),
+                            'Consistent_Payer': rng.integers(0, 2, n)})
+    brokerage = pd.DataFrame({'Customer_ID_Hash': ids(), 'Is_Risky_Trading': rng.integers(0, 2, n)})
+    return bank, insurer, brokerage
+
+def _overlap_case(compute_fn, partner: int):
+    def setup(n: int):
+        frames = overlap_frames(n)
+
+        def run():
+            # Time the cold path: cohorts are rebuilt on every repeat
+            COHORT_INDEX.invalidate()
+            compute_fn(frames[0], frames[partner], epsilon=1.0)
+        return run
+    return setup
+
+def _export_case(fmt: str):
+    def setup(n: int):
+        sheets = {'Summary': pd.DataFrame([{'True Overlap': 1, 'Private Overlap': 1.2}]),
+                  'Sample': overlap_frames(n)[0]}
+        return lambda: export_bytes(sheets, fmt)
+    return setup
+
+def _queries(n: int) -> List[str]:
+    return (QUERIES * (n // len(QUERIES) + 1))[:n]
+
+# case -> setup(n) returning the callable to time
+CASES: Dict[str, Callable[[int], Callable[[], object]]] = {
+    'generate_bank_data': lambda n: lambda: generate_bank_data("Global Bank", n_customers=n),
+    'hash_customer_ids': lambda n: (lambda ids: lambda: hash_customer_ids(ids))([f"Global Bank_CUST_{i:05d}" for i in range(n)]),
+    'compute_fraud_overlap': _overlap_case(compute_fraud_overlap, 1),
+    'compute_inclusion_overlap': _overlap_case(compute_inclusion_overlap, 1),
+    'compute_trading_overlap': _overlap_case(compute_trading_overlap, 2),
+    'compute_private_mean': lambda n: (lambda s: lambda: compute_private_mean(s, epsilon=1.0))(
+        pd.Series(np.random.default_rng(0).lognormal(10, 1, n))),
+    'classify_intent': lambda n: (lambda qs: lambda: [_classify_intent(q.lower()) for q in qs])(_queries(n)),
+    'classify_intents': lambda n: (lambda qs: lambda: classify_intents(qs))(_queries(n)),
+    'export_xlsx': _export_case('xlsx'),
+    'export_csv': _export_case('csv'),
+    'export_parquet': _export_case('parquet'),
+}
+
+def run_suite(sizes: List[int], cases: Optional[List[str]] = None, repeat: int = 3,
+              max_rows: Optional[int] = None) -> dict:
+    """
+    Times every case at every size (best of repeat runs).
+
+    Returns:
+        dict: {'meta': {...}, 'results': [{'case', 'n', 'seconds', 'rows_per_second'}, ...]}
+    """
+    results = []
+    for case in cases or list(CASES):
+        cap = MAX_ROWS.get(case) if max_rows is None else max_rows
+        for n in sizes:
+            if cap is not None and n > cap:
+                continue
+            fn = CASES[case](n)
+            best = float('inf')
+            for _ in range(repeat):
+                start = time.perf_counter()
+                fn()
+                best = min(best, time.perf_counter() - start)
+            results.append({'case': case, 'n': n, 'seconds': best, 'rows_per_second': n / best if best > 0 else None})
+            print(f"{case:28s} n={n:<11d} {best:10.4f}s", file=sys.stderr)
+    meta = {
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'repeat': repeat,
+    }
+    return {'meta': meta, 'results': results}
+
+def compare(current: dict, baseline: dict, threshold: float = DEFAULT_THRESHOLD) -> pd.DataFrame:
+    """
+    Joins a run against a baseline on (case, n).
+
+    Returns:
+        pd.DataFrame: case, n, baseline_seconds, seconds, ratio (current / baseline) and
+        regression (ratio above 1 + threshold).
+    """
+    cur = pd.DataFrame(current['results'])
+    base = pd.DataFrame(baseline['results']).rename(columns={'seconds': 'baseline_seconds'})
+    if cur.empty or base.empty:
+        return pd.DataFrame(columns=['case', 'n', 'baseline_seconds', 'seconds', 'ratio', 'regression'])
+    merged = base[['case', 'n', 'baseline_seconds']].merge(cur[['case', 'n', 'seconds']], on=['case', 'n'])
+    merged['ratio'] = merged['seconds'] / merged['baseline_seconds']
+    merged['regression'] = merged['ratio'] > 1 + threshold
+    return merged
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES)
+    parser.add_argument('--cases', nargs='+', choices=sorted(CASES), help="Subset of cases (default: all)")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--max-rows', type=int, help="Override every case's row cap")
+    parser.add_argument('--output', help="Write results JSON here (default: stdout)")
+    parser.add_argument('--baseline', help="Compare against a stored results JSON")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help="Allowed slowdown before flagging a regression (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    current = run_suite(args.sizes, args.cases, args.repeat, args.max_rows)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(current, f, indent=2)
+    elif not args.baseline:
+        print(json.dumps(current, indent=2))
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        report = compare(current, baseline, args.threshold)
+        print(report.to_string(index=False, float_format=lambda v: f"{v:.4f}"))
+        regressions = report[report['regression']]
+        if len(regressions):
+            print(f"{len(regressions)} regression(s) beyond {args.threshold:.0%}", file=sys.stderr)
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
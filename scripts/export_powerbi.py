@@ -1,28 +1,31 @@
-import os
-import pandas as pd
-from src.fraud_analysis import compute_fraud_overlap, compute_inclusion_overlap, compute_trading_overlap
+"""
+Refreshes the Power BI tables in powerbi/, regenerating only outputs whose inputs changed.
 
-def main():
-    base = r"d:\Projects\Privacy-Safe Cross-Company Data Insights"
-    data_dir = os.path.join(base, "data")
-    out_dir = os.path.join(base, "powerbi")
-    os.makedirs(out_dir, exist_ok=True)
+Usage:
+    python -m scripts.export_powerbi [--config powerbi.json] [--format parquet] [--force]
 
-    bank = pd.read_csv(os.path.join(data_dir, "bank_data.csv"))
-    insurer = pd.read_csv(os.path.join(data_dir, "insurer_data.csv"))
-    brokerage = pd.read_csv(os.path.join(data_dir, "brokerage_data.csv"))
+The optional JSON config overrides any key of src.powerbi.DEFAULT_CONFIG
+(data_dir, out_dir, format, epsilon, workers, summaries, customers).
+"""
+import argparse
+import os
+import sys
 
-    fraud = compute_fraud_overlap(bank, insurer, epsilon=1.0)
-    inclusion = compute_inclusion_overlap(bank, insurer, epsilon=1.0)
-    trading = compute_trading_overlap(bank, brokerage, epsilon=1.0)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-    pd.DataFrame([fraud]).to_csv(os.path.join(out_dir, "fraud_summary.csv"), index=False)
-    pd.DataFrame([inclusion]).to_csv(os.path.join(out_dir, "inclusion_summary.csv"), index=False)
-    pd.DataFrame([trading]).to_csv(os.path.join(out_dir, "trading_summary.csv"), index=False)
+from src.powerbi import OUTPUT_FORMATS, load_config, run_pipeline
 
-    bank[['Customer_ID_Hash','Risk_Score','Credit_History_Months','Is_Flagged_Fraud']].to_csv(os.path.join(out_dir, "bank_customers.csv"), index=False)
-    insurer[['Customer_ID_Hash','Claim_Amount','Consistent_Payer','Is_Flagged_Fraud']].to_csv(os.path.join(out_dir, "insurer_customers.csv"), index=False)
-    brokerage[['Customer_ID_Hash','Portfolio_Value','Trading_Frequency','Is_Risky_Trading']].to_csv(os.path.join(out_dir, "brokerage_customers.csv"), index=False)
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--config', help="JSON config file")
+    parser.add_argument('--format', choices=OUTPUT_FORMATS, help="Output format (default: csv)")
+    parser.add_argument('--epsilon', type=float, help="Privacy budget for the summaries")
+    parser.add_argument('--workers', type=int, help="Parallel writers")
+    parser.add_argument('--force', action='store_true', help="Rewrite every output")
+    args = parser.parse_args()
+    config = load_config(args.config, format=args.format, epsilon=args.epsilon, workers=args.workers)
+    for name, status in run_pipeline(config, force=args.force).items():
+        print(f"{name}: {status}")
 
 if __name__ == "__main__":
     main()
@@ -1,49 +1,224 @@
 import streamlit as st
+import numpy as np
 import pandas as pd
 import altair as alt
 import os
-from src.data_gen import generate_bank_data, generate_insurer_data, generate_brokerage_data
-from src.fraud_analysis import compute_fraud_overlap, compute_inclusion_overlap, compute_trading_overlap, simulate_cortex_chat
-from src.export import fraud_excel, inclusion_excel, trading_excel
-from src.utils import setup_logger
+from src.data_gen import iter_bank_data, iter_insurer_data, iter_brokerage_data, write_chunks
+from src.fraud_analysis import ANALYSIS_COLUMNS, fraud_overlap_counts, inclusion_overlap_counts, trading_overlap_counts, simulate_cortex_chat
+from src.export import EXPORT_FORMATS, MIME_TYPES, export_bytes, export_sheets
+from src.charts import downsample, histogram, value_counts
+from src.cohorts import COHORT_INDEX, get_cohort, FRAUD_FLAGGED, THIN_CREDIT, CONSISTENT_PAYER, RISKY_TRADING
+from src.precompute import Precompute, PENDING, FAILED
+from src.release_cache import ReleaseCache
+from src.storage import DATASETS, DEFAULT_FORMAT, dataset_path, find_dataset, migrate_data_dir, read_dataset, read_schema
+from src.utils import setup_logger, file_fingerprint, enable_instrumentation, instrumentation_enabled, recent_spans, clear_spans
 
 logger = setup_logger(__name__)
 
 st.set_page_config(page_title="AI for Good: Privacy-Safe Insights", layout="wide")
 
+DATA_DIR = "data"
+
+# analysis -> (epsilon-independent counts function, index of the partner frame in DATASETS)
+ANALYSES = {
+    'fraud': (fraud_overlap_counts, 1),
+    'inclusion': (inclusion_overlap_counts, 1),
+    'trading': (trading_overlap_counts, 2),
+}
+
+# Epsilon values offered by the sweep view's range slider, and points per curve
+SWEEP_RANGE = [0.01, 0.02, 0.05, 0.1, 0.2, 0.5, 1.0, 2.0, 5.0, 10.0]
+SWEEP_POINTS = 200
+
+# Columns shown in previews, charts and exports, on top of what the analyses need
+DISPLAY_COLUMNS = {
+    'bank': ['Risk_Score', 'Credit_History_Months'],
+    'insurer': ['Claim_Amount'],
+    'brokerage': ['Portfolio_Value', 'Trading_Frequency'],
+}
+
+def app_columns(name: str) -> list:
+    """Columns the app loads for a dataset; everything else (e.g. Customer_ID_Raw) stays on disk."""
+    columns = [c for needs in ANALYSIS_COLUMNS.values() for c in needs.get(name, [])] + DISPLAY_COLUMNS[name]
+    return list(dict.fromkeys(columns))
+
+def dataset_version():
+    """Returns the dataset paths and their file fingerprints (size/mtime/content hash)."""
+    paths = tuple(find_dataset(name, DATA_DIR) for name in DATASETS)
+    return paths, tuple(file_fingerprint(p) for p in paths)
+
+@st.cache_resource(show_spinner=False, max_entries=2)
+def _load_frames(paths, fingerprints):
+    """Reads the datasets once per file version; reruns reuse the same frames."""
+    frames = tuple(read_dataset(p, app_columns(name)) for name, p in zip(DATASETS, paths))
+    # The file fingerprint doubles as the cohort cache key, so no content hash pass is needed
+    for df, fingerprint in zip(frames, fingerprints):
+        COHORT_INDEX.set_fingerprint(df, fingerprint)
+    logger.info(f"Loaded datasets {fingerprints}")
+    return frames
+
+@st.cache_resource(show_spinner=False, max_entries=2)
+def precompute(paths, fingerprints) -> Precompute:
+    """
+    Starts the cohort filters and intersections of every analysis in a worker pool,
+    once per dataset version. Results are shared by all sessions.
+    """
+    frames = _load_frames(paths, fingerprints)
+    jobs = {analysis: (lambda fn=counts_fn, partner=partner: fn(frames[0], frames[partner]))
+            for analysis, (counts_fn, partner) in ANALYSES.items()}
+    return Precompute(jobs)
+
+def precompute_status(analysis: str, paths, fingerprints) -> None:
+    """Shows whether an analysis's intersection is ready, refreshing until it is."""
+    jobs = precompute(paths, fingerprints)
+
+    @st.fragment(run_every=0.5 if jobs.status(analysis) == PENDING else None)
+    def status():
+        state = jobs.status(analysis)
+        if state == PENDING:
+            st.caption("⏳ Precomputing private intersection in the background...")
+        elif state == FAILED:
+            st.caption("⚠️ Background precompute failed; the analysis will retry when run.")
+        else:
+            st.caption(f"✅ Intersection ready ({jobs.seconds[analysis]:.2f}s); results release instantly.")
+    status()
+
+@st.cache_resource(show_spinner=False)
+def release_cache() -> ReleaseCache:
+    """File-backed release cache shared by all sessions of this server."""
+    return ReleaseCache(os.path.join(DATA_DIR, "release_cache.sqlite"))
+
+def overlap_counts(analysis: str, paths, fingerprints):
+    """The precomputed counts of an analysis, waiting for them if they are still running."""
+    try:
+        return precompute(paths, fingerprints).result(analysis)
+    except Exception:
+        # Recompute in this session so the user sees the actual error, if it persists
+        counts_fn, partner = ANALYSES[analysis]
+        frames = _load_frames(paths, fingerprints)
+        return counts_fn(frames[0], frames[partner])
+
+def released_overlap(analysis: str, paths, fingerprints, epsilon: float) -> dict:
+    """Noisy overlap result, drawn once per (dataset version, analysis, epsilon) and then replayed."""
+    return release_cache().get_or_release(fingerprints, f'{analysis}_overlap', epsilon,
+                                          lambda: overlap_counts(analysis, paths, fingerprints).release(epsilon))
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def cached_sweep(analysis: str, paths, fingerprints, epsilons: tuple, trials: int) -> pd.DataFrame:
+    """Utility curve of an analysis; simulated once per (dataset version, grid, trials) so reruns do not jitter."""
+    return overlap_counts(analysis, paths, fingerprints).sweep(np.array(epsilons), trials)
+
+def utility_curve(paths, fingerprints, epsilon: float) -> None:
+    """Privacy/utility sweep view: error quantiles of the released overlap across epsilons."""
+    st.subheader("Choosing the Privacy Budget")
+    st.info("The intersection is computed once; every point below is a batch of simulated releases at that epsilon.")
+    c1, c2, c3 = st.columns(3)
+    analysis = c1.selectbox("Analysis", list(ANALYSES), format_func=str.title, key="sweep_analysis")
+    lo, hi = c2.select_slider("Epsilon range", options=SWEEP_RANGE, value=(0.05, 5.0), key="sweep_range")
+    trials = c3.select_slider("Trials per epsilon", options=[100, 500, 1000, 5000], value=1000, key="sweep_trials")
+    epsilons = tuple(np.geomspace(lo, hi, SWEEP_POINTS)) if hi > lo else (lo,)
+    curve = cached_sweep(analysis, paths, fingerprints, epsilons, trials)
+
+    quantile_cols = [c for c in curve.columns if c.startswith('abs_error_p')]
+    long = curve.melt(id_vars='epsilon', value_vars=quantile_cols, var_name='Quantile', value_name='Absolute Error')
+    long['Quantile'] = long['Quantile'].str.replace('abs_error_', '')
+    lines = alt.Chart(long).mark_line().encode(
+        x=alt.X('epsilon:Q', scale=alt.Scale(type='log'), title='Epsilon'),
+        y=alt.Y('Absolute Error:Q', scale=alt.Scale(type='symlog'), title='Absolute Error of Private Overlap'),
+        color='Quantile:N',
+        tooltip=['epsilon', 'Quantile', 'Absolute Error']
+    )
+    # Marks the budget chosen in the sidebar
+    chosen = alt.Chart(pd.DataFrame({'epsilon': [epsilon]})).mark_rule(strokeDash=[4, 4]).encode(x='epsilon:Q')
+    st.altair_chart((lines + chosen).properties(height=320), width='stretch')
+    nearest = curve.iloc[(curve['epsilon'] - epsilon).abs().argmin()]
+    st.caption(f"At ε ≈ {nearest['epsilon']:.2f}, 95% of releases are within ±{nearest['abs_error_p95']:.1f} "
+               f"of the true overlap.")
+    st.dataframe(curve, hide_index=True)
+
+def _column(paths, fingerprints, dataset: str, column: str, predicate=None) -> pd.Series:
+    df = _load_frames(paths, fingerprints)[DATASETS.index(dataset)]
+    return df[column] if predicate is None else get_cohort(df, predicate).rows(df, [column])[column]
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def cached_histogram(paths, fingerprints, dataset: str, column: str, predicate=None, step=None) -> pd.DataFrame:
+    """Histogram bins of a column (optionally of a cohort), computed once per dataset version."""
+    return histogram(_column(paths, fingerprints, dataset, column, predicate), step=step)
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def cached_value_counts(paths, fingerprints, dataset: str, column: str) -> pd.DataFrame:
+    return value_counts(_column(paths, fingerprints, dataset, column))
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def cached_scatter(paths, fingerprints, dataset: str, predicate, columns: tuple) -> pd.DataFrame:
+    """A fixed-size sample of a cohort's points, so the chart payload does not grow with the data."""
+    df = _load_frames(paths, fingerprints)[DATASETS.index(dataset)]
+    return downsample(get_cohort(df, predicate).rows(df), columns)
+
+def histogram_chart(bins: pd.DataFrame, title: str) -> alt.Chart:
+    """Bar chart of pre-binned counts from cached_histogram."""
+    return alt.Chart(bins).mark_bar().encode(
+        alt.X('bin_start:Q', bin='binned', title=title),
+        alt.X2('bin_end:Q'),
+        alt.Y('count:Q', title='Count'),
+        tooltip=['bin_start', 'bin_end', 'count']
+    ).properties(height=240)
+
+def download_export(label: str, analysis: str, results: dict, frames: dict, fmt: str, file_stem: str) -> None:
+    """Download button for an analysis export; the file is only built when the user clicks."""
+    extension = 'xlsx' if fmt == 'xlsx' else 'zip'
+    st.download_button(f"Download {fmt.upper()} ({label})",
+                       data=lambda: export_bytes(export_sheets(analysis, results, frames), fmt),
+                       file_name=f"{file_stem}.{extension}", mime=MIME_TYPES[fmt], key=f"download_{analysis}",
+                       on_click="ignore")
+
 def load_or_generate_data():
     """Loads data, generating it if missing or outdated (missing columns)."""
-    data_dir = "data"
-    os.makedirs(data_dir, exist_ok=True)
+    os.makedirs(DATA_DIR, exist_ok=True)
     
-    bank_path = os.path.join(data_dir, "bank_data.csv")
-    insurer_path = os.path.join(data_dir, "insurer_data.csv")
-    brokerage_path = os.path.join(data_dir, "brokerage_data.csv")
+    if DEFAULT_FORMAT == 'parquet':
+        # One-off conversion of CSV datasets; later loads read the Parquet copies
+        migrate_data_dir(DATA_DIR)
+    paths = [find_dataset(name, DATA_DIR) for name in DATASETS]
     
     regenerate = False
     
-    if not os.path.exists(bank_path) or not os.path.exists(insurer_path) or not os.path.exists(brokerage_path):
+    if any(p is None for p in paths):
         regenerate = True
     else:
         # Check for new columns
-        df = pd.read_csv(bank_path, nrows=1)
-        if 'Credit_History_Months' not in df.columns:
-            regenerate = True
+        for name, path in zip(DATASETS, paths):
+            if not set(app_columns(name)).issubset(read_schema(path)):
+                regenerate = True
             
     if regenerate:
         st.warning("Generating new synthetic data with 'Financial Inclusion' fields...")
-        bank_df = generate_bank_data("Global Bank", n_customers=1000, seed=10)
-        insurer_df = generate_insurer_data("SafeGuard Insurance", n_customers=800, seed=20)
-        brokerage_df = generate_brokerage_data("Alpha Brokerage", n_customers=900, seed=30)
-        bank_df.to_csv(bank_path, index=False)
-        insurer_df.to_csv(insurer_path, index=False)
-        brokerage_df.to_csv(brokerage_path, index=False)
-    else:
-        bank_df = pd.read_csv(bank_path)
-        insurer_df = pd.read_csv(insurer_path)
-        brokerage_df = pd.read_csv(brokerage_path)
-        
-    return bank_df, insurer_df, brokerage_df
+        bank_path, insurer_path, brokerage_path = (dataset_path(name, DATA_DIR) for name in DATASETS)
+        # Stream chunks straight to disk so peak memory stays bounded by the chunk size
+        write_chunks(iter_bank_data("Global Bank", n_customers=1000, seed=10), bank_path)
+        write_chunks(iter_insurer_data("SafeGuard Insurance", n_customers=800, seed=20), insurer_path)
+        write_chunks(iter_brokerage_data("Alpha Brokerage", n_customers=900, seed=30), brokerage_path)
+
+    return _load_frames(*dataset_version())
+
+def performance_panel() -> bool:
+    """Optional sidebar panel listing the timed stages (load, cohort filter, intersection, noise, export)."""
+    show = st.sidebar.checkbox("Show performance panel", value=instrumentation_enabled(),
+                               help="Records wall time, rows and peak memory per stage. Adds some overhead while on.")
+    if show != instrumentation_enabled():
+        enable_instrumentation(show)
+    return show
+
+def render_performance_panel() -> None:
+    spans = recent_spans(50)
+    with st.sidebar.expander("⏱️ Performance", expanded=True):
+        if not spans:
+            st.caption("No stages recorded yet. Run an analysis; cached results are not re-timed.")
+            return
+        df = pd.DataFrame(spans)[['name', 'seconds', 'rows', 'rows_per_second', 'peak_mb', 'parent']]
+        st.dataframe(df.iloc[::-1], hide_index=True)
+        if st.button("Clear timings", key="clear_spans"):
+            clear_spans()
 
 def main():
     st.title("🔒 Privacy-Safe Cross-Company Insights")
@@ -51,16 +226,25 @@ def main():
     **Mission: Fraud Detection & Financial Inclusion without sharing raw customer data.
     """)
 
+    show_performance = performance_panel()
+
     # Load Data
     bank_df, insurer_df, brokerage_df = load_or_generate_data()
+    paths, fingerprints = dataset_version()
+    # Start all three intersections now so they are ready by the time a tab is opened
+    precompute(paths, fingerprints)
     
     # Sidebar Controls
     st.sidebar.header("🛡️ Privacy Controls")
     epsilon = st.sidebar.slider("Privacy Budget (Epsilon)", 0.1, 5.0, 1.0, 
                                 help="Lower epsilon = More noise (Higher Privacy). Higher epsilon = More accuracy.")
+    export_format = st.sidebar.selectbox("Export Format", EXPORT_FORMATS,
+                                         help="CSV and Parquet exports are zip archives with one file per sheet.")
+    frames = dict(zip(DATASETS, (bank_df, insurer_df, brokerage_df)))
     
     # Tabs for Use Cases
-    tab1, tab2, tab3 = st.tabs(["🕵️ Fraud Detection", "🤝 Financial Inclusion (Credit Invisible)", "📈 Stock Market (Trading Risk)"])
+    tab1, tab2, tab3, tab4 = st.tabs(["🕵️ Fraud Detection", "🤝 Financial Inclusion (Credit Invisible)",
+                                      "📈 Stock Market (Trading Risk)", "📉 Privacy/Utility Sweep"])
     
     with tab1:
         st.subheader("Use Case: Collaborative Fraud Defense")
@@ -69,14 +253,15 @@ def main():
         col1, col2 = st.columns(2)
         with col1:
             st.caption("Bank View (High Risk)")
-            st.dataframe(bank_df[bank_df['Is_Flagged_Fraud']==1][['Customer_ID_Hash', 'Risk_Score']].head())
+            st.dataframe(get_cohort(bank_df, FRAUD_FLAGGED).rows(bank_df, ['Customer_ID_Hash', 'Risk_Score'], n=5))
         with col2:
             st.caption("Insurer View (Flagged Claims)")
-            st.dataframe(insurer_df[insurer_df['Is_Flagged_Fraud']==1][['Customer_ID_Hash', 'Claim_Amount']].head())
+            st.dataframe(get_cohort(insurer_df, FRAUD_FLAGGED).rows(insurer_df, ['Customer_ID_Hash', 'Claim_Amount'], n=5))
             
+        precompute_status('fraud', paths, fingerprints)
         if st.button("Run Secure Fraud Analysis", key="fraud_btn"):
             with st.spinner("Computing private intersection..."):
-                results = compute_fraud_overlap(bank_df, insurer_df, epsilon=epsilon)
+                results = released_overlap('fraud', paths, fingerprints, epsilon)
                 
                 m1, m2, m3 = st.columns(3)
                 m1.metric("Bank Risky", results['Bank Risky Count'])
@@ -92,17 +277,11 @@ def main():
                 st.altair_chart(chart, width='stretch')
                 dist_cols = st.columns(2)
                 with dist_cols[0]:
-                    bdist = alt.Chart(bank_df[bank_df['Is_Flagged_Fraud']==1]).mark_bar().encode(
-                        alt.X('Risk_Score:Q', bin=alt.Bin(step=5), title='Risk Score (Bank Risky)'),
-                        alt.Y('count()', title='Count')
-                    ).properties(height=240)
-                    st.altair_chart(bdist, width='stretch')
+                    bdist = cached_histogram(paths, fingerprints, 'bank', 'Risk_Score', FRAUD_FLAGGED, step=5)
+                    st.altair_chart(histogram_chart(bdist, 'Risk Score (Bank Risky)'), width='stretch')
                 with dist_cols[1]:
-                    idist = alt.Chart(insurer_df[insurer_df['Is_Flagged_Fraud']==1]).mark_bar().encode(
-                        alt.X('Claim_Amount:Q', bin=alt.Bin(maxbins=30), title='Claim Amount (Insurer Risky)'),
-                        alt.Y('count()', title='Count')
-                    ).properties(height=240)
-                    st.altair_chart(idist, width='stretch')
+                    idist = cached_histogram(paths, fingerprints, 'insurer', 'Claim_Amount', FRAUD_FLAGGED)
+                    st.altair_chart(histogram_chart(idist, 'Claim Amount (Insurer Risky)'), width='stretch')
                 
                 # Chat Simulation
                 st.divider()
@@ -110,8 +289,7 @@ def main():
                 q = st.text_input("Ask about fraud patterns:", "How many overlapping fraudsters did we find?", key="q1")
                 if q:
                     st.write(simulate_cortex_chat(q, results))
-                excel_bytes = fraud_excel(bank_df, insurer_df, epsilon)
-                st.download_button("Download Excel (Fraud Analysis)", data=excel_bytes, file_name="fraud_analysis.xlsx", mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
+                download_export("Fraud Analysis", 'fraud', results, frames, export_format, "fraud_analysis")
 
     with tab2:
         st.subheader("Use Case: Spotting the 'Credit Invisible'")
@@ -120,14 +298,15 @@ def main():
         col1, col2 = st.columns(2)
         with col1:
             st.caption("Bank View (Thin Credit < 12mo)")
-            st.dataframe(bank_df[bank_df['Credit_History_Months']<12][['Customer_ID_Hash', 'Credit_History_Months']].head())
+            st.dataframe(get_cohort(bank_df, THIN_CREDIT).rows(bank_df, ['Customer_ID_Hash', 'Credit_History_Months'], n=5))
         with col2:
             st.caption("Insurer View (Consistent Payers)")
-            st.dataframe(insurer_df[insurer_df['Consistent_Payer']==1][['Customer_ID_Hash', 'Consistent_Payer']].head())
+            st.dataframe(get_cohort(insurer_df, CONSISTENT_PAYER).rows(insurer_df, ['Customer_ID_Hash', 'Consistent_Payer'], n=5))
             
+        precompute_status('inclusion', paths, fingerprints)
         if st.button("Run Financial Inclusion Analysis", key="inc_btn"):
             with st.spinner("Computing private intersection..."):
-                results = compute_inclusion_overlap(bank_df, insurer_df, epsilon=epsilon)
+                results = released_overlap('inclusion', paths, fingerprints, epsilon)
                 
                 m1, m2, m3 = st.columns(3)
                 m1.metric("Bank 'Invisible'", results['Bank Invisible Count'])
@@ -145,17 +324,14 @@ def main():
                 st.altair_chart(chart, width='stretch')
                 dist_cols = st.columns(2)
                 with dist_cols[0]:
-                    hist = alt.Chart(bank_df).mark_bar().encode(
-                        alt.X('Credit_History_Months:Q', bin=alt.Bin(step=3), title='Credit History Months (Bank)'),
-                        alt.Y('count()', title='Count')
-                    ).properties(height=240)
-                    st.altair_chart(hist, width='stretch')
+                    hist = cached_histogram(paths, fingerprints, 'bank', 'Credit_History_Months', step=3)
+                    st.altair_chart(histogram_chart(hist, 'Credit History Months (Bank)'), width='stretch')
                 with dist_cols[1]:
-                    payer_df = insurer_df[['Consistent_Payer']].copy()
-                    payer_df['Label'] = payer_df['Consistent_Payer'].map({1:'Consistent',0:'Inconsistent'})
+                    payer_df = cached_value_counts(paths, fingerprints, 'insurer', 'Consistent_Payer')
+                    payer_df['Label'] = payer_df['value'].map({1:'Consistent',0:'Inconsistent'})
                     payer_chart = alt.Chart(payer_df).mark_bar().encode(
                         x='Label:N',
-                        y='count()',
+                        y=alt.Y('count:Q', title='Count'),
                         color='Label:N'
                     ).properties(height=240)
                     st.altair_chart(payer_chart, width='stretch')
@@ -166,8 +342,7 @@ def main():
                 q = st.text_input("Ask about inclusion opportunities:", "How many credit invisible customers can we help?", key="q2")
                 if q:
                     st.write(simulate_cortex_chat(q, results))
-                excel_bytes = inclusion_excel(bank_df, insurer_df, epsilon)
-                st.download_button("Download Excel (Financial Inclusion)", data=excel_bytes, file_name="inclusion_analysis.xlsx", mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
+                download_export("Financial Inclusion", 'inclusion', results, frames, export_format, "inclusion_analysis")
 
     with tab3:
         st.subheader("Use Case: Trading Risk Overlap")
@@ -175,13 +350,14 @@ def main():
         col1, col2 = st.columns(2)
         with col1:
             st.caption("Brokerage View (Risky Trading)")
-            st.dataframe(brokerage_df[brokerage_df['Is_Risky_Trading']==1][['Customer_ID_Hash', 'Portfolio_Value', 'Trading_Frequency']].head())
+            st.dataframe(get_cohort(brokerage_df, RISKY_TRADING).rows(brokerage_df, ['Customer_ID_Hash', 'Portfolio_Value', 'Trading_Frequency'], n=5))
         with col2:
             st.caption("Bank View (High Risk)")
-            st.dataframe(bank_df[bank_df['Is_Flagged_Fraud']==1][['Customer_ID_Hash', 'Risk_Score']].head())
+            st.dataframe(get_cohort(bank_df, FRAUD_FLAGGED).rows(bank_df, ['Customer_ID_Hash', 'Risk_Score'], n=5))
+        precompute_status('trading', paths, fingerprints)
         if st.button("Run Trading Risk Analysis", key="trade_btn"):
             with st.spinner("Computing private intersection..."):
-                results = compute_trading_overlap(bank_df, brokerage_df, epsilon=epsilon)
+                results = released_overlap('trading', paths, fingerprints, epsilon)
                 m1, m2, m3 = st.columns(3)
                 m1.metric("Brokerage Risky", results['Brokerage Risky Count'])
                 m2.metric("Bank Risky", results['Bank Risky Count'])
@@ -194,24 +370,30 @@ def main():
                 st.altair_chart(chart, width='stretch')
                 vis_cols = st.columns(2)
                 with vis_cols[0]:
-                    scatter = alt.Chart(brokerage_df[brokerage_df['Is_Risky_Trading']==1]).mark_circle(size=60).encode(
+                    points = cached_scatter(paths, fingerprints, 'brokerage', RISKY_TRADING,
+                                            ('Customer_ID_Hash', 'Trading_Frequency', 'Portfolio_Value'))
+                    scatter = alt.Chart(points).mark_circle(size=60).encode(
                         x=alt.X('Trading_Frequency:Q', title='Trading Frequency'),
                         y=alt.Y('Portfolio_Value:Q', title='Portfolio Value'),
                         tooltip=['Customer_ID_Hash','Trading_Frequency','Portfolio_Value']
                     ).properties(height=240)
                     st.altair_chart(scatter, width='stretch')
                 with vis_cols[1]:
-                    tf_hist = alt.Chart(brokerage_df).mark_bar().encode(
-                        alt.X('Trading_Frequency:Q', bin=alt.Bin(step=2), title='Trading Frequency (All)'),
-                        alt.Y('count()', title='Count')
-                    ).properties(height=240)
-                    st.altair_chart(tf_hist, width='stretch')
+                    tf_hist = cached_histogram(paths, fingerprints, 'brokerage', 'Trading_Frequency', step=2)
+                    st.altair_chart(histogram_chart(tf_hist, 'Trading Frequency (All)'), width='stretch')
                 st.divider()
                 st.markdown("#### 🤖 Cortex AI Analyst")
                 q = st.text_input("Ask about trading risk:", "How many overlapping risky traders did we find?", key="q3")
                 if q:
                     st.write(simulate_cortex_chat(q, results))
-                excel_bytes = trading_excel(bank_df, brokerage_df, epsilon)
-                st.download_button("Download Excel (Trading Risk)", data=excel_bytes, file_name="trading_risk_analysis.xlsx", mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
+                download_export("Trading Risk", 'trading', results, frames, export_format, "trading_risk_analysis")
+
+    with tab4:
+        utility_curve(paths, fingerprints, epsilon)
+
+    # Rendered last so it includes the stages timed during this run
+    if show_performance:
+        render_performance_panel()
+
 if __name__ == "__main__":
     main()
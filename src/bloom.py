@@ -0,0 +1,163 @@
+import math
+import numpy as np
+import pandas as pd
+from typing import Dict, Union
+from src.utils import setup_logger
+
+logger = setup_logger(__name__)
+
+DEFAULT_FPR = 0.01
+# Public filter capacity used when the caller does not set one (~1.2 MB at 1% FPR)
+DEFAULT_CAPACITY = 1_000_000
+# Double hashing (positions h1 + i*h2); h2 re-mixes h1 under a salt because
+# pandas ignores hash_key for numeric arrays
+_HASH_SALT = np.uint64(0x9E3779B97F4A7C15)
+# z-score for the one-sided 95% bound on false positives
+_Z95 = 1.6448536269514722
+# Keys hashed per pass, bounding the hash and position temporaries (~40 MB)
+CHUNK_SIZE = 1 << 20
+
+ArrayLike = Union[pd.Series, np.ndarray, list]
+
+def _chunks(keys: ArrayLike):
+    # Positional slices of keys with missing values dropped
+    for start in range(0, len(keys), CHUNK_SIZE):
+        chunk = keys.iloc[start:start + CHUNK_SIZE] if isinstance(keys, pd.Series) else keys[start:start + CHUNK_SIZE]
+        yield chunk[pd.notna(chunk)]
+
+def _hashes(keys: ArrayLike):
+    values = keys.to_numpy() if isinstance(keys, pd.Series) else np.asarray(keys)
+    if values.dtype.kind not in 'iuf':
+        values = values.astype(object)
+    h1 = pd.util.hash_array(values, categorize=False)
+    h2 = pd.util.hash_array(h1 ^ _HASH_SALT) | np.uint64(1)
+    return h1, h2
+
+class BloomFilter:
+    """
+    Bit-packed Bloom filter with vectorized insert and probe.
+
+    Sized for `capacity` keys at the target false-positive rate `fpr`:
+    m = -n ln(p) / ln(2)^2 bits and k = (m / n) ln(2) hash functions.
+    """
+
+    def __init__(self, capacity: int, fpr: float = DEFAULT_FPR):
+        if not 0 < fpr < 1:
+            raise ValueError(f"fpr must be in (0, 1), got {fpr}")
+        capacity = max(int(capacity), 1)
+        self.capacity = capacity
+        self.fpr = fpr
+        self.n_bits = max(int(math.ceil(-capacity * math.log(fpr) / math.log(2) ** 2)), 8)
+        self.n_hashes = max(int(round(self.n_bits / capacity * math.log(2))), 1)
+        self.bits = np.zeros((self.n_bits + 7) // 8, dtype=np.uint8)
+        self.count = 0
+
+    def _positions(self, keys: ArrayLike):
+        h1, h2 = _hashes(keys)
+        m = np.uint64(self.n_bits)
+        for i in range(self.n_hashes):
+            yield (h1 + np.uint64(i) * h2) % m
+
+    def add(self, keys: ArrayLike) -> None:
+        """Inserts distinct keys."""
+        for pos in self._positions(keys):
+            np.bitwise_or.at(self.bits, pos >> np.uint64(3), np.left_shift(1, pos & np.uint64(7)).astype(np.uint8))
+        self.count += len(keys)
+
+    def contains(self, keys: ArrayLike) -> np.ndarray:
+        """Returns a boolean mask: False means definitely absent, True means probably present."""
+        hit = np.ones(len(keys), dtype=bool)
+        for pos in self._positions(keys):
+            hit &= ((self.bits[pos >> np.uint64(3)] >> (pos & np.uint64(7)).astype(np.uint8)) & 1).astype(bool)
+        return hit
+
+    @property
+    def size_bytes(self) -> int:
+        """Size of the published filter."""
+        return self.bits.nbytes
+
+    def expected_fpr(self, n_keys: int) -> float:
+        """Expected false-positive rate after n_keys distinct insertions: (1 - e^(-kn/m))^k."""
+        return float((1 - math.exp(-self.n_hashes * n_keys / self.n_bits)) ** self.n_hashes)
+
+    @property
+    def capacity_fpr(self) -> float:
+        """False-positive rate once capacity keys are inserted; depends only on the public sizing."""
+        return self.expected_fpr(self.capacity)
+
+    def estimated_fpr(self) -> float:
+        """False-positive rate implied by the actual fill ratio: (bits set / m)^k."""
+        fill = np.unpackbits(self.bits)[:self.n_bits].mean() if self.n_bits else 0.0
+        return float(fill ** self.n_hashes)
+
+def bloom_capacity(*cohort_sizes: int) -> int:
+    """
+    Public capacity for filters over cohorts of the given sizes: the largest, rounded
+    up to a power of two (at least 1024). Cohort sizes are released with every
+    overlap, so the capacity reveals nothing further, and rounding keeps the filter
+    shape fixed across neighbouring datasets except at powers of two.
+    """
+    return max(1024, 1 << (max(cohort_sizes, default=0) - 1).bit_length())
+
+def approximate_overlap(left: ArrayLike, right: ArrayLike, fpr: float = DEFAULT_FPR,
+                        capacity: int = DEFAULT_CAPACITY) -> Dict[str, float]:
+    """
+    Estimates |left ∩ right| by publishing a Bloom filter of left and probing it with right.
+
+    The filter is sized from the public capacity, not from len(left), so its
+    shape does not depend on the data. The false-positive correction uses the
+    filter's public rate p, which is the FPR at full capacity and close to the
+    target fpr: estimate = (positives - p * n_probe) / (1 - p).
+
+    Both sides must fit in capacity. A changed probe key then moves the estimate
+    by at most 1 / (1 - p), which is the sensitivity the Laplace noise is
+    calibrated to. A changed published key sets at most k bits, and it only flips
+    probes that false-positive on those bits. That is rare (well under one probe)
+    while the probe side is within capacity, but it holds for keys independent of
+    the hash function rather than for adversarial ones. Publish the larger
+    party: the estimate is tightest when the filter is near capacity and the
+    probe side is small.
+
+    Args:
+        left: Keys of the publishing party. Duplicates set the same bits, so a cohort's
+            keys can be streamed in without de-duplicating them first; the error bound
+            then counts rows, which is exact for distinct keys.
+        right: Distinct keys of the probing party.
+        fpr (float): Target false-positive rate at capacity.
+        capacity (int): Public upper bound on the size of either side.
+
+    Returns:
+        Dict[str, float]: 'estimate', 'positives', 'fpr' (the public rate p), 'error_bound'
+        (95% bound on |estimate - overlap|), 'sensitivity' (of the estimate to one
+        individual) and 'filter_bytes'.
+    """
+    if max(len(left), len(right)) > capacity:
+        raise ValueError(f"Cohorts of {len(left)} and {len(right)} keys exceed the Bloom filter capacity "
+                         f"of {capacity}; pass a larger public capacity.")
+    bloom = BloomFilter(capacity, fpr)
+    n_left = 0
+    for chunk in _chunks(left):
+        bloom.add(chunk)
+        n_left += len(chunk)
+    positives = n_probe = 0
+    for chunk in _chunks(right):
+        positives += int(bloom.contains(chunk).sum())
+        n_probe += len(chunk)
+    p = bloom.capacity_fpr
+    estimate = min(max((positives - p * n_probe) / (1 - p), 0.0), float(min(n_left, n_probe)))
+    # False positives are at most Binomial(n_probe, p) while the filter is within capacity,
+    # so the estimate overshoots by at most their spread. Below capacity the expected rate
+    # is lower, and the correction undershoots by up to the gap times n_probe
+    # (n_left is at most the released cohort size, so this uses no hidden data)
+    spread = _Z95 * math.sqrt(n_probe * p * (1 - p))
+    error_bound = (spread + (p - bloom.expected_fpr(n_left)) * n_probe) / (1 - p)
+    logger.debug(f"Bloom overlap: {positives} positives of {n_probe} probes, fpr={p:.4g}, "
+                 f"filter={bloom.size_bytes} bytes")
+    return {
+        'estimate': estimate,
+        'positives': positives,
+        'fpr': p,
+        'error_bound': error_bound,
+        'sensitivity': 1.0 / (1 - p),
+        'filter_bytes': bloom.size_bytes
+    }
@@ -0,0 +1,79 @@
+"""
+Chart data layer for the dashboard.
+
+Charts receive small aggregates computed here in NumPy (histogram bins, value
+counts, a fixed-size sample of scatter points) instead of raw rows binned by
+Vega in the browser. The payload is bounded by max_bins / max_points however
+many rows the datasets have.
+"""
+import math
+from typing import Optional, Sequence
+import numpy as np
+import pandas as pd
+from src.utils import span
+
+DEFAULT_MAX_BINS = 30
+# Upper bound on bins even when a fixed step is requested
+MAX_BINS = 200
+DEFAULT_MAX_POINTS = 2_000
+
+def nice_step(lo: float, hi: float, maxbins: int = DEFAULT_MAX_BINS) -> float:
+    """Smallest 1, 2 or 5 x 10^k bin width that covers [lo, hi] in at most maxbins bins."""
+    width = hi - lo
+    if not width > 0:
+        return 1.0
+    raw = width / maxbins
+    magnitude = 10 ** math.floor(math.log10(raw))
+    for factor in (1, 2, 5, 10):
+        if factor * magnitude >= raw:
+            return float(factor * magnitude)
+    return float(10 * magnitude)
+
+def histogram(values, step: Optional[float] = None, maxbins: int = DEFAULT_MAX_BINS) -> pd.DataFrame:
+    """
+    Bins values into equal-width bins aligned to multiples of the step.
+
+    Args:
+        values: Numeric values; missing values are ignored.
+        step (Optional[float]): Bin width. It is widened if it would need more than MAX_BINS bins.
+        maxbins (int): Bin budget used to pick a width when step is None.
+
+    Returns:
+        pd.DataFrame: 'bin_start', 'bin_end' and 'count', one row per bin.
+    """
+    values = np.asarray(values, dtype=float)
+    values = values[~np.isnan(values)]
+    if values.size == 0:
+        return pd.DataFrame({'bin_start': [], 'bin_end': [], 'count': []})
+    with span('chart.histogram', rows=values.size):
+        lo, hi = float(values.min()), float(values.max())
+        if step is None or (hi - lo) / step > MAX_BINS:
+            step = nice_step(lo, hi, maxbins if step is None else MAX_BINS)
+        first = math.floor(lo / step)
+        n_bins = max(int(math.floor(hi / step)) - first + 1, 1)
+        # Bin numbers by division: one O(n) pass, no sort
+        index = np.floor(values / step).astype(np.int64) - first
+        counts = np.bincount(np.clip(index, 0, n_bins - 1), minlength=n_bins)
+    starts = (first + np.arange(n_bins)) * step
+    return pd.DataFrame({'bin_start': starts, 'bin_end': starts + step, 'count': counts})
+
+def value_counts(values) -> pd.DataFrame:
+    """Counts of each distinct value: 'value' and 'count', sorted by value."""
+    with span('chart.value_counts', rows=len(values)):
+        uniques, counts = np.unique(np.asarray(values), return_counts=True)
+    return pd.DataFrame({'value': uniques, 'count': counts})
+
+def downsample(df: pd.DataFrame, columns: Optional[Sequence[str]] = None, max_points: int = DEFAULT_MAX_POINTS,
+               seed: int = 0) -> pd.DataFrame:
+    """
+    A uniform random sample of at most max_points rows, in their original order.
+
+    The sample is seeded, so the same data always gives the same points.
+    """
+    if columns is not None:
+        df = df[list(columns)]
+    if len(df) <= max_points:
+        return df.reset_index(drop=True)
+    with span('chart.downsample', rows=len(df), max_points=max_points):
+        positions = np.sort(np.random.default_rng(seed).choice(len(df), size=max_points, replace=False))
+    return df.iloc[positions].reset_index(drop=True)
@@ -0,0 +1,247 @@
+"""
+Asyncio service hosting the analyst chat for many concurrent sessions.
+
+The protocol is newline-delimited JSON over TCP, one request per line and one
+response per line:
+
+    {"type": "context", "session": "s1", "results": {...}}  -> {"ok": true}
+    {"type": "chat", "session": "s1", "query": "..."}       -> {"answer": "...", "intent": "..."}
+    {"type": "stats"}                                       -> {"count": ..., "p50_ms": ..., "p99_ms": ...}
+
+Each session keeps the analysis results its questions are answered from. Chat
+queries arriving within a short window are classified together in one batch
+(see classify_intents) before being answered.
+
+Run with: python -m src.chat_service --port 8765
+"""
+import argparse
+import asyncio
+import json
+import time
+from collections import OrderedDict, deque
+from typing import Dict, Optional
+import numpy as np
+from src.fraud_analysis import classify_intents, simulate_cortex_chat
+from src.utils import setup_logger
+
+logger = setup_logger(__name__)
+
+DEFAULT_MAX_BATCH = 64
+# Longest a query waits for others to share its classification batch
+DEFAULT_MAX_DELAY = 0.002
+DEFAULT_MAX_SESSIONS = 10_000
+LATENCY_WINDOW = 100_000
+
+class ChatService:
+    """
+    Chat server with per-session context and micro-batched intent classification.
+
+    Args:
+        max_batch (int): Most queries classified in one batch.
+        max_delay (float): Seconds the batcher waits to fill a batch once a query arrives.
+        max_sessions (int): Least recently used sessions beyond this are dropped.
+    """
+
+    def __init__(self, max_batch: int = DEFAULT_MAX_BATCH, max_delay: float = DEFAULT_MAX_DELAY,
+                 max_sessions: int = DEFAULT_MAX_SESSIONS):
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.max_sessions = max_sessions
+        self.sessions: "OrderedDict[str, dict]" = OrderedDict()
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+        self.batches = 0
+        self._queue: Optional[asyncio.Queue] = None
+        self._batcher: Optional[asyncio.Task] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+        self.port: Optional[int] = None
+
+    def set_context(self, session: str, results: dict) -> None:
+        """Sets the analysis results a session's questions are answered from."""
+        self.sessions[session] = results
+        self.sessions.move_to_end(session)
+        while len(self.sessions) > self.max_sessions:
+            self.sessions.popitem(last=False)
+
+    async def ask(self, session: str, query: str) -> Dict[str, str]:
+        """Answers one query; it is classified together with any queries arriving alongside it."""
+        if self._queue is None:
+            raise RuntimeError("ChatService is not running; call start() first.")
+        results = self.sessions.get(session, {})
+        if session in self.sessions:
+            self.sessions.move_to_end(session)
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((query, results, future))
+        return await future
+
+    async def _run_batcher(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_delay
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            self.batches += 1
+            try:
+                intents = classify_intents([query for query, _, _ in batch])
+            except Exception as e:
+                logger.exception("Chat batch failed")
+                for _, _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            # Answered one by one, so a session with bad context only fails its own query
+            for (query, results, future), intent in zip(batch, intents):
+                if future.done():
+                    continue
+                try:
+                    future.set_result({'answer': simulate_cortex_chat(query, results, intent=intent), 'intent': intent})
+                except Exception as e:
+                    logger.exception("Chat query failed")
+                    future.set_exception(e)
+
+    async def handle(self, request: dict) -> dict:
+        """Dispatches one protocol request (see the module docstring)."""
+        if not isinstance(request, dict):
+            return {'error': f"Bad request: expected a JSON object, got {type(request).__name__}."}
+        kind = request.get('type')
+        if kind == 'chat':
+            return await self.ask(str(request.get('session', '')), str(request.get('query', '')))
+        if kind == 'context':
+            self.set_context(str(request.get('session', '')), dict(request.get('results') or {}))
+            return {'ok': True}
+        if kind == 'stats':
+            return self.latency_stats()
+        return {'error': f"Unknown request type '{kind}'. Expected 'chat', 'context' or 'stats'."}
+
+    async def _serve_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                start = time.perf_counter()
+                try:
+                    response = await self.handle(json.loads(line))
+                except (json.JSONDecodeError, TypeError, ValueError) as e:
+                    response = {'error': f"Bad request: {e}"}
+                writer.write(json.dumps(response).encode() + b'\n')
+                await writer.drain()
+                self.latencies.append(time.perf_counter() - start)
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    def latency_stats(self) -> Dict[str, float]:
+        """Server-side request latency over the recent window: count, p50_ms, p99_ms and batches."""
+        if not self.latencies:
+            return {'count': 0, 'p50_ms': 0.0, 'p99_ms': 0.0, 'batches': self.batches}
+        p50, p99 = np.percentile(np.fromiter(self.latencies, dtype=float), [50, 99]) * 1e3
+        return {'count': len(self.latencies), 'p50_ms': float(p50), 'p99_ms': float(p99), 'batches': self.batches}
+
+    async def start(self, host: str = '127.0.0.1', port: int = 0) -> int:
+        """Starts serving on host:port (0 picks a free port) and returns the bound port."""
+        self._queue = asyncio.Queue()
+        self._batcher = asyncio.create_task(self._run_batcher())
+        self._server = await asyncio.start_server(self._serve_client, host, port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        logger.info(f"Chat service listening on {host}:{self.port}")
+        return self.port
+
+    async def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        if self._batcher is not None:
+            self._batcher.cancel()
+            try:
+                await self._batcher
+            except asyncio.CancelledError:
+                pass
+        self._queue = None
+
+class ChatClient:
+    """Minimal client for ChatService; one connection, one request in flight at a time."""
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self._reader = reader
+        self._writer = writer
+
+    @classmethod
+    async def connect(cls, host: str = '127.0.0.1', port: int = 8765) -> "ChatClient":
+        reader, writer = await asyncio.open_connection(host, port)
+        return cls(reader, writer)
+
+    async def request(self, payload: dict) -> dict:
+        self._writer.write(json.dumps(payload).encode() + b'\n')
+        await self._writer.drain()
+        return json.loads(await self._reader.readline())
+
+    async def set_context(self, session: str, results: dict) -> dict:
+        return await self.request({'type': 'context', 'session': session, 'results': results})
+
+    async def chat(self, session: str, query: str) -> dict:
+        return await self.request({'type': 'chat', 'session': session, 'query': query})
+
+    async def stats(self) -> dict:
+        return await self.request({'type': 'stats'})
+
+    async def close(self) -> None:
+        self._writer.close()
+        await self._writer.wait_closed()
+
+async def run_load(host: str, port: int, n_clients: int = 50, queries_per_client: int = 20,
+                   queries=("How many overlapping fraudsters did we find?", "Explain epsilon", "Compare bank vs insurer")) -> Dict[str, float]:
+    """
+    Drives n_clients concurrent sessions against a running service.
+
+    Returns:
+        Dict[str, float]: Client-observed 'requests', 'seconds', 'requests_per_second',
+        'p50_ms' and 'p99_ms'.
+    """
+    latencies = []
+    context = {'Bank Risky Count': 140, 'Insurer Risky Count': 120, 'True Overlap': 4, 'Private Overlap': 4.6}
+
+    async def session(i: int):
+        client = await ChatClient.connect(host, port)
+        try:
+            await client.set_context(f'load-{i}', context)
+            for j in range(queries_per_client):
+                start = time.perf_counter()
+                await client.chat(f'load-{i}', queries[j % len(queries)])
+                latencies.append(time.perf_counter() - start)
+        finally:
+            await client.close()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(session(i) for i in range(n_clients)))
+    seconds = time.perf_counter() - start
+    p50, p99 = np.percentile(latencies, [50, 99]) * 1e3
+    return {'requests': len(latencies), 'seconds': seconds, 'requests_per_second': len(latencies) / seconds,
+            'p50_ms': float(p50), 'p99_ms': float(p99)}
+
+async def _serve_forever(host: str, port: int, max_batch: int, max_delay: float) -> None:
+    service = ChatService(max_batch=max_batch, max_delay=max_delay)
+    await service.start(host, port)
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await service.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve the analyst chat over newline-delimited JSON.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--max-batch', type=int, default=DEFAULT_MAX_BATCH)
+    parser.add_argument('--max-delay', type=float, default=DEFAULT_MAX_DELAY)
+    args = parser.parse_args()
+    try:
+        asyncio.run(_serve_forever(args.host, args.port, args.max_batch, args.max_delay))
+    except KeyboardInterrupt:
+        pass
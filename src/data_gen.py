@@ -1,98 +1,307 @@
 import pandas as pd
 import numpy as np
 import hashlib
-from typing import Optional
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Iterable, Iterator, List, Optional, Sequence, Tuple
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Prefix shared by the bank and the partners' overlapping customers
+OVERLAP_PREFIX = "Global Bank"
+# Number of IDs built and hashed per task when generating in batches
+HASH_BATCH_SIZE = 250_000
+# Rows per DataFrame yielded by the iter_*_data generators
+DEFAULT_CHUNK_SIZE = 1_000_000
+# Rows per independent random stream; any row range can be generated on its own
+SHARD_ROWS = 100_000
+# 95th percentile of lognormal(mean=10, sigma=0.5), the brokerage risky-value threshold
+PORTFOLIO_P95 = float(np.exp(10 + 0.5 * 1.6448536269514722))
+
 def hash_customer_id(customer_id: str) -> str:
     """Hashes a customer ID using SHA-256 for privacy."""
     return hashlib.sha256(customer_id.encode()).hexdigest()
 
-def generate_bank_data(bank_name: str, n_customers: int = 1000, seed: int = 42) -> pd.DataFrame:
-    """Generates synthetic bank data including Risk Scores and Credit History."""
-    np.random.seed(seed)
-    
-    # Generate fake IDs
-    ids = [f"{bank_name}_CUST_{i:05d}" for i in range(n_customers)]
-    hashed_ids = [hash_customer_id(i) for i in ids]
-    
+def hash_customer_ids(customer_ids: Sequence[str]) -> List[str]:
+    """Hashes a batch of customer IDs; same output as hash_customer_id per element."""
+    sha256 = hashlib.sha256
+    return [sha256(c.encode()).hexdigest() for c in customer_ids]
+
+def _customer_ids(name: str, start: int, stop: int, overlap_count: int = 0) -> List[str]:
+    """Builds the raw IDs for rows [start, stop); rows below overlap_count reuse Global Bank IDs."""
+    split = min(max(overlap_count, start), stop)
+    ids = [f"{OVERLAP_PREFIX}_CUST_{i:05d}" for i in range(start, split)]
+    ids.extend(f"{name}_CUST_{i:05d}" for i in range(split, stop))
+    return ids
+
+def _id_hash_batch(args: Tuple[str, int, int, int]) -> Tuple[List[str], List[str]]:
+    name, start, stop, overlap_count = args
+    ids = _customer_ids(name, start, stop, overlap_count)
+    return ids, hash_customer_ids(ids)
+
+def _resolve_jobs(n_jobs: int) -> int:
+    if n_jobs is None or n_jobs < 1:
+        return os.cpu_count() or 1
+    return n_jobs
+
+def _concat_batches(batches) -> Tuple[List[str], List[str]]:
+    ids: List[str] = []
+    hashed_ids: List[str] = []
+    for batch_ids, batch_hashes in batches:
+        ids.extend(batch_ids)
+        hashed_ids.extend(batch_hashes)
+    return ids, hashed_ids
+
+def build_customer_ids(name: str, n_customers: int, overlap_count: int = 0,
+                       n_jobs: int = 1, batch_size: int = HASH_BATCH_SIZE, start: int = 0) -> Tuple[List[str], List[str]]:
+    """
+    Builds raw and hashed customer IDs in batches, optionally across a process pool.
+
+    Args:
+        name (str): Company name used as the ID prefix.
+        n_customers (int): Total table size; IDs are built for rows [start, n_customers).
+        overlap_count (int): Leading rows that reuse Global Bank IDs.
+        n_jobs (int): Worker processes; 1 runs in-process, <= 0 uses all cores.
+        batch_size (int): IDs per task.
+        start (int): First row to build, for chunked generation.
+
+    Returns:
+        Tuple[List[str], List[str]]: Raw IDs and their SHA-256 hashes, in row order.
+        The output does not depend on n_jobs or batch_size.
+    """
+    tasks = [(name, lo, min(lo + batch_size, n_customers), overlap_count)
+             for lo in range(start, n_customers, batch_size)]
+    n_jobs = min(_resolve_jobs(n_jobs), len(tasks))
+    if n_jobs <= 1:
+        return _concat_batches(map(_id_hash_batch, tasks))
+    with ProcessPoolExecutor(max_workers=n_jobs) as pool:
+        return _concat_batches(pool.map(_id_hash_batch, tasks))
+
+class RowStreams:
+    """
+    Reproducible random draws for rows [start, stop) of a logical dataset.
+
+    Rows are grouped into shards of shard_rows, and every (shard, column) pair has its
+    own stream, seeded with SeedSequence(seed).spawn(...)[shard].spawn(...)[column].
+    A row's values therefore depend only on the seed and its row number, so any row
+    range can be generated on its own (in another thread, process or machine) and
+    matches the same rows of a single full-table run. No global RNG state is used.
+    """
+
+    def __init__(self, seed: int, start: int, stop: int, shard_rows: int = SHARD_ROWS):
+        self.seed = seed
+        self.start = start
+        self.stop = stop
+        self.shard_rows = shard_rows
+
+    def rng(self, shard: int, column: int) -> np.random.Generator:
+        # Same stream as SeedSequence(seed).spawn(shard + 1)[shard].spawn(column + 1)[column]
+        return np.random.default_rng(np.random.SeedSequence(self.seed, spawn_key=(shard, column)))
+
+    def draw(self, column: int, fn: Callable[[np.random.Generator, int], np.ndarray]) -> np.ndarray:
+        """
+        Draws one column for the rows of this range.
+
+        Args:
+            column (int): Stream number of the column within the dataset.
+            fn: (rng, n) -> n values. Draws must be elementwise, so the first n values
+                of a stream do not depend on how many are drawn.
+        """
+        if self.stop <= self.start:
+            return fn(self.rng(0, column), 0)
+        parts = []
+        for shard in range(self.start // self.shard_rows, (self.stop - 1) // self.shard_rows + 1):
+            lo = shard * self.shard_rows
+            # Draw the shard's prefix up to the last needed row and drop the rows before start
+            values = fn(self.rng(shard, column), min(self.stop, lo + self.shard_rows) - lo)
+            parts.append(values[max(self.start, lo) - lo:])
+        return parts[0] if len(parts) == 1 else np.concatenate(parts)
+
+def _bank_frame(streams: RowStreams, ids: List[str], hashed_ids: List[str]) -> pd.DataFrame:
     # Risk Score (0-100), higher is riskier
-    risk_scores = np.random.randint(0, 101, size=n_customers)
+    risk_scores = streams.draw(0, lambda rng, n: rng.integers(0, 101, size=n))
     
     # Credit History (Months) - Skewed low for "Credit Invisible" simulation
-    credit_history_months = np.random.gamma(2, 10, size=n_customers).astype(int)
+    credit_history_months = streams.draw(1, lambda rng, n: rng.gamma(2, 10, size=n)).astype(int)
     
     # Fraud Flag (correlated with high risk)
-    is_fraud = (risk_scores > 80) & (np.random.rand(n_customers) > 0.3)
+    is_fraud = (risk_scores > 80) & (streams.draw(2, lambda rng, n: rng.random(n)) > 0.3)
     
-    df = pd.DataFrame({
+    return pd.DataFrame({
         'Customer_ID_Raw': ids,
         'Customer_ID_Hash': hashed_ids,
         'Risk_Score': risk_scores,
         'Credit_History_Months': credit_history_months,
-        'Transaction_Volume': np.random.normal(5000, 2000, size=n_customers).round(2),
+        'Transaction_Volume': streams.draw(3, lambda rng, n: rng.normal(5000, 2000, size=n)).round(2),
         'Is_Flagged_Fraud': is_fraud.astype(int)
     })
-    
-    logger.info(f"Generated {n_customers} records for {bank_name}")
-    return df
 
-def generate_insurer_data(insurer_name: str, n_customers: int = 1000, seed: int = 42) -> pd.DataFrame:
-    """Generates synthetic insurer data including Claims and Payment History."""
-    np.random.seed(seed)
-    
-    ids = [f"{insurer_name}_CUST_{i:05d}" for i in range(n_customers)]
-    # Create some overlap with Bank IDs for the simulation
-    # We'll overlap the first 50% of IDs roughly
-    overlap_count = int(n_customers * 0.5)
-    bank_ids_overlap = [f"Global Bank_CUST_{i:05d}" for i in range(overlap_count)]
-    final_ids = bank_ids_overlap + ids[overlap_count:]
-    
-    hashed_ids = [hash_customer_id(i) for i in final_ids]
-    
+def _insurer_frame(streams: RowStreams, ids: List[str], hashed_ids: List[str]) -> pd.DataFrame:
     # Claims History
-    claim_amount = np.random.exponential(1000, size=n_customers).round(2)
+    claim_amount = streams.draw(0, lambda rng, n: rng.exponential(1000, size=n)).round(2)
     
     # Good Payment History (for Credit Invisible use case)
     # 1 = Consistent Payer, 0 = Inconsistent
-    consistent_payer = np.random.choice([0, 1], size=n_customers, p=[0.2, 0.8])
+    consistent_payer = streams.draw(1, lambda rng, n: rng.choice([0, 1], size=n, p=[0.2, 0.8]))
     
     # Fraud Flag
-    is_fraud = (claim_amount > 5000) & (np.random.rand(n_customers) > 0.5)
+    is_fraud = (claim_amount > 5000) & (streams.draw(2, lambda rng, n: rng.random(n)) > 0.5)
     
-    df = pd.DataFrame({
-        'Customer_ID_Raw': final_ids,
+    return pd.DataFrame({
+        'Customer_ID_Raw': ids,
         'Customer_ID_Hash': hashed_ids,
         'Claim_Amount': claim_amount,
         'Consistent_Payer': consistent_payer,
         'Is_Flagged_Fraud': is_fraud.astype(int)
     })
-    
-    logger.info(f"Generated {n_customers} records for {insurer_name}")
-    return df
 
-def generate_brokerage_data(broker_name: str, n_customers: int = 1000, seed: int = 42) -> pd.DataFrame:
-    np.random.seed(seed)
-    ids = [f"{broker_name}_CUST_{i:05d}" for i in range(n_customers)]
-    overlap_count = int(n_customers * 0.5)
-    bank_ids_overlap = [f"Global Bank_CUST_{i:05d}" for i in range(overlap_count)]
-    final_ids = bank_ids_overlap + ids[overlap_count:]
-    hashed_ids = [hash_customer_id(i) for i in final_ids]
-    portfolio_value = np.random.lognormal(mean=10, sigma=0.5, size=n_customers).round(2)
-    trading_frequency = np.random.poisson(lam=20, size=n_customers)
-    is_risky_trading = ((trading_frequency > 40) | (portfolio_value > np.percentile(portfolio_value, 95))) & (np.random.rand(n_customers) > 0.4)
-    df = pd.DataFrame({
-        'Customer_ID_Raw': final_ids,
+def _brokerage_frame(streams: RowStreams, ids: List[str], hashed_ids: List[str]) -> pd.DataFrame:
+    portfolio_value = streams.draw(0, lambda rng, n: rng.lognormal(mean=10, sigma=0.5, size=n)).round(2)
+    trading_frequency = streams.draw(1, lambda rng, n: rng.poisson(lam=20, size=n))
+    # The distribution's 95th percentile rather than the column's, so a row range
+    # does not need the rest of the table
+    is_risky_trading = (((trading_frequency > 40) | (portfolio_value > PORTFOLIO_P95))
+                        & (streams.draw(2, lambda rng, n: rng.random(n)) > 0.4))
+    return pd.DataFrame({
+        'Customer_ID_Raw': ids,
         'Customer_ID_Hash': hashed_ids,
         'Portfolio_Value': portfolio_value,
         'Trading_Frequency': trading_frequency,
         'Is_Risky_Trading': is_risky_trading.astype(int)
     })
-    logger.info(f"Generated {n_customers} records for {broker_name}")
+
+# dataset -> (frame builder, share of leading rows that reuse Global Bank IDs)
+DATASET_BUILDERS = {
+    'bank': (_bank_frame, 0.0),
+    'insurer': (_insurer_frame, 0.5),
+    'brokerage': (_brokerage_frame, 0.5),
+}
+
+def generate_rows(dataset: str, name: str, start: int, stop: int, n_customers: int, seed: int = 42,
+                  n_jobs: int = 1) -> pd.DataFrame:
+    """
+    Generates rows [start, stop) of a synthetic dataset of n_customers rows.
+
+    The rows are identical to the same rows of generate_*_data(name, n_customers, seed),
+    so shards of one logical dataset can be generated independently and concatenated.
+
+    Args:
+        dataset (str): 'bank', 'insurer' or 'brokerage'.
+        name (str): Company name used as the ID prefix.
+        start (int): First row.
+        stop (int): Row after the last one.
+        n_customers (int): Size of the whole table (it sets the Global Bank overlap).
+        seed (int): Seed of the logical dataset.
+        n_jobs (int): Processes used to hash the IDs.
+
+    Returns:
+        pd.DataFrame: stop - start rows, indexed from 0.
+    """
+    try:
+        build_frame, overlap_share = DATASET_BUILDERS[dataset]
+    except KeyError:
+        raise ValueError(f"Unknown dataset '{dataset}'. Expected one of {list(DATASET_BUILDERS)}.") from None
+    ids, hashed_ids = build_customer_ids(name, stop, int(n_customers * overlap_share), n_jobs=n_jobs, start=start)
+    return build_frame(RowStreams(seed, start, stop), ids, hashed_ids)
+
+def _generate_range(args: Tuple[str, str, int, int, int, int]) -> pd.DataFrame:
+    return generate_rows(*args)
+
+def _generate(dataset: str, name: str, n_customers: int, seed: int, n_jobs: int) -> pd.DataFrame:
+    ranges = [(lo, min(lo + SHARD_ROWS, n_customers)) for lo in range(0, n_customers, SHARD_ROWS)]
+    workers = min(_resolve_jobs(n_jobs), len(ranges))
+    if workers <= 1:
+        # A single shard still hashes its IDs across n_jobs processes
+        df = generate_rows(dataset, name, 0, n_customers, n_customers, seed, n_jobs)
+    else:
+        # Whole shards (IDs, hashes and values) are built across the pool
+        tasks = [(dataset, name, lo, hi, n_customers, seed) for lo, hi in ranges]
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            df = pd.concat(pool.map(_generate_range, tasks), ignore_index=True)
+    logger.info(f"Generated {n_customers} records for {name}")
     return df
 
+def generate_bank_data(bank_name: str, n_customers: int = 1000, seed: int = 42, n_jobs: int = 1) -> pd.DataFrame:
+    """Generates synthetic bank data including Risk Scores and Credit History.
+
+    n_jobs > 1 generates shards across a process pool; the output is identical to the serial path.
+    """
+    return _generate('bank', bank_name, n_customers, seed, n_jobs)
+
+def generate_insurer_data(insurer_name: str, n_customers: int = 1000, seed: int = 42, n_jobs: int = 1) -> pd.DataFrame:
+    """Generates synthetic insurer data including Claims and Payment History."""
+    # Create some overlap with Bank IDs for the simulation
+    # We'll overlap the first 50% of IDs roughly
+    return _generate('insurer', insurer_name, n_customers, seed, n_jobs)
+
+def generate_brokerage_data(broker_name: str, n_customers: int = 1000, seed: int = 42, n_jobs: int = 1) -> pd.DataFrame:
+    return _generate('brokerage', broker_name, n_customers, seed, n_jobs)
+
+def _iter_chunks(dataset: str, name: str, n_customers: int, chunk_size: int, seed: int, n_jobs: int) -> Iterator[pd.DataFrame]:
+    for start in range(0, n_customers, chunk_size):
+        stop = min(start + chunk_size, n_customers)
+        # IDs and random streams use global row numbers, so chunks match the full table
+        yield generate_rows(dataset, name, start, stop, n_customers, seed, n_jobs)
+    logger.info(f"Generated {n_customers} records for {name} in chunks of {chunk_size}")
+
+def iter_bank_data(bank_name: str, n_customers: int = 1000, chunk_size: int = DEFAULT_CHUNK_SIZE, seed: int = 42, n_jobs: int = 1) -> Iterator[pd.DataFrame]:
+    """Yields synthetic bank data in chunks of at most chunk_size rows."""
+    return _iter_chunks('bank', bank_name, n_customers, chunk_size, seed, n_jobs)
+
+def iter_insurer_data(insurer_name: str, n_customers: int = 1000, chunk_size: int = DEFAULT_CHUNK_SIZE, seed: int = 42, n_jobs: int = 1) -> Iterator[pd.DataFrame]:
+    """Yields synthetic insurer data in chunks; the first 50% of rows overlap with Global Bank."""
+    return _iter_chunks('insurer', insurer_name, n_customers, chunk_size, seed, n_jobs)
+
+def iter_brokerage_data(broker_name: str, n_customers: int = 1000, chunk_size: int = DEFAULT_CHUNK_SIZE, seed: int = 42, n_jobs: int = 1) -> Iterator[pd.DataFrame]:
+    """Yields synthetic brokerage data in chunks; the first 50% of rows overlap with Global Bank."""
+    return _iter_chunks('brokerage', broker_name, n_customers, chunk_size, seed, n_jobs)
+
+def write_chunks(chunks: Iterable[pd.DataFrame], path: str, file_format: Optional[str] = None) -> int:
+    """
+    Streams DataFrame chunks to a single CSV or Parquet file.
+
+    Args:
+        chunks (Iterable[pd.DataFrame]): Chunks with identical columns, e.g. from iter_bank_data.
+        path (str): Output file path.
+        file_format (Optional[str]): 'csv' or 'parquet'. Inferred from the extension if None.
+
+    Returns:
+        int: Number of rows written.
+    """
+    if file_format is None:
+        file_format = 'parquet' if path.endswith('.parquet') else 'csv'
+    rows = 0
+    if file_format == 'csv':
+        with open(path, 'w', newline='') as f:
+            for i, chunk in enumerate(chunks):
+                chunk.to_csv(f, header=(i == 0), index=False)
+                rows += len(chunk)
+    elif file_format == 'parquet':
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise ImportError("Writing Parquet requires pyarrow (pip install pyarrow).") from e
+        writer = None
+        try:
+            for chunk in chunks:
+                table = pa.Table.from_pandas(chunk, preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(path, table.schema)
+                elif not table.schema.equals(writer.schema):
+                    # e.g. a CSV chunk whose column inferred as int after earlier chunks were float
+                    table = table.cast(writer.schema)
+                writer.write_table(table)
+                rows += len(chunk)
+        finally:
+            if writer is not None:
+                writer.close()
+    else:
+        raise ValueError(f"Unsupported file format: {file_format}")
+    logger.info(f"Wrote {rows} rows to {path}")
+    return rows
+
 if __name__ == "__main__":
     # Test generation
     logging.basicConfig(level=logging.INFO)
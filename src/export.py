@@ -1,33 +1,114 @@
 import io
+import math
+import zipfile
+from typing import Dict, Optional, Union
 import pandas as pd
+import xlsxwriter
 from src.fraud_analysis import compute_fraud_overlap, compute_inclusion_overlap, compute_trading_overlap
+from src.cohorts import get_cohort, FRAUD_FLAGGED, THIN_CREDIT, CONSISTENT_PAYER, RISKY_TRADING
+from src.utils import span
 
-def fraud_excel(bank_df: pd.DataFrame, insurer_df: pd.DataFrame, epsilon: float = 1.0) -> bytes:
-    buf = io.BytesIO()
-    results = compute_fraud_overlap(bank_df, insurer_df, epsilon)
-    with pd.ExcelWriter(buf, engine="xlsxwriter") as writer:
-        pd.DataFrame([results]).to_excel(writer, sheet_name="Summary", index=False)
-        bank_df[bank_df["Is_Flagged_Fraud"] == 1][["Customer_ID_Hash", "Risk_Score"]].head(100).to_excel(writer, sheet_name="BankSample", index=False)
-        insurer_df[insurer_df["Is_Flagged_Fraud"] == 1][["Customer_ID_Hash", "Claim_Amount"]].head(100).to_excel(writer, sheet_name="InsurerSample", index=False)
-    buf.seek(0)
-    return buf.read()
-
-def inclusion_excel(bank_df: pd.DataFrame, insurer_df: pd.DataFrame, epsilon: float = 1.0) -> bytes:
-    buf = io.BytesIO()
-    results = compute_inclusion_overlap(bank_df, insurer_df, epsilon)
-    with pd.ExcelWriter(buf, engine="xlsxwriter") as writer:
-        pd.DataFrame([results]).to_excel(writer, sheet_name="Summary", index=False)
-        bank_df[bank_df["Credit_History_Months"] < 12][["Customer_ID_Hash", "Credit_History_Months"]].head(100).to_excel(writer, sheet_name="BankSample", index=False)
-        insurer_df[insurer_df["Consistent_Payer"] == 1][["Customer_ID_Hash", "Consistent_Payer"]].head(100).to_excel(writer, sheet_name="InsurerSample", index=False)
-    buf.seek(0)
-    return buf.read()
-
-def trading_excel(bank_df: pd.DataFrame, brokerage_df: pd.DataFrame, epsilon: float = 1.0) -> bytes:
+SAMPLE_ROWS = 100
+EXPORT_FORMATS = ('xlsx', 'csv', 'parquet')
+MIME_TYPES = {
+    'xlsx': "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    'csv': "application/zip",
+    'parquet': "application/zip",
+}
+
+# Sample sheets per analysis: (sheet name, dataset, cohort predicate, columns)
+EXPORT_SAMPLES = {
+    'fraud': [
+        ("BankSample", 'bank', FRAUD_FLAGGED, ["Customer_ID_Hash", "Risk_Score"]),
+        ("InsurerSample", 'insurer', FRAUD_FLAGGED, ["Customer_ID_Hash", "Claim_Amount"]),
+    ],
+    'inclusion': [
+        ("BankSample", 'bank', THIN_CREDIT, ["Customer_ID_Hash", "Credit_History_Months"]),
+        ("InsurerSample", 'insurer', CONSISTENT_PAYER, ["Customer_ID_Hash", "Consistent_Payer"]),
+    ],
+    'trading': [
+        ("BrokerSample", 'brokerage', RISKY_TRADING, ["Customer_ID_Hash", "Portfolio_Value", "Trading_Frequency"]),
+        ("BankSample", 'bank', FRAUD_FLAGGED, ["Customer_ID_Hash", "Risk_Score"]),
+    ],
+}
+
+def export_sheets(analysis: str, results: dict, frames: Dict[str, pd.DataFrame], n: int = SAMPLE_ROWS) -> Dict[str, pd.DataFrame]:
+    """
+    Assembles an analysis export from an already released result.
+
+    Args:
+        analysis (str): 'fraud', 'inclusion' or 'trading'.
+        results (dict): The result shown on the dashboard; it is exported as-is, never recomputed.
+        frames (Dict[str, pd.DataFrame]): Dataset name ('bank', 'insurer', 'brokerage') -> frame.
+        n (int): Rows per cohort sample, sliced from the cached cohorts.
+
+    Returns:
+        Dict[str, pd.DataFrame]: Sheet name -> table, starting with 'Summary'.
+    """
+    sheets = {"Summary": pd.DataFrame([results])}
+    for sheet, dataset, predicate, columns in EXPORT_SAMPLES[analysis]:
+        df = frames[dataset]
+        sheets[sheet] = get_cohort(df, predicate).rows(df, columns, n=n)
+    return sheets
+
+def _cell(value):
+    # Blank cells for missing values, as DataFrame.to_excel writes them
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return None
+    return value
+
+def write_excel(sheets: Dict[str, pd.DataFrame], dest: Union[str, io.BufferedIOBase]) -> None:
+    """
+    Writes sheets to an .xlsx file or buffer with xlsxwriter's constant_memory mode:
+    rows are streamed out in order, so memory stays flat however long the sheets are.
+    """
+    workbook = xlsxwriter.Workbook(dest, {'constant_memory': True})
+    try:
+        header = workbook.add_format({'bold': True, 'border': 1})
+        for name, df in sheets.items():
+            worksheet = workbook.add_worksheet(name)
+            worksheet.write_row(0, 0, [str(c) for c in df.columns], header)
+            for r, row in enumerate(df.itertuples(index=False, name=None), start=1):
+                worksheet.write_row(r, 0, [_cell(v) for v in row])
+    finally:
+        workbook.close()
+
+def write_archive(sheets: Dict[str, pd.DataFrame], dest: Union[str, io.BufferedIOBase], fmt: str = 'csv') -> None:
+    """Writes one CSV or Parquet file per sheet into a zip archive."""
+    with zipfile.ZipFile(dest, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for name, df in sheets.items():
+            if fmt == 'csv':
+                archive.writestr(f"{name}.csv", df.to_csv(index=False))
+            elif fmt == 'parquet':
+                with archive.open(f"{name}.parquet", 'w') as f:
+                    df.to_parquet(f, index=False)
+            else:
+                raise ValueError(f"Unsupported archive format: {fmt}")
+
+def export_bytes(sheets: Dict[str, pd.DataFrame], fmt: str = 'xlsx') -> bytes:
+    """Serializes sheets as an .xlsx workbook, or a zip of CSV / Parquet files."""
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported export format '{fmt}'. Expected one of {EXPORT_FORMATS}.")
     buf = io.BytesIO()
-    results = compute_trading_overlap(bank_df, brokerage_df, epsilon)
-    with pd.ExcelWriter(buf, engine="xlsxwriter") as writer:
-        pd.DataFrame([results]).to_excel(writer, sheet_name="Summary", index=False)
-        brokerage_df[brokerage_df["Is_Risky_Trading"] == 1][["Customer_ID_Hash", "Portfolio_Value", "Trading_Frequency"]].head(100).to_excel(writer, sheet_name="BrokerSample", index=False)
-        bank_df[bank_df["Is_Flagged_Fraud"] == 1][["Customer_ID_Hash", "Risk_Score"]].head(100).to_excel(writer, sheet_name="BankSample", index=False)
-    buf.seek(0)
-    return buf.read()
+    with span('export', rows=sum(len(df) for df in sheets.values()), fmt=fmt):
+        if fmt == 'xlsx':
+            write_excel(sheets, buf)
+        else:
+            write_archive(sheets, buf, fmt)
+    return buf.getvalue()
+
+def _excel(analysis: str, compute_fn, left_name: str, left_df: pd.DataFrame, right_name: str, right_df: pd.DataFrame,
+           epsilon: float, results: Optional[dict]) -> bytes:
+    if results is None:
+        # Legacy path: draws a fresh release, which will differ from one already shown
+        results = compute_fn(left_df, right_df, epsilon)
+    return export_bytes(export_sheets(analysis, results, {left_name: left_df, right_name: right_df}), 'xlsx')
+
+def fraud_excel(bank_df: pd.DataFrame, insurer_df: pd.DataFrame, epsilon: float = 1.0, results: Optional[dict] = None) -> bytes:
+    return _excel('fraud', compute_fraud_overlap, 'bank', bank_df, 'insurer', insurer_df, epsilon, results)
+
+def inclusion_excel(bank_df: pd.DataFrame, insurer_df: pd.DataFrame, epsilon: float = 1.0, results: Optional[dict] = None) -> bytes:
+    return _excel('inclusion', compute_inclusion_overlap, 'bank', bank_df, 'insurer', insurer_df, epsilon, results)
+
+def trading_excel(bank_df: pd.DataFrame, brokerage_df: pd.DataFrame, epsilon: float = 1.0, results: Optional[dict] = None) -> bytes:
+    return _excel('trading', compute_trading_overlap, 'bank', bank_df, 'brokerage', brokerage_df, epsilon, results)
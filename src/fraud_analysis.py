@@ -1,133 +1,246 @@
 import pandas as pd
 import numpy as np
-from src.privacy import add_laplace_noise
+from src.privacy import DEFAULT_QUANTILES, add_laplace_noise, error_quantiles
+from src.intersection import DEFAULT_BACKEND, intersection_size
+from src.bloom import approximate_overlap, bloom_capacity
+from src.cohorts import Cohort, get_cohort, predicate_columns, FRAUD_FLAGGED, THIN_CREDIT, CONSISTENT_PAYER, RISKY_TRADING
 import logging
+from src.utils import span
+import threading
+from typing import List
 from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import linear_kernel
 
 logger = logging.getLogger(__name__)
 
-def compute_fraud_overlap(bank_df: pd.DataFrame, insurer_df: pd.DataFrame, epsilon: float = 1.0) -> dict:
+# analysis -> its two cohorts as (dataset, predicate, count label), left then right
+ANALYSIS_COHORTS = {
+    'fraud': (('bank', FRAUD_FLAGGED, 'Bank Risky Count'), ('insurer', FRAUD_FLAGGED, 'Insurer Risky Count')),
+    'inclusion': (('bank', THIN_CREDIT, 'Bank Invisible Count'), ('insurer', CONSISTENT_PAYER, 'Insurer Good Payer Count')),
+    'trading': (('bank', FRAUD_FLAGGED, 'Bank Risky Count'), ('brokerage', RISKY_TRADING, 'Brokerage Risky Count')),
+}
+
+# Columns each analysis reads, per dataset, so loaders can skip the rest
+ANALYSIS_COLUMNS = {
+    analysis: {dataset: predicate_columns(predicate) for dataset, predicate, _ in sides}
+    for analysis, sides in ANALYSIS_COHORTS.items()
+}
+
+class OverlapCounts:
+    """
+    The epsilon-independent part of an overlap analysis: cohort sizes and the
+    (exact or Bloom-estimated) intersection size. release() adds the DP noise, so the
+    intersection can be computed once and released at many epsilons.
+    """
+
+    def __init__(self, left_label: str, left_size: int, right_label: str, right_size: int,
+                 true_overlap: int, sensitivity: float = 1.0, approx: dict = None):
+        self.left_label = left_label
+        self.left_size = left_size
+        self.right_label = right_label
+        self.right_size = right_size
+        self.true_overlap = true_overlap
+        self.sensitivity = sensitivity
+        self.approx = approx
+
+    def release(self, epsilon: float = 1.0) -> dict:
+        """Returns the standard result dict with a freshly noised 'Private Overlap'."""
+        # Add Differential Privacy Noise
+        # Sensitivity is 1 for an exact count because one individual can change it by at most 1
+        with span('dp.noise', rows=1):
+            private_overlap_count = add_laplace_noise(self.true_overlap, epsilon, sensitivity=self.sensitivity)
+        
+        # Ensure non-negative count (post-processing)
+        private_overlap_count = max(0.0, private_overlap_count)
+        
+        results = {
+            self.left_label: self.left_size,
+            self.right_label: self.right_size,
+            'True Overlap': self.true_overlap,
+            'Private Overlap': round(private_overlap_count, 1)
+        }
+        if self.approx is not None:
+            noise_bound = self.sensitivity / epsilon * np.log(1 / 0.05) if epsilon > 0 else 0.0
+            results['Approx Error Bound'] = round(float(self.approx['error_bound'] + noise_bound), 1)
+            results['Bloom Filter Bytes'] = self.approx['filter_bytes']
+        return results
+
+    def sweep(self, epsilons, trials: int = 1000, quantiles=DEFAULT_QUANTILES) -> pd.DataFrame:
+        """
+        Error quantiles of 'Private Overlap' across epsilons, from simulated releases of
+        this (already computed) intersection. See src.privacy.error_quantiles.
+        """
+        return error_quantiles(self.true_overlap, epsilons, trials, self.sensitivity,
+                               quantiles=quantiles, clip_negative=True)
+
+def _overlap_counts(left: Cohort, right: Cohort, left_label: str, right_label: str, backend: str, fpr: float = None,
+                    capacity: int = None) -> OverlapCounts:
+    """
+    Intersects two local cohorts.
+
+    With fpr set, the intersection is estimated from a Bloom filter instead (see
+    src.bloom.approximate_overlap): 'True Overlap' then holds the bias-corrected
+    estimate, and 'Approx Error Bound' adds the filter's 95% error bound to the
+    95% bound of the Laplace noise. capacity is the filter's public size bound; by
+    default it is derived from the cohort sizes (see src.bloom.bloom_capacity). Pass
+    a fixed capacity to keep the filter shape, and so the sensitivity, independent
+    of the data.
+    """
+    if fpr is None:
+        with span('overlap.unique_keys', rows=left.size + right.size):
+            left_keys, right_keys = left.unique_keys, right.unique_keys
+        # Secure Intersection (PSI)
+        # In a real clean room, this uses cryptographic PSI. Here we simulate it on hashes.
+        with span('overlap.intersection', rows=len(left_keys) + len(right_keys), backend=backend):
+            true_overlap_count = intersection_size(left_keys, right_keys, backend=backend)
+        return OverlapCounts(left_label, left.size, right_label, right.size, true_overlap_count)
+    # The larger cohort is published, streaming its keys into the filter without de-duplicating
+    # them; only the smaller probe side needs distinct keys
+    published, probe = (left, right) if left.size >= right.size else (right, left)
+    with span('overlap.bloom', rows=left.size + right.size, fpr=fpr):
+        approx = approximate_overlap(published.keys, probe.unique_keys, fpr=fpr,
+                                     capacity=capacity or bloom_capacity(left.size, right.size))
+    # Within one filter shape, one individual moves the estimate by at most 1 / (1 - fpr)
+    return OverlapCounts(left_label, left.size, right_label, right.size, int(round(approx['estimate'])),
+                         sensitivity=approx['sensitivity'], approx=approx)
+
+def fraud_overlap_counts(bank_df: pd.DataFrame, insurer_df: pd.DataFrame, backend: str = DEFAULT_BACKEND, fpr: float = None,
+                         capacity: int = None) -> OverlapCounts:
+    """Epsilon-independent part of compute_fraud_overlap."""
+    # Local Filtering (simulating local compute); cohorts are cached per dataset
+    bank_risky = get_cohort(bank_df, FRAUD_FLAGGED)
+    insurer_risky = get_cohort(insurer_df, FRAUD_FLAGGED)
+    return _overlap_counts(bank_risky, insurer_risky, 'Bank Risky Count', 'Insurer Risky Count', backend, fpr, capacity)
+
+def inclusion_overlap_counts(bank_df: pd.DataFrame, insurer_df: pd.DataFrame, backend: str = DEFAULT_BACKEND, fpr: float = None,
+                             capacity: int = None) -> OverlapCounts:
+    """Epsilon-independent part of compute_inclusion_overlap."""
+    # 1. Bank finds "Credit Invisible" (e.g., < 12 months history)
+    bank_invisible = get_cohort(bank_df, THIN_CREDIT)
+    
+    # 2. Insurer finds "Consistent Payers"
+    insurer_good = get_cohort(insurer_df, CONSISTENT_PAYER)
+    return _overlap_counts(bank_invisible, insurer_good, 'Bank Invisible Count', 'Insurer Good Payer Count', backend, fpr, capacity)
+
+def trading_overlap_counts(bank_df: pd.DataFrame, brokerage_df: pd.DataFrame, backend: str = DEFAULT_BACKEND, fpr: float = None,
+                           capacity: int = None) -> OverlapCounts:
+    """Epsilon-independent part of compute_trading_overlap."""
+    bank_risky = get_cohort(bank_df, FRAUD_FLAGGED)
+    broker_risky = get_cohort(brokerage_df, RISKY_TRADING)
+    return _overlap_counts(bank_risky, broker_risky, 'Bank Risky Count', 'Brokerage Risky Count', backend, fpr, capacity)
+
+def compute_fraud_overlap(bank_df: pd.DataFrame, insurer_df: pd.DataFrame, epsilon: float = 1.0, backend: str = DEFAULT_BACKEND, fpr: float = None,
+                          capacity: int = None) -> dict:
     """
     Computes the intersection of high-risk customers from Bank and Insurer.
     Returns noisy counts to preserve privacy.
+
+    Pass fpr (e.g. 0.01) to estimate the overlap from a Bloom filter of one cohort
+    instead of an exact intersection, and optionally a fixed public capacity for the
+    filter; this applies to the sibling functions too.
     """
-    # 1. Local Filtering (simulating local compute)
-    bank_risky = bank_df[bank_df['Is_Flagged_Fraud'] == 1]['Customer_ID_Hash']
-    insurer_risky = insurer_df[insurer_df['Is_Flagged_Fraud'] == 1]['Customer_ID_Hash']
-    
-    # 2. Secure Intersection (PSI)
-    # In a real clean room, this uses cryptographic PSI. Here we simulate it with set intersection on hashes.
-    intersection = set(bank_risky).intersection(set(insurer_risky))
-    true_overlap_count = len(intersection)
-    
-    # 3. Add Differential Privacy Noise
-    # Sensitivity is 1 because one individual can change the count by at most 1
-    private_overlap_count = add_laplace_noise(true_overlap_count, epsilon, sensitivity=1.0)
-    
-    # Ensure non-negative count (post-processing)
-    private_overlap_count = max(0.0, private_overlap_count)
-    
-    return {
-        'Bank Risky Count': len(bank_risky),
-        'Insurer Risky Count': len(insurer_risky),
-        'True Overlap': true_overlap_count,
-        'Private Overlap': round(private_overlap_count, 1)
-    }
-
-def compute_inclusion_overlap(bank_df: pd.DataFrame, insurer_df: pd.DataFrame, epsilon: float = 1.0) -> dict:
+    return fraud_overlap_counts(bank_df, insurer_df, backend, fpr, capacity).release(epsilon)
+
+def compute_inclusion_overlap(bank_df: pd.DataFrame, insurer_df: pd.DataFrame, epsilon: float = 1.0, backend: str = DEFAULT_BACKEND, fpr: float = None,
+                              capacity: int = None) -> dict:
     """
     Computes the intersection of 'Credit Invisible' customers (Bank) 
     who are 'Consistent Payers' (Insurer).
     """
-    # 1. Bank finds "Credit Invisible" (e.g., < 12 months history)
-    bank_invisible = bank_df[bank_df['Credit_History_Months'] < 12]['Customer_ID_Hash']
-    
-    # 2. Insurer finds "Consistent Payers"
-    insurer_good = insurer_df[insurer_df['Consistent_Payer'] == 1]['Customer_ID_Hash']
-    
-    # 3. Secure Intersection
-    intersection = set(bank_invisible).intersection(set(insurer_good))
-    true_overlap_count = len(intersection)
-    
-    # 4. Add Privacy Noise
-    private_overlap_count = add_laplace_noise(true_overlap_count, epsilon, sensitivity=1.0)
-    private_overlap_count = max(0.0, private_overlap_count)
-    
-    return {
-        'Bank Invisible Count': len(bank_invisible),
-        'Insurer Good Payer Count': len(insurer_good),
-        'True Overlap': true_overlap_count,
-        'Private Overlap': round(private_overlap_count, 1)
-    }
-
-def compute_trading_overlap(bank_df: pd.DataFrame, brokerage_df: pd.DataFrame, epsilon: float = 1.0) -> dict:
-    bank_risky = bank_df[bank_df['Is_Flagged_Fraud'] == 1]['Customer_ID_Hash']
-    broker_risky = brokerage_df[brokerage_df['Is_Risky_Trading'] == 1]['Customer_ID_Hash']
-    intersection = set(bank_risky).intersection(set(broker_risky))
-    true_overlap_count = len(intersection)
-    private_overlap_count = add_laplace_noise(true_overlap_count, epsilon, sensitivity=1.0)
-    private_overlap_count = max(0.0, private_overlap_count)
-    return {
-        'Bank Risky Count': len(bank_risky),
-        'Brokerage Risky Count': len(broker_risky),
-        'True Overlap': true_overlap_count,
-        'Private Overlap': round(private_overlap_count, 1)
-    }
+    return inclusion_overlap_counts(bank_df, insurer_df, backend, fpr, capacity).release(epsilon)
+
+def compute_trading_overlap(bank_df: pd.DataFrame, brokerage_df: pd.DataFrame, epsilon: float = 1.0, backend: str = DEFAULT_BACKEND, fpr: float = None,
+                            capacity: int = None) -> dict:
+    return trading_overlap_counts(bank_df, brokerage_df, backend, fpr, capacity).release(epsilon)
+
+# Example phrases per chat intent; a query gets the intent of its most similar phrase
+INTENT_PHRASES = {
+    'overlap_count': [
+        'how many overlap', 'total overlapping', 'number of overlapping', 'intersect count', 'common entities'
+    ],
+    'bank_count': [
+        'bank risky count', 'bank invisible count', 'how many bank risky'
+    ],
+    'partner_count': [
+        'insurer risky count', 'insurer good payers count', 'brokerage risky count'
+    ],
+    'percentage': [
+        'overlap percentage', 'ratio', 'share', 'portion', 'rate'
+    ],
+    'difference': [
+        'difference between private and true', 'accuracy delta', 'noise difference'
+    ],
+    'privacy': [
+        'explain epsilon', 'privacy budget', 'laplace noise', 'noise'
+    ],
+    'compare': [
+        'compare bank vs insurer', 'bank vs brokerage', 'compare cohorts', 'vs'
+    ],
+    'export': [
+        'download excel', 'power bi export', 'csv export', 'export data'
+    ],
+    'trading': [
+        'risky traders', 'trading overlap', 'trader overlap'
+    ],
+    'fraud': [
+        'overlapping fraudsters', 'fraud overlap', 'fraud count'
+    ],
+    'inclusion': [
+        'credit invisible', 'inclusion overlap', 'inclusion candidates'
+    ]
+}
+# Minimum cosine similarity for a query to be assigned an intent
+INTENT_THRESHOLD = 0.2
+
+class IntentClassifier:
+    """
+    TF-IDF nearest-phrase intent classifier. The vectorizer and phrase matrix are
+    fitted once at construction; classifying only transforms the queries.
+    """
+
+    def __init__(self, intents: dict = None, threshold: float = INTENT_THRESHOLD):
+        intents = INTENT_PHRASES if intents is None else intents
+        phrases = [p for v in intents.values() for p in v]
+        self.labels = np.array([k for k, v in intents.items() for _ in v])
+        self.threshold = threshold
+        self.vectorizer = TfidfVectorizer().fit(phrases)
+        self.matrix = self.vectorizer.transform(phrases)
+        # TF-IDF rows are L2-normalized, so a sparse dot product is the cosine similarity
+        self._matrix_t = self.matrix.T.tocsr()
+
+    def classify(self, queries: List[str]) -> List[str]:
+        """Returns one intent per query, or '' when no phrase is similar enough."""
+        if not queries:
+            return []
+        sims = (self.vectorizer.transform(queries) @ self._matrix_t).toarray()
+        best = sims.argmax(axis=1)
+        scores = sims[np.arange(len(queries)), best]
+        return np.where(scores >= self.threshold, self.labels[best], '').tolist()
+
+_classifier = None
+_classifier_lock = threading.Lock()
+
+def get_intent_classifier() -> IntentClassifier:
+    """Returns the shared classifier, fitting it on first use."""
+    global _classifier
+    if _classifier is None:
+        with _classifier_lock:
+            if _classifier is None:
+                _classifier = IntentClassifier()
+    return _classifier
+
+def classify_intents(queries: List[str]) -> List[str]:
+    """Classifies a batch of chat queries with one transform and one similarity product."""
+    return get_intent_classifier().classify([q.lower() for q in queries])
 
 def _classify_intent(q: str) -> str:
-    intents = {
-        'overlap_count': [
-            'how many overlap', 'total overlapping', 'number of overlapping', 'intersect count', 'common entities'
-        ],
-        'bank_count': [
-            'bank risky count', 'bank invisible count', 'how many bank risky'
-        ],
-        'partner_count': [
-            'insurer risky count', 'insurer good payers count', 'brokerage risky count'
-        ],
-        'percentage': [
-            'overlap percentage', 'ratio', 'share', 'portion', 'rate'
-        ],
-        'difference': [
-            'difference between private and true', 'accuracy delta', 'noise difference'
-        ],
-        'privacy': [
-            'explain epsilon', 'privacy budget', 'laplace noise', 'noise'
-        ],
-        'compare': [
-            'compare bank vs insurer', 'bank vs brokerage', 'compare cohorts', 'vs'
-        ],
-        'export': [
-            'download excel', 'power bi export', 'csv export', 'export data'
-        ],
-        'trading': [
-            'risky traders', 'trading overlap', 'trader overlap'
-        ],
-        'fraud': [
-            'overlapping fraudsters', 'fraud overlap', 'fraud count'
-        ],
-        'inclusion': [
-            'credit invisible', 'inclusion overlap', 'inclusion candidates'
-        ]
-    }
-    phrases = []
-    labels = []
-    for k, v in intents.items():
-        for p in v:
-            phrases.append(p)
-            labels.append(k)
-    vec = TfidfVectorizer().fit(phrases)
-    X = vec.transform(phrases)
-    y = labels
-    qv = vec.transform([q])
-    sims = linear_kernel(qv, X).flatten()
-    i = int(np.argmax(sims))
-    if sims[i] >= 0.2:
-        return y[i]
-    return ''
-
-def simulate_cortex_chat(user_query: str, analysis_results: dict) -> str:
+    return classify_intents([q])[0]
+
+def simulate_cortex_chat(user_query: str, analysis_results: dict, intent: str = None) -> str:
+    """
+    Answers an analyst question from aggregate results only.
+
+    Pass intent (from classify_intents) when queries were classified in a batch.
+    """
     query_lower = user_query.lower()
     private_overlap = analysis_results.get('Private Overlap')
     true_overlap = analysis_results.get('True Overlap')
@@ -137,7 +250,8 @@ def simulate_cortex_chat(user_query: str, analysis_results: dict) -> str:
     insurer_good = analysis_results.get('Insurer Good Payer Count')
     brokerage_risky = analysis_results.get('Brokerage Risky Count')
     context = 'fraud' if insurer_risky is not None else 'inclusion' if insurer_good is not None else 'trading' if brokerage_risky is not None else 'generic'
-    intent = _classify_intent(query_lower)
+    if intent is None:
+        intent = _classify_intent(query_lower)
     if intent == 'overlap_count':
         if context == 'fraud':
             return f"Approximately {private_overlap} overlapping high-risk entities were identified across bank and insurer."
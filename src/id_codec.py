@@ -0,0 +1,137 @@
+import binascii
+import numpy as np
+import pandas as pd
+from typing import Iterable, Union
+from src.utils import setup_logger
+
+logger = setup_logger(__name__)
+
+HASH_COLUMN = 'Customer_ID_Hash'
+# SHA-256 digest size in bytes (64 hex characters)
+DIGEST_SIZE = 32
+
+ENCODINGS = ('hex', 'binary', 'key64')
+
+def hex_to_binary(hashes: Iterable[str]) -> np.ndarray:
+    """
+    Packs 64-character hex hashes into a fixed-width 32-byte NumPy array.
+
+    Args:
+        hashes (Iterable[str]): SHA-256 hex digests.
+
+    Returns:
+        np.ndarray: Array of dtype 'S32', one digest per element (lossless).
+    """
+    if isinstance(hashes, pd.Series):
+        hashes = hashes.to_numpy()
+    raw = bytes.fromhex(''.join(hashes))
+    return np.frombuffer(raw, dtype=f'S{DIGEST_SIZE}')
+
+def binary_to_hex(digests: np.ndarray) -> np.ndarray:
+    """
+    Expands 32-byte digests back into 64-character hex strings.
+
+    Args:
+        digests (np.ndarray): Array of dtype 'S32' from hex_to_binary.
+
+    Returns:
+        np.ndarray: Object array of hex strings.
+    """
+    # tobytes() keeps trailing zero bytes that per-element access would strip
+    text = binascii.hexlify(np.ascontiguousarray(digests, dtype=f'S{DIGEST_SIZE}').tobytes()).decode()
+    width = 2 * DIGEST_SIZE
+    return np.array([text[i:i + width] for i in range(0, len(text), width)], dtype=object)
+
+def hex_to_key64(hashes: Iterable[str]) -> np.ndarray:
+    """
+    Truncates hex hashes to their leading 64 bits as unsigned integer join keys.
+
+    The truncation is one-way; keep the hex or binary form if the full hash is
+    needed again. See key64_collision_bound for the probability that two distinct
+    customers share a key.
+
+    Args:
+        hashes (Iterable[str]): SHA-256 hex digests.
+
+    Returns:
+        np.ndarray: Array of dtype uint64.
+    """
+    if isinstance(hashes, np.ndarray) and hashes.dtype == np.dtype(f'S{DIGEST_SIZE}'):
+        raw = hashes.tobytes()
+    else:
+        raw = hex_to_binary(hashes).tobytes()
+    words = np.frombuffer(raw, dtype='>u8')
+    return words[::DIGEST_SIZE // 8].astype(np.uint64)
+
+def key64_collision_bound(n_keys: int, bits: int = 64) -> float:
+    """
+    Birthday bound on the probability that any two of n_keys distinct hashes
+    collide after truncation to `bits` bits: n(n-1) / 2^(bits+1).
+
+    For 10M keys at 64 bits this is about 2.7e-6; for 100M about 2.7e-4.
+    """
+    return n_keys * (n_keys - 1) / float(2 ** (bits + 1))
+
+def encode_hashes(hashes: Union[pd.Series, Iterable[str]], encoding: str = 'key64') -> Union[pd.Series, np.ndarray]:
+    """
+    Converts hex hashes to a compact encoding.
+
+    Args:
+        hashes: Hex digests, as a Series or any iterable of str.
+        encoding (str): 'hex' (unchanged), 'binary' (32-byte, lossless) or 'key64' (uint64, lossy).
+
+    Returns:
+        A Series (when given a Series, index preserved) or a NumPy array. 'binary'
+        Series are Arrow fixed_size_binary(32) when pyarrow is installed.
+    """
+    if encoding not in ENCODINGS:
+        raise ValueError(f"Unknown hash encoding '{encoding}'. Expected one of {ENCODINGS}.")
+    is_series = isinstance(hashes, pd.Series)
+    if encoding == 'hex':
+        return hashes if is_series else np.asarray(list(hashes), dtype=object)
+    if encoding == 'key64':
+        values = hex_to_key64(hashes)
+        return pd.Series(values, index=hashes.index, name=hashes.name) if is_series else values
+    values = hex_to_binary(hashes)
+    if not is_series:
+        return values
+    try:
+        import pyarrow as pa
+    except ImportError:
+        logger.debug("pyarrow not installed; storing binary hashes as an object column.")
+        return pd.Series(values.tolist(), index=hashes.index, name=hashes.name, dtype=object)
+    array = pa.FixedSizeBinaryArray.from_buffers(pa.binary(DIGEST_SIZE), len(values), [None, pa.py_buffer(values.tobytes())])
+    return pd.Series(array, index=hashes.index, name=hashes.name, dtype=pd.ArrowDtype(pa.binary(DIGEST_SIZE)))
+
+def decode_hashes(values: Union[pd.Series, np.ndarray]) -> Union[pd.Series, np.ndarray]:
+    """Converts 'binary' encoded hashes back to hex strings. 'key64' keys cannot be decoded."""
+    is_series = isinstance(values, pd.Series)
+    array = values.to_numpy() if is_series else values
+    if array.dtype.kind in 'iu':
+        raise ValueError("key64 hashes are truncated and cannot be converted back to hex.")
+    if array.dtype == object:
+        if len(array) and isinstance(array[0], str):
+            return values
+        array = np.array([bytes(v).ljust(DIGEST_SIZE, b'\x00') for v in array], dtype=f'S{DIGEST_SIZE}')
+    text = binary_to_hex(array)
+    return pd.Series(text, index=values.index, name=values.name) if is_series else text
+
+def compact_hash_column(df: pd.DataFrame, encoding: str = 'key64', column: str = HASH_COLUMN) -> pd.DataFrame:
+    """
+    Returns a copy of df with the hash column stored in a compact encoding.
+
+    Use at load time; the overlap analyses accept any encoding as long as both
+    sides use the same one. Convert back with restore_hash_column before export.
+    """
+    out = df.copy(deep=False)
+    out[column] = encode_hashes(df[column], encoding)
+    if encoding == 'key64':
+        bound = key64_collision_bound(len(df))
+        logger.debug(f"key64 collision bound for {len(df)} rows: {bound:.2e}")
+    return out
+
+def restore_hash_column(df: pd.DataFrame, column: str = HASH_COLUMN) -> pd.DataFrame:
+    """Returns a copy of df with a 'binary' encoded hash column converted back to hex."""
+    out = df.copy(deep=False)
+    out[column] = decode_hashes(df[column])
+    return out
@@ -0,0 +1,137 @@
+"""
+Incremental maintenance of the overlap analyses.
+
+Partners send deltas (appended, updated and removed rows) instead of full
+extracts. IncrementalOverlaps keeps, per dataset, the set of customers in each
+cohort the analyses use, and per analysis the current intersection size.
+Applying a delta costs time proportional to the delta, not to the history:
+
+- a customer entering a cohort adds 1 to each overlap where the partner cohort has them,
+- a customer leaving a cohort subtracts 1 likewise.
+
+Rows are identified by their hash column (Customer_ID_Hash): an upserted row
+replaces the previous row with the same hash. Cohort sizes therefore count
+distinct customers, which matches the full computation on de-duplicated data.
+"""
+import os
+from typing import Dict, Iterable, Optional, Tuple
+import pandas as pd
+from src.cohorts import HASH_COLUMN, Predicate, evaluate_predicate
+from src.fraud_analysis import ANALYSIS_COHORTS, OverlapCounts
+from src.utils import setup_logger, span
+
+logger = setup_logger(__name__)
+
+CohortKey = Tuple[str, Predicate]
+
+class IncrementalOverlaps:
+    """
+    Persistent per-party cohort state with overlap counts kept up to date.
+
+    Args:
+        analyses (dict): analysis -> ((dataset, predicate, label), (dataset, predicate, label)),
+            as in ANALYSIS_COHORTS.
+        hash_column (str): Column identifying a customer row.
+    """
+
+    def __init__(self, analyses: dict = ANALYSIS_COHORTS, hash_column: str = HASH_COLUMN):
+        self.analyses = analyses
+        self.hash_column = hash_column
+        # (dataset, predicate) -> customers currently in that cohort
+        self.members: Dict[CohortKey, set] = {}
+        self.overlaps: Dict[str, int] = {analysis: 0 for analysis in analyses}
+        # (dataset, predicate) -> [(analysis, partner cohort)] for the analyses that use it
+        self._partners: Dict[CohortKey, list] = {}
+        for analysis, (left, right) in analyses.items():
+            left_key, right_key = (left[0], tuple(left[1])), (right[0], tuple(right[1]))
+            for key in (left_key, right_key):
+                self.members.setdefault(key, set())
+            self._partners.setdefault(left_key, []).append((analysis, right_key))
+            self._partners.setdefault(right_key, []).append((analysis, left_key))
+
+    def _cohorts(self, dataset: str):
+        return [key for key in self.members if key[0] == dataset]
+
+    def _change(self, key: CohortKey, added: set, removed: set) -> None:
+        # Overlaps are updated against the partner cohorts before this cohort changes
+        for analysis, partner in self._partners[key]:
+            other = self.members[partner]
+            self.overlaps[analysis] += len(added & other) - len(removed & other)
+        members = self.members[key]
+        members |= added
+        members -= removed
+
+    def apply(self, dataset: str, upserts: Optional[pd.DataFrame] = None, removed: Optional[Iterable] = None) -> None:
+        """
+        Applies one delta from a dataset's owner.
+
+        Args:
+            dataset (str): 'bank', 'insurer' or 'brokerage'.
+            upserts (Optional[pd.DataFrame]): New or changed rows, with the hash column and the
+                predicate columns of this dataset's cohorts. A row whose flag flipped simply
+                moves between in and out of the cohort. Duplicate hashes keep the last row.
+            removed (Optional[Iterable]): Hashes of deleted rows. Removals apply before upserts.
+        """
+        cohorts = self._cohorts(dataset)
+        if not cohorts:
+            raise KeyError(f"No analysis uses dataset '{dataset}'.")
+        rows = 0
+        with span('incremental.apply', dataset=dataset) as s:
+            if removed is not None:
+                removed = set(removed)
+                rows += len(removed)
+                for key in cohorts:
+                    self._change(key, set(), removed & self.members[key])
+            if upserts is not None and len(upserts):
+                upserts = upserts[upserts[self.hash_column].notna()].drop_duplicates(self.hash_column, keep='last')
+                rows += len(upserts)
+                hashes = upserts[self.hash_column].to_numpy()
+                for key in cohorts:
+                    mask = evaluate_predicate(upserts, key[1]).to_numpy(dtype=bool)
+                    entering = set(hashes[mask].tolist())
+                    leaving = set(hashes[~mask].tolist())
+                    members = self.members[key]
+                    self._change(key, entering - members, leaving & members)
+            s.rows = rows
+        logger.debug(f"Applied {rows} changed rows to {dataset}; overlaps now {self.overlaps}")
+
+    def load(self, dataset: str, df: pd.DataFrame) -> None:
+        """Replaces a dataset's state with a full extract."""
+        for key in self._cohorts(dataset):
+            self._change(key, set(), set(self.members[key]))
+        self.apply(dataset, upserts=df)
+
+    def counts(self, analysis: str) -> OverlapCounts:
+        """The current cohort sizes and intersection of an analysis; release() adds the noise."""
+        (left_dataset, left_predicate, left_label), (right_dataset, right_predicate, right_label) = self.analyses[analysis]
+        return OverlapCounts(left_label, len(self.members[(left_dataset, tuple(left_predicate))]),
+                             right_label, len(self.members[(right_dataset, tuple(right_predicate))]),
+                             self.overlaps[analysis])
+
+    def release(self, analysis: str, epsilon: float = 1.0) -> dict:
+        """The standard result dict of an analysis, as compute_*_overlap returns it."""
+        return self.counts(analysis).release(epsilon)
+
+    def save(self, path: str) -> None:
+        """Writes the cohort memberships to a Parquet file (write-then-rename)."""
+        parts = [pd.DataFrame({'dataset': dataset, 'predicate': repr(predicate), 'key': pd.Series(list(members), dtype=object)})
+                 for (dataset, predicate), members in self.members.items()]
+        tmp = path + '.tmp'
+        pd.concat(parts, ignore_index=True).to_parquet(tmp, index=False)
+        os.replace(tmp, path)
+
+    @classmethod
+    def open(cls, path: str, analyses: dict = ANALYSIS_COHORTS, hash_column: str = HASH_COLUMN) -> "IncrementalOverlaps":
+        """Restores the state saved at path (or starts empty if there is none) and recounts the overlaps."""
+        state = cls(analyses, hash_column)
+        if not os.path.exists(path):
+            return state
+        saved = pd.read_parquet(path)
+        groups = {name: frame['key'] for name, frame in saved.groupby(['dataset', 'predicate'])}
+        for dataset, predicate in state.members:
+            keys = groups.get((dataset, repr(predicate)))
+            if keys is not None:
+                state.members[(dataset, predicate)] = set(keys.tolist())
+        for analysis, (left, right) in analyses.items():
+            state.overlaps[analysis] = len(state.members[(left[0], tuple(left[1]))] & state.members[(right[0], tuple(right[1]))])
+        return state
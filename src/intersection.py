@@ -0,0 +1,151 @@
+import numpy as np
+import pandas as pd
+from typing import Callable, Dict, Tuple, Union
+from src.psi import psi_intersect
+from src.utils import setup_logger
+
+logger = setup_logger(__name__)
+
+ArrayLike = Union[pd.Series, np.ndarray, list]
+
+# Number of hash partitions used by the 'hash' backend
+DEFAULT_PARTITIONS = 64
+DEFAULT_BACKEND = 'sort'
+
+BACKENDS: Dict[str, Callable[[np.ndarray, np.ndarray], np.ndarray]] = {}
+# Backends that must see each party's own keys rather than jointly normalized codes
+_RAW_BACKENDS = set()
+
+def register_backend(name: str, fn: Callable[[np.ndarray, np.ndarray], np.ndarray], normalize: bool = True) -> None:
+    """
+    Registers an intersection backend.
+
+    Args:
+        name (str): Name passed as `backend=` to intersect / intersection_size.
+        fn (Callable): Takes two 1-D key arrays and returns the array of distinct common keys.
+        normalize (bool): If True, fn receives integer codes from normalize_keys. Protocol
+            backends (e.g. PSI) set False to receive each side's original keys.
+    """
+    BACKENDS[name] = fn
+    if normalize:
+        _RAW_BACKENDS.discard(name)
+    else:
+        _RAW_BACKENDS.add(name)
+
+def _to_array(values: ArrayLike) -> np.ndarray:
+    if isinstance(values, pd.Series):
+        return values.to_numpy()
+    return np.asarray(values)
+
+def normalize_keys(left: ArrayLike, right: ArrayLike) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Maps both sides onto a shared integer key space.
+
+    Integer keys (e.g. key64 hashes) are used as-is. Anything else (hex strings,
+    binary digests) is factorized jointly, which is exact: equal values get equal
+    codes and distinct values get distinct codes.
+
+    Returns:
+        Tuple of (left_keys, right_keys, uniques). uniques is None when the keys
+        were already integers; otherwise uniques[code] recovers the original value.
+    """
+    a, b = _to_array(left), _to_array(right)
+    if a.dtype.kind in 'iu' and b.dtype.kind in 'iu' and a.dtype == b.dtype:
+        return a, b, None
+    combined = pd.concat([pd.Series(left), pd.Series(right)], ignore_index=True)
+    codes, uniques = pd.factorize(combined)
+    codes = codes.astype(np.int64)
+    # factorize marks missing IDs as -1; they never match, as with set() on NaN hashes
+    return codes[:len(a)][codes[:len(a)] >= 0], codes[len(a):][codes[len(a):] >= 0], np.asarray(uniques)
+
+def _set_backend(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    common = set(a.tolist()).intersection(b.tolist())
+    return np.fromiter(common, dtype=a.dtype, count=len(common))
+
+def _sorted_unique(a: np.ndarray) -> np.ndarray:
+    a = np.sort(a)
+    if len(a) == 0:
+        return a
+    keep = np.empty(len(a), dtype=bool)
+    keep[0] = True
+    np.not_equal(a[1:], a[:-1], out=keep[1:])
+    return a[keep]
+
+def _sort_merge_backend(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    ua, ub = _sorted_unique(a), _sorted_unique(b)
+    if len(ua) == 0 or len(ub) == 0:
+        return ua[:0]
+    # Probe the larger side with the smaller one
+    if len(ua) < len(ub):
+        ua, ub = ub, ua
+    pos = np.searchsorted(ua, ub)
+    pos[pos == len(ua)] = 0
+    return ub[ua[pos] == ub]
+
+def _partition(keys: np.ndarray, n_partitions: int) -> Tuple[np.ndarray, np.ndarray]:
+    # Mix the bits first so sequential codes spread evenly over buckets
+    buckets = (pd.util.hash_array(keys) % np.uint64(n_partitions)).astype(np.uint16)
+    order = np.argsort(buckets, kind='stable')
+    bounds = np.searchsorted(buckets[order], np.arange(n_partitions + 1))
+    return keys[order], bounds
+
+def partitioned_hash_join(a: np.ndarray, b: np.ndarray, n_partitions: int = DEFAULT_PARTITIONS) -> np.ndarray:
+    """
+    Intersects two key arrays by hash-partitioning both sides into n_partitions
+    buckets and hash-joining matching bucket pairs, so each build table stays small.
+    """
+    if len(a) == 0 or len(b) == 0:
+        return a[:0]
+    pa_keys, pa_bounds = _partition(a, n_partitions)
+    pb_keys, pb_bounds = _partition(b, n_partitions)
+    parts = []
+    for p in range(n_partitions):
+        left = pa_keys[pa_bounds[p]:pa_bounds[p + 1]]
+        right = pb_keys[pb_bounds[p]:pb_bounds[p + 1]]
+        if len(left) == 0 or len(right) == 0:
+            continue
+        # Build on the smaller side, probe with the larger
+        build, probe = (left, right) if len(left) <= len(right) else (right, left)
+        hits = probe[pd.Series(probe).isin(build).to_numpy()]
+        parts.append(pd.unique(hits))
+    if not parts:
+        return a[:0]
+    return np.concatenate(parts)
+
+register_backend('set', _set_backend)
+register_backend('sort', _sort_merge_backend)
+register_backend('hash', partitioned_hash_join)
+register_backend('psi', psi_intersect, normalize=False)
+
+def _resolve(backend: str) -> Callable[[np.ndarray, np.ndarray], np.ndarray]:
+    try:
+        return BACKENDS[backend]
+    except KeyError:
+        raise ValueError(f"Unknown intersection backend '{backend}'. Available: {sorted(BACKENDS)}") from None
+
+def intersect(left: ArrayLike, right: ArrayLike, backend: str = DEFAULT_BACKEND) -> np.ndarray:
+    """
+    Returns the distinct values present in both left and right.
+
+    Args:
+        left, right: Customer hash keys in any encoding (hex, binary or key64), same on both sides.
+        backend (str): 'set', 'sort' (sort-merge), 'hash' (partitioned hash join),
+            'psi' (DH private set intersection) or any name added with register_backend.
+
+    Returns:
+        np.ndarray: Common values, in no particular order.
+    """
+    fn = _resolve(backend)
+    if backend in _RAW_BACKENDS:
+        return fn(_to_array(left), _to_array(right))
+    a, b, uniques = normalize_keys(left, right)
+    common = fn(a, b)
+    return common if uniques is None else uniques[common]
+
+def intersection_size(left: ArrayLike, right: ArrayLike, backend: str = DEFAULT_BACKEND) -> int:
+    """Returns the number of distinct values present in both left and right."""
+    fn = _resolve(backend)
+    if backend in _RAW_BACKENDS:
+        return int(len(fn(_to_array(left), _to_array(right))))
+    a, b, _ = normalize_keys(left, right)
+    return int(len(fn(a, b)))
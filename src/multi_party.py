@@ -0,0 +1,99 @@
+import numpy as np
+import pandas as pd
+from typing import Dict, Mapping, Union
+from src.cohorts import Cohort
+from src.privacy import laplace_mechanism
+from src.utils import setup_logger
+
+logger = setup_logger(__name__)
+
+# Membership patterns are stored as uint64 bitmasks, one bit per party
+MAX_PARTIES = 64
+
+CohortLike = Union[Cohort, pd.Series, np.ndarray, list]
+
+def _unique_keys(cohort: CohortLike) -> np.ndarray:
+    if isinstance(cohort, Cohort):
+        return cohort.unique_keys
+    return np.asarray(pd.unique(pd.Series(cohort).dropna()))
+
+def membership_patterns(cohorts: Mapping[str, CohortLike]):
+    """
+    Builds the hash -> party-bitmask table for N cohorts in one pass.
+
+    Returns:
+        Tuple of (patterns, counts): each distinct membership bitmask (bit i set
+        means the key is in party i's cohort) and how many keys have it.
+    """
+    names = list(cohorts)
+    if len(names) > MAX_PARTIES:
+        raise ValueError(f"At most {MAX_PARTIES} parties are supported, got {len(names)}.")
+    keys = [_unique_keys(cohorts[name]) for name in names]
+    sizes = [len(k) for k in keys]
+    if sum(sizes) == 0:
+        return np.zeros(0, dtype=np.uint64), np.zeros(0, dtype=np.int64)
+    codes, uniques = pd.factorize(pd.concat([pd.Series(k) for k in keys], ignore_index=True))
+    party = np.repeat(np.arange(len(names), dtype=np.uint64), sizes)
+    masks = np.zeros(len(uniques), dtype=np.uint64)
+    np.bitwise_or.at(masks, codes, np.left_shift(np.uint64(1), party))
+    patterns, counts = np.unique(masks, return_counts=True)
+    return patterns, counts
+
+def _laplace(values: np.ndarray, epsilon: float) -> np.ndarray:
+    if epsilon <= 0:
+        return laplace_mechanism(values, epsilon)
+    return np.round(np.maximum(laplace_mechanism(values, epsilon), 0.0), 1)
+
+def compute_multi_party_overlap(cohorts: Mapping[str, CohortLike], epsilon: float = 1.0) -> Dict[str, object]:
+    """
+    Computes every pairwise and k-way overlap between N partner cohorts in a single pass.
+
+    Each released cell (every pairwise overlap and every "in at least k parties"
+    count) gets its own Laplace noise with sensitivity 1 at `epsilon`. One person
+    can appear in every cell, so the total budget spent is epsilon times the number
+    of released cells (reported as 'Total Epsilon').
+
+    Args:
+        cohorts (Mapping[str, CohortLike]): Party name -> cohort keys (a Cohort, Series or array).
+        epsilon (float): Privacy budget per released cell.
+
+    Returns:
+        Dict[str, object]: 'Cohort Sizes', 'True Pairwise' / 'Private Pairwise' (N x N
+        DataFrames; the diagonal holds each cohort's distinct size), 'True K-Way' /
+        'Private K-Way' (k -> keys present in at least k parties), 'True All-Party Overlap',
+        'Private All-Party Overlap' and 'Total Epsilon'.
+    """
+    names = list(cohorts)
+    n_parties = len(names)
+    patterns, counts = membership_patterns(cohorts)
+
+    # (patterns x parties) membership matrix; pairwise counts are one weighted product
+    bits = ((patterns[:, None] >> np.arange(n_parties, dtype=np.uint64)) & np.uint64(1)).astype(np.int64)
+    pairwise = bits.T @ (bits * counts[:, None])
+    sizes = np.diag(pairwise).copy()
+
+    # Keys present in exactly k parties, then cumulated to "at least k"
+    exactly = np.bincount(bits.sum(axis=1), weights=counts, minlength=n_parties + 1).astype(np.int64)
+    at_least = np.cumsum(exactly[::-1])[::-1]
+    ks = np.arange(2, n_parties + 1)
+
+    iu = np.triu_indices(n_parties, k=1)
+    private_pairwise = np.zeros((n_parties, n_parties), dtype=float)
+    private_pairwise[iu] = _laplace(pairwise[iu], epsilon)
+    private_pairwise = private_pairwise + private_pairwise.T
+    np.fill_diagonal(private_pairwise, np.nan)
+    private_at_least = _laplace(at_least[ks], epsilon)
+
+    n_cells = len(iu[0]) + len(ks)
+    true_k = {int(k): int(at_least[k]) for k in ks}
+    private_k = {int(k): float(v) for k, v in zip(ks, private_at_least)}
+    return {
+        'Cohort Sizes': dict(zip(names, sizes.tolist())),
+        'True Pairwise': pd.DataFrame(pairwise, index=names, columns=names),
+        'Private Pairwise': pd.DataFrame(private_pairwise, index=names, columns=names),
+        'True K-Way': true_k,
+        'Private K-Way': private_k,
+        'True All-Party Overlap': true_k.get(n_parties, 0),
+        'Private All-Party Overlap': private_k.get(n_parties, 0.0),
+        'Total Epsilon': epsilon * n_cells if epsilon > 0 else float('inf')
+    }
@@ -0,0 +1,176 @@
+import hashlib
+import json
+import os
+from typing import Dict, Tuple
+import numpy as np
+from src.cohorts import Predicate, evaluate_predicate, FRAUD_FLAGGED, THIN_CREDIT, CONSISTENT_PAYER, RISKY_TRADING
+from src.fraud_analysis import OverlapCounts
+from src.id_codec import DIGEST_SIZE, HASH_COLUMN, hex_to_binary
+from src.storage import iter_dataset
+from src.utils import setup_logger
+
+logger = setup_logger(__name__)
+
+DEFAULT_PARTITIONS = 64
+DEFAULT_CHUNKSIZE = 1_000_000
+
+# Each on-disk record is one 32-byte digest, read back as four big-endian words
+_RECORD = np.dtype([('w0', '>u8'), ('w1', '>u8'), ('w2', '>u8'), ('w3', '>u8')])
+
+def _source_tag(path: str, predicate: Predicate, n_partitions: int) -> str:
+    st = os.stat(path)
+    token = json.dumps([os.path.abspath(path), st.st_size, st.st_mtime_ns, list(predicate), n_partitions])
+    return hashlib.sha256(token.encode()).hexdigest()[:16]
+
+def _load_manifest(path: str) -> dict:
+    if os.path.exists(path):
+        with open(path) as f:
+            return json.load(f)
+    return {}
+
+def _save_manifest(path: str, manifest: dict) -> None:
+    # Write-then-rename so an interruption never leaves a torn manifest
+    tmp = path + '.tmp'
+    with open(tmp, 'w') as f:
+        json.dump(manifest, f)
+    os.replace(tmp, path)
+
+def partition_cohort(path: str, predicate: Predicate, workdir: str, n_partitions: int = DEFAULT_PARTITIONS,
+                     chunksize: int = DEFAULT_CHUNKSIZE, hash_column: str = HASH_COLUMN) -> Tuple[str, dict]:
+    """
+    Streams a CSV/Parquet file and writes its cohort's 32-byte digests into
+    n_partitions on-disk buckets, using the digest's leading bytes as the bucket id.
+
+    Progress is checkpointed after every chunk (chunks done and bucket byte offsets),
+    so an interrupted run resumes where it stopped. A changed source file gets a new
+    directory and starts over.
+
+    Returns:
+        Tuple[str, dict]: The bucket directory and its manifest ('rows' = cohort rows).
+    """
+    bucket_dir = os.path.join(workdir, _source_tag(path, predicate, n_partitions))
+    os.makedirs(bucket_dir, exist_ok=True)
+    manifest_path = os.path.join(bucket_dir, 'manifest.json')
+    manifest = _load_manifest(manifest_path)
+    if manifest.get('complete'):
+        return bucket_dir, manifest
+
+    chunks_done = manifest.get('chunks_done', 0)
+    offsets = manifest.get('offsets', [0] * n_partitions)
+    rows = manifest.get('rows', 0)
+    files = []
+    try:
+        for p in range(n_partitions):
+            f = open(os.path.join(bucket_dir, f'bucket_{p:04d}.bin'), 'ab')
+            # Drop anything written after the last checkpoint
+            f.truncate(offsets[p])
+            files.append(f)
+        for i, chunk in enumerate(iter_dataset(path, [hash_column, predicate[0]], chunksize)):
+            if i < chunks_done:
+                continue
+            keys = chunk.loc[evaluate_predicate(chunk, predicate).to_numpy(), hash_column].dropna()
+            digests = hex_to_binary(keys)
+            rows += len(digests)
+            if len(digests):
+                buckets = np.frombuffer(digests.tobytes(), dtype='>u2')[::DIGEST_SIZE // 2] % n_partitions
+                order = np.argsort(buckets, kind='stable')
+                bounds = np.searchsorted(buckets[order], np.arange(n_partitions + 1))
+                ordered = digests[order]
+                for p in range(n_partitions):
+                    if bounds[p] < bounds[p + 1]:
+                        files[p].write(ordered[bounds[p]:bounds[p + 1]].tobytes())
+            for p, f in enumerate(files):
+                f.flush()
+                offsets[p] = f.tell()
+            chunks_done = i + 1
+            _save_manifest(manifest_path, {'chunks_done': chunks_done, 'offsets': offsets, 'rows': rows})
+    finally:
+        for f in files:
+            f.close()
+    manifest = {'complete': True, 'chunks_done': chunks_done, 'offsets': offsets, 'rows': rows,
+                'source': path, 'predicate': list(predicate)}
+    _save_manifest(manifest_path, manifest)
+    logger.info(f"Partitioned {rows} cohort rows of {path} into {n_partitions} buckets")
+    return bucket_dir, manifest
+
+def _read_bucket(path: str) -> np.ndarray:
+    if os.path.getsize(path) == 0:
+        return np.zeros(0, dtype=_RECORD)
+    return np.memmap(path, dtype=_RECORD, mode='r')
+
+def _dedupe(records: np.ndarray) -> np.ndarray:
+    records = records[np.argsort(records['w0'], kind='stable')]
+    if len(records) < 2:
+        return records
+    same = np.ones(len(records) - 1, dtype=bool)
+    for word in _RECORD.names:
+        same &= records[word][1:] == records[word][:-1]
+    keep = np.concatenate([[True], ~same])
+    return records[keep]
+
+def _bucket_overlap(left: np.ndarray, right: np.ndarray) -> int:
+    """Exact overlap of two buckets: sort-merge on the first word, verify the rest."""
+    a, b = _dedupe(np.asarray(left)), _dedupe(np.asarray(right))
+    if len(a) == 0 or len(b) == 0:
+        return 0
+    if (np.diff(a['w0']) == 0).any() or (np.diff(b['w0']) == 0).any():
+        # Distinct digests sharing 64 leading bits; astronomically rare, compare whole digests
+        return len(set(a.tobytes()[i:i + DIGEST_SIZE] for i in range(0, a.nbytes, DIGEST_SIZE))
+                   .intersection(b.tobytes()[i:i + DIGEST_SIZE] for i in range(0, b.nbytes, DIGEST_SIZE)))
+    pos = np.searchsorted(a['w0'], b['w0'])
+    pos[pos == len(a)] = 0
+    match = a['w0'][pos] == b['w0']
+    for word in _RECORD.names[1:]:
+        match &= a[word][pos] == b[word]
+    return int(match.sum())
+
+def out_of_core_overlap(left_path: str, left_predicate: Predicate, right_path: str, right_predicate: Predicate,
+                        workdir: str, n_partitions: int = DEFAULT_PARTITIONS, chunksize: int = DEFAULT_CHUNKSIZE) -> Dict[str, int]:
+    """
+    Intersects two parties' cohorts that may not fit in memory.
+
+    Both files are hash-partitioned into on-disk buckets, then bucket pairs are
+    memory-mapped and intersected one at a time, so memory is bounded by the largest
+    bucket. Per-bucket results are checkpointed, so reruns after an interruption only
+    redo unfinished work.
+
+    Returns:
+        Dict[str, int]: 'left_rows', 'right_rows' (cohort sizes) and 'overlap'.
+    """
+    os.makedirs(workdir, exist_ok=True)
+    left_dir, left_manifest = partition_cohort(left_path, left_predicate, workdir, n_partitions, chunksize)
+    right_dir, right_manifest = partition_cohort(right_path, right_predicate, workdir, n_partitions, chunksize)
+
+    state_path = os.path.join(workdir, f'{os.path.basename(left_dir)}__{os.path.basename(right_dir)}.json')
+    state = _load_manifest(state_path)
+    done = state.get('buckets', {})
+    for p in range(n_partitions):
+        if str(p) in done:
+            continue
+        name = f'bucket_{p:04d}.bin'
+        done[str(p)] = _bucket_overlap(_read_bucket(os.path.join(left_dir, name)),
+                                       _read_bucket(os.path.join(right_dir, name)))
+        _save_manifest(state_path, {'buckets': done})
+    return {
+        'left_rows': left_manifest['rows'],
+        'right_rows': right_manifest['rows'],
+        'overlap': int(sum(done.values()))
+    }
+
+def compute_fraud_overlap_ooc(bank_path: str, insurer_path: str, workdir: str, epsilon: float = 1.0, **kwargs) -> dict:
+    """Out-of-core compute_fraud_overlap over CSV/Parquet files; same result dict."""
+    counts = out_of_core_overlap(bank_path, FRAUD_FLAGGED, insurer_path, FRAUD_FLAGGED, workdir, **kwargs)
+    return OverlapCounts('Bank Risky Count', counts['left_rows'], 'Insurer Risky Count', counts['right_rows'],
+                         counts['overlap']).release(epsilon)
+
+def compute_inclusion_overlap_ooc(bank_path: str, insurer_path: str, workdir: str, epsilon: float = 1.0, **kwargs) -> dict:
+    """Out-of-core compute_inclusion_overlap over CSV/Parquet files; same result dict."""
+    counts = out_of_core_overlap(bank_path, THIN_CREDIT, insurer_path, CONSISTENT_PAYER, workdir, **kwargs)
+    return OverlapCounts('Bank Invisible Count', counts['left_rows'], 'Insurer Good Payer Count', counts['right_rows'],
+                         counts['overlap']).release(epsilon)
+
+def compute_trading_overlap_ooc(bank_path: str, brokerage_path: str, workdir: str, epsilon: float = 1.0, **kwargs) -> dict:
+    """Out-of-core compute_trading_overlap over CSV/Parquet files; same result dict."""
+    counts = out_of_core_overlap(bank_path, FRAUD_FLAGGED, brokerage_path, RISKY_TRADING, workdir, **kwargs)
+    return OverlapCounts('Bank Risky Count', counts['left_rows'], 'Brokerage Risky Count', counts['right_rows'],
+                         counts['overlap']).release(epsilon)
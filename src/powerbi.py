@@ -0,0 +1,164 @@
+"""
+Incremental Power BI export pipeline.
+
+Writes the overlap summaries and per-company customer tables that the Power BI
+report in powerbi/ reads. Every output records a fingerprint of its inputs
+(source files, columns, epsilon, format) in powerbi/.manifest.json, and a
+rerun only regenerates outputs whose fingerprint changed. Stale outputs load
+just the columns they need and are built and written in parallel.
+"""
+import copy
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional
+import pandas as pd
+from src.cohorts import COHORT_INDEX
+from src.fraud_analysis import ANALYSIS_COLUMNS, fraud_overlap_counts, inclusion_overlap_counts, trading_overlap_counts
+from src.storage import find_dataset, read_dataset
+from src.utils import file_fingerprint, setup_logger
+
+logger = setup_logger(__name__)
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MANIFEST_FILE = ".manifest.json"
+OUTPUT_FORMATS = ('csv', 'parquet')
+
+OVERLAP_COUNTS = {
+    'fraud': fraud_overlap_counts,
+    'inclusion': inclusion_overlap_counts,
+    'trading': trading_overlap_counts,
+}
+
+DEFAULT_CONFIG = {
+    'data_dir': 'data',
+    'out_dir': 'powerbi',
+    'format': 'csv',
+    'epsilon': 1.0,
+    'workers': 4,
+    # output name -> analysis
+    'summaries': {
+        'fraud_summary': 'fraud',
+        'inclusion_summary': 'inclusion',
+        'trading_summary': 'trading',
+    },
+    # output name -> source dataset and the columns to publish
+    'customers': {
+        'bank_customers': {'dataset': 'bank', 'columns': ['Customer_ID_Hash', 'Risk_Score', 'Credit_History_Months', 'Is_Flagged_Fraud']},
+        'insurer_customers': {'dataset': 'insurer', 'columns': ['Customer_ID_Hash', 'Claim_Amount', 'Consistent_Payer', 'Is_Flagged_Fraud']},
+        'brokerage_customers': {'dataset': 'brokerage', 'columns': ['Customer_ID_Hash', 'Portfolio_Value', 'Trading_Frequency', 'Is_Risky_Trading']},
+    },
+}
+
+def load_config(path: Optional[str] = None, **overrides) -> dict:
+    """
+    Returns DEFAULT_CONFIG updated with a JSON config file and keyword overrides.
+
+    Relative data_dir / out_dir resolve against the config file's folder, or the
+    project root when no file is given.
+    """
+    config = copy.deepcopy(DEFAULT_CONFIG)
+    base = PROJECT_ROOT
+    if path is not None:
+        with open(path) as f:
+            config.update(json.load(f))
+        base = os.path.dirname(os.path.abspath(path))
+    config.update({k: v for k, v in overrides.items() if v is not None})
+    if config['format'] not in OUTPUT_FORMATS:
+        raise ValueError(f"Unsupported output format '{config['format']}'. Expected one of {OUTPUT_FORMATS}.")
+    for key in ('data_dir', 'out_dir'):
+        config[key] = os.path.join(base, config[key])
+    return config
+
+def _jobs(config: dict) -> Dict[str, dict]:
+    jobs = {}
+    for name, analysis in config['summaries'].items():
+        jobs[name] = {'kind': 'summary', 'analysis': analysis, 'epsilon': config['epsilon'],
+                      'columns': ANALYSIS_COLUMNS[analysis]}
+    for name, spec in config['customers'].items():
+        jobs[name] = {'kind': 'customers', 'dataset': spec['dataset'], 'columns': {spec['dataset']: spec['columns']}}
+    return jobs
+
+def _token(job: dict, fmt: str, fingerprints: Dict[str, str]) -> str:
+    inputs = {dataset: fingerprints[dataset] for dataset in job['columns']}
+    payload = json.dumps([job, fmt, inputs], sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+def _write_table(df: pd.DataFrame, path: str, fmt: str) -> None:
+    # Write-then-rename so Power BI never reads a half-written file
+    tmp = path + '.tmp'
+    if fmt == 'parquet':
+        df.to_parquet(tmp, index=False)
+    else:
+        df.to_csv(tmp, index=False)
+    os.replace(tmp, path)
+
+def _build(job: dict, frames: Dict[str, pd.DataFrame]) -> pd.DataFrame:
+    if job['kind'] == 'summary':
+        bank, partner = job['columns']
+        counts = OVERLAP_COUNTS[job['analysis']](frames[bank], frames[partner])
+        return pd.DataFrame([counts.release(job['epsilon'])])
+    return frames[job['dataset']][job['columns'][job['dataset']]]
+
+def run_pipeline(config: Optional[dict] = None, force: bool = False) -> Dict[str, str]:
+    """
+    Regenerates the Power BI outputs whose inputs changed.
+
+    Args:
+        config (Optional[dict]): From load_config; defaults to load_config().
+        force (bool): Rewrite every output regardless of the manifest.
+
+    Returns:
+        Dict[str, str]: Output name -> 'written' or 'unchanged'.
+    """
+    config = load_config() if config is None else config
+    fmt = config['format']
+    out_dir = config['out_dir']
+    os.makedirs(out_dir, exist_ok=True)
+    start = time.perf_counter()
+
+    jobs = _jobs(config)
+    datasets = sorted({d for job in jobs.values() for d in job['columns']})
+    paths = {}
+    for dataset in datasets:
+        paths[dataset] = find_dataset(dataset, config['data_dir'])
+        if paths[dataset] is None:
+            raise FileNotFoundError(f"No {dataset} dataset (CSV or Parquet) in {config['data_dir']}")
+    fingerprints = {d: file_fingerprint(p) for d, p in paths.items()}
+
+    manifest_path = os.path.join(out_dir, MANIFEST_FILE)
+    manifest = {}
+    if os.path.exists(manifest_path):
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+    tokens = {name: _token(job, fmt, fingerprints) for name, job in jobs.items()}
+    outputs = {name: os.path.join(out_dir, f"{name}.{fmt}") for name in jobs}
+    stale = [name for name in jobs
+             if force or manifest.get(name) != tokens[name] or not os.path.exists(outputs[name])]
+
+    status = {name: 'unchanged' for name in jobs}
+    if stale:
+        # Each dataset is read once, with only the columns the stale outputs use
+        needed: Dict[str, list] = {}
+        for name in stale:
+            for dataset, columns in jobs[name]['columns'].items():
+                needed.setdefault(dataset, [])
+                needed[dataset] += [c for c in columns if c not in needed[dataset]]
+        with ThreadPoolExecutor(max_workers=config['workers']) as pool:
+            loaded = dict(zip(needed, pool.map(lambda d: read_dataset(paths[d], needed[d]), needed)))
+            for dataset, df in loaded.items():
+                # File version plus column list identifies the frame, so cohorts skip the content hash
+                COHORT_INDEX.set_fingerprint(df, f"{fingerprints[dataset]}:{','.join(needed[dataset])}")
+            list(pool.map(lambda name: _write_table(_build(jobs[name], loaded), outputs[name], fmt), stale))
+        for name in stale:
+            manifest[name] = tokens[name]
+            status[name] = 'written'
+        tmp = manifest_path + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(manifest, f, indent=2, sort_keys=True)
+        os.replace(tmp, manifest_path)
+    logger.info(f"Power BI export: {len(stale)} of {len(jobs)} outputs written to {out_dir} "
+                f"in {time.perf_counter() - start:.2f}s")
+    return status
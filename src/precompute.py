@@ -0,0 +1,60 @@
+"""
+Background precompute of the epsilon-independent part of each analysis.
+
+When a dataset version loads, the cohort filters and intersections of every
+analysis are started together in a worker pool, so by the time a user opens a
+tab its intersection is usually ready and a button click only has to release it
+with fresh noise.
+"""
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Optional
+from src.utils import setup_logger
+
+logger = setup_logger(__name__)
+
+PENDING = 'pending'
+READY = 'ready'
+FAILED = 'failed'
+
+class Precompute:
+    """
+    Runs named jobs concurrently and holds their results.
+
+    Args:
+        jobs (Dict[str, Callable[[], Any]]): Job name -> zero-argument callable.
+        workers (Optional[int]): Pool size; defaults to one thread per job.
+    """
+
+    def __init__(self, jobs: Dict[str, Callable[[], Any]], workers: Optional[int] = None):
+        self._pool = ThreadPoolExecutor(max_workers=workers or max(len(jobs), 1), thread_name_prefix='precompute')
+        self.seconds: Dict[str, float] = {}
+        self.futures: Dict[str, Future] = {name: self._pool.submit(self._run, name, fn) for name, fn in jobs.items()}
+        # Threads exit once the queued jobs finish; results stay readable
+        self._pool.shutdown(wait=False)
+
+    def _run(self, name: str, fn: Callable[[], Any]) -> Any:
+        start = time.perf_counter()
+        try:
+            return fn()
+        except Exception:
+            logger.exception(f"Precompute of '{name}' failed")
+            raise
+        finally:
+            self.seconds[name] = time.perf_counter() - start
+
+    def status(self, name: str) -> str:
+        """'pending', 'ready' or 'failed'."""
+        future = self.futures[name]
+        if not future.done():
+            return PENDING
+        return FAILED if future.exception() is not None else READY
+
+    def result(self, name: str, timeout: Optional[float] = None) -> Any:
+        """Returns a job's result, waiting for it if it is still running. A failed job re-raises its error."""
+        return self.futures[name].result(timeout)
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Waits for every job; returns True when all have finished."""
+        _, pending = wait(self.futures.values(), timeout)
+        return not pending
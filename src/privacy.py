@@ -1,10 +1,142 @@
 import numpy as np
 import pandas as pd
-from typing import List, Dict, Union, Any
-from src.utils import setup_logger
+from typing import List, Dict, Union, Any, Sequence, Tuple
+from src.utils import setup_logger, span
 
 logger = setup_logger(__name__)
 
+ArrayLike = Union[float, np.ndarray, List[float]]
+
+MECHANISMS = ('laplace', 'gaussian', 'geometric')
+DEFAULT_DELTA = 1e-5
+DEFAULT_QUANTILES = (0.5, 0.9, 0.95, 0.99)
+# Noise draws held in memory at once during a sweep (~8 bytes each)
+SWEEP_BLOCK_DRAWS = 2_000_000
+
+def _prepare(values: ArrayLike, epsilon: ArrayLike, sensitivity: ArrayLike):
+    values, epsilon, sensitivity = np.broadcast_arrays(np.asarray(values, dtype=float),
+                                                       np.asarray(epsilon, dtype=float),
+                                                       np.asarray(sensitivity, dtype=float))
+    private = epsilon > 0
+    if not private.all():
+        logger.warning(f"Epsilon must be positive. Returning {int((~private).sum())} raw value(s) (No Privacy!).")
+    # Placeholder epsilon where there is no privacy; those entries get zero noise below
+    safe_epsilon = np.where(private, epsilon, 1.0)
+    return values, safe_epsilon, sensitivity, private
+
+def laplace_mechanism(values: ArrayLike, epsilon: ArrayLike = 1.0, sensitivity: ArrayLike = 1.0) -> np.ndarray:
+    """
+    Adds Laplace(sensitivity / epsilon) noise to every value in one vectorized draw.
+
+    Args:
+        values (ArrayLike): True values (counts, sums, ...).
+        epsilon (ArrayLike): Privacy budget, per value or shared. Values with epsilon <= 0 are returned raw.
+        sensitivity (ArrayLike): Per-value or shared sensitivity.
+
+    Returns:
+        np.ndarray: Noisy values (float), broadcast to a common shape.
+    """
+    values, epsilon, sensitivity, private = _prepare(values, epsilon, sensitivity)
+    noise = np.random.laplace(0.0, sensitivity / epsilon, size=values.shape)
+    return values + np.where(private, noise, 0.0)
+
+def gaussian_mechanism(values: ArrayLike, epsilon: ArrayLike = 1.0, sensitivity: ArrayLike = 1.0,
+                       delta: float = DEFAULT_DELTA) -> np.ndarray:
+    """
+    Adds Gaussian noise for (epsilon, delta)-DP in one vectorized draw.
+
+    Uses the classic calibration sigma = sensitivity * sqrt(2 ln(1.25 / delta)) / epsilon,
+    where sensitivity is the L2 sensitivity; it is valid for epsilon <= 1.
+
+    Returns:
+        np.ndarray: Noisy values (float).
+    """
+    if not 0 < delta < 1:
+        raise ValueError(f"delta must be in (0, 1), got {delta}")
+    values, epsilon, sensitivity, private = _prepare(values, epsilon, sensitivity)
+    sigma = sensitivity * np.sqrt(2 * np.log(1.25 / delta)) / epsilon
+    noise = np.random.normal(0.0, sigma, size=values.shape)
+    return values + np.where(private, noise, 0.0)
+
+def geometric_mechanism(values: ArrayLike, epsilon: ArrayLike = 1.0, sensitivity: ArrayLike = 1) -> np.ndarray:
+    """
+    Two-sided geometric mechanism for integer counts: the discrete analogue of Laplace,
+    so releases stay integers. Noise is the difference of two Geometric(1 - e^(-epsilon / sensitivity)) draws.
+
+    Returns:
+        np.ndarray: Noisy integer values (int64).
+    """
+    values, epsilon, sensitivity, private = _prepare(values, epsilon, sensitivity)
+    p = -np.expm1(-epsilon / sensitivity)
+    noise = np.random.geometric(p, size=values.shape) - np.random.geometric(p, size=values.shape)
+    return np.rint(values).astype(np.int64) + np.where(private, noise, 0)
+
+_MECHANISM_FNS = {
+    'laplace': laplace_mechanism,
+    'gaussian': gaussian_mechanism,
+    'geometric': geometric_mechanism,
+}
+
+def release(values: ArrayLike, epsilon: ArrayLike = 1.0, sensitivity: ArrayLike = 1.0,
+            mechanism: str = 'laplace', **kwargs) -> np.ndarray:
+    """
+    Releases a batch of statistics with one of MECHANISMS ('laplace', 'gaussian', 'geometric').
+
+    Extra keyword arguments go to the mechanism (e.g. delta for 'gaussian').
+    """
+    try:
+        fn = _MECHANISM_FNS[mechanism]
+    except KeyError:
+        raise ValueError(f"Unknown mechanism '{mechanism}'. Expected one of {MECHANISMS}.") from None
+    return fn(values, epsilon, sensitivity, **kwargs)
+
+def error_quantiles(true_value: float, epsilons: ArrayLike, trials: int = 1000, sensitivity: float = 1.0,
+                    mechanism: str = 'laplace', quantiles: Sequence[float] = DEFAULT_QUANTILES,
+                    clip_negative: bool = False, **kwargs) -> pd.DataFrame:
+    """
+    Utility curve of a release: the distribution of its absolute error at many epsilons.
+
+    Noise for every (epsilon, trial) pair is drawn in vectorized blocks of epsilons,
+    so the cost depends on len(epsilons) * trials and not on how the true value was
+    computed. The result describes the true value's error, so it is for the data
+    owners choosing a budget, not for publication.
+
+    Args:
+        true_value (float): The exact statistic (e.g. an intersection size).
+        epsilons (ArrayLike): Budgets to evaluate.
+        trials (int): Simulated releases per epsilon.
+        sensitivity (float): Sensitivity of the statistic.
+        mechanism (str): One of MECHANISMS.
+        quantiles (Sequence[float]): Error quantiles to report.
+        clip_negative (bool): Apply the same max(0, .) post-processing as count releases.
+
+    Returns:
+        pd.DataFrame: One row per epsilon with 'epsilon', 'mean_abs_error', 'abs_error_p<q>'
+        per quantile and 'relative_error_p<q>' (error / true value, NaN when the true value is 0).
+    """
+    epsilons = np.asarray(epsilons, dtype=float).ravel()
+    if trials < 1:
+        raise ValueError(f"trials must be at least 1, got {trials}")
+    block = max(1, SWEEP_BLOCK_DRAWS // trials)
+    mean_abs = np.empty(len(epsilons))
+    errors_q = np.empty((len(epsilons), len(quantiles)))
+    with span('dp.sweep', rows=len(epsilons) * trials, epsilons=len(epsilons), trials=trials):
+        for start in range(0, len(epsilons), block):
+            eps = epsilons[start:start + block, None]
+            noisy = release(np.full((len(eps), trials), float(true_value)), eps, sensitivity, mechanism, **kwargs)
+            if clip_negative:
+                noisy = np.maximum(noisy, 0)
+            errors = np.abs(noisy - true_value)
+            mean_abs[start:start + block] = errors.mean(axis=1)
+            errors_q[start:start + block] = np.quantile(errors, quantiles, axis=1).T
+
+    out = {'epsilon': epsilons, 'mean_abs_error': mean_abs}
+    for j, q in enumerate(quantiles):
+        out[f'abs_error_p{q * 100:g}'] = errors_q[:, j]
+    for j, q in enumerate(quantiles):
+        out[f'relative_error_p{q * 100:g}'] = errors_q[:, j] / true_value if true_value else np.nan
+    return pd.DataFrame(out)
+
 def add_laplace_noise(value: float, epsilon: float = 1.0, sensitivity: float = 1.0) -> float:
     """
     Adds Laplace noise to a value for Differential Privacy.
@@ -20,10 +152,30 @@ def add_laplace_noise(value: float, epsilon: float = 1.0, sensitivity: float = 1
     if epsilon <= 0:
         logger.warning("Epsilon must be positive. Returning raw value (No Privacy!).")
         return value
-        
-    scale = sensitivity / epsilon
-    noise = np.random.laplace(0, scale)
-    return value + noise
+    return float(laplace_mechanism(value, epsilon, sensitivity))
+
+def compute_private_means(sums: ArrayLike, counts: ArrayLike, epsilon: float = 1.0, sum_sensitivity: ArrayLike = 1.0) -> np.ndarray:
+    """
+    Differentially private means for a batch of (clipped sum, count) pairs, with a single noise draw.
+
+    Each mean splits epsilon evenly between its sum and its count, as compute_private_mean does.
+    Means whose noisy count is not positive are returned as 0.
+
+    Returns:
+        np.ndarray: One private mean per pair.
+    """
+    sums = np.asarray(sums, dtype=float)
+    counts = np.asarray(counts, dtype=float)
+    sensitivities = np.concatenate([np.broadcast_to(np.asarray(sum_sensitivity, dtype=float), sums.shape),
+                                    np.ones_like(counts)])
+    with span('dp.private_means', rows=len(sums)):
+        noisy = laplace_mechanism(np.concatenate([sums, counts]), epsilon / 2, sensitivities)
+    private_sums, private_counts = noisy[:len(sums)], noisy[len(sums):]
+    positive = private_counts > 0
+    if not positive.all():
+        logger.debug(f"{int((~positive).sum())} private count(s) <= 0. Returning 0 for those means.")
+    # Avoid division by zero or negative counts
+    return np.where(positive, private_sums / np.where(positive, private_counts, 1.0), 0.0)
 
 def compute_private_mean(series: pd.Series, epsilon: float = 1.0, lower_bound: float = 0, upper_bound: float = 200000) -> float:
     """
@@ -45,23 +197,60 @@ def compute_private_mean(series: pd.Series, epsilon: float = 1.0, lower_bound: f
     # Clip data to bounds to bound sensitivity
     clipped_series = series.clip(lower_bound, upper_bound)
     
-    true_sum = float(clipped_series.sum())
-    true_count = float(clipped_series.count())
-    
     # Sensitivity for Sum is max(abs(lower_bound), abs(upper_bound)) - roughly the range width
     sum_sensitivity = max(abs(lower_bound), abs(upper_bound))
-    # Sensitivity for Count is 1
-    count_sensitivity = 1.0
-    
-    # Split epsilon budget between sum and count (half each)
-    private_sum = add_laplace_noise(true_sum, epsilon/2, sum_sensitivity)
-    private_count = add_laplace_noise(true_count, epsilon/2, count_sensitivity)
-    
-    if private_count <= 0:
-        logger.debug(f"Private count <= 0 ({private_count}). Returning 0 to avoid division errors.")
-        return 0.0 # Avoid division by zero or negative counts
-        
-    return private_sum / private_count
+    return float(compute_private_means([clipped_series.sum()], [clipped_series.count()], epsilon, sum_sensitivity)[0])
+
+def grouped_private_means(data: Union[pd.DataFrame, Sequence[pd.DataFrame]], by: Union[str, ArrayLike],
+                          bounds: Dict[str, Tuple[float, float]], epsilon: float = 1.0) -> pd.DataFrame:
+    """
+    Differentially private means of several metrics for every group, in one grouped pass.
+
+    Each metric is clipped to its bounds, then clipped sums, counts and raw sums for all
+    groups and metrics come from a single groupby; the noise for every (group, metric)
+    mean is drawn in one batch. Each mean spends epsilon (half on its sum, half on its count).
+
+    Args:
+        data: One long table, or a list of frames to stack (only the needed columns are copied).
+        by: Group column name, or group labels aligned with the (stacked) rows.
+        bounds (Dict[str, Tuple[float, float]]): Metric column -> (lower, upper) clipping bounds.
+        epsilon (float): Privacy budget per released mean.
+
+    Returns:
+        pd.DataFrame: One row per group (in order of first appearance) with
+        '<metric> (Private)' and '<metric> (True)' columns.
+    """
+    metrics = list(bounds)
+    if not isinstance(data, pd.DataFrame):
+        needed = metrics + [by] if isinstance(by, str) else metrics
+        data = pd.concat([df[needed] for df in data], ignore_index=True)
+    keys = data[by] if isinstance(by, str) else np.asarray(by)
+    codes, groups = pd.factorize(keys, sort=False)
+    values = data[metrics][codes >= 0]
+    codes = codes[codes >= 0]
+
+    lower = pd.Series({m: b[0] for m, b in bounds.items()})
+    upper = pd.Series({m: b[1] for m, b in bounds.items()})
+    clipped = values.clip(lower=lower, upper=upper, axis=1)
+    combined = pd.concat([values, clipped], axis=1, keys=['raw', 'clipped'])
+    with span('dp.grouped_aggregate', rows=len(values), groups=len(groups), metrics=len(metrics)):
+        stats = combined.groupby(codes).agg(['sum', 'count']).reindex(range(len(groups)), fill_value=0)
+
+    raw_sums = stats['raw'].xs('sum', axis=1, level=1)[metrics].to_numpy(dtype=float)
+    clipped_sums = stats['clipped'].xs('sum', axis=1, level=1)[metrics].to_numpy(dtype=float)
+    counts = stats['clipped'].xs('count', axis=1, level=1)[metrics].to_numpy(dtype=float)
+    # Sensitivity for each sum is max(abs(lower), abs(upper)) of its metric
+    sensitivities = np.broadcast_to(np.maximum(lower.abs(), upper.abs())[metrics].to_numpy(dtype=float), counts.shape)
+    private = compute_private_means(clipped_sums.ravel(), counts.ravel(), epsilon, sensitivities.ravel()).reshape(counts.shape)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        true = np.where(counts > 0, raw_sums / counts, np.nan)
+
+    out = {}
+    for j, metric in enumerate(metrics):
+        out[f'{metric} (Private)'] = private[:, j]
+        out[f'{metric} (True)'] = true[:, j]
+    index = pd.Index(groups, name=by if isinstance(by, str) else None)
+    return pd.DataFrame(out, index=index)
 
 def aggregate_insights(dfs: List[pd.DataFrame], epsilon: float = 1.0) -> List[Dict[str, Any]]:
     """
@@ -74,7 +263,7 @@ def aggregate_insights(dfs: List[pd.DataFrame], epsilon: float = 1.0) -> List[Di
     Returns:
         List[Dict[str, Any]]: List of dictionaries containing aggregated metrics.
     """
-    results = []
+    valid = []
     
     for i, df in enumerate(dfs):
         if df.empty:
@@ -85,19 +274,21 @@ def aggregate_insights(dfs: List[pd.DataFrame], epsilon: float = 1.0) -> List[Di
             logger.error(f"DataFrame at index {i} missing 'Company' column.")
             continue
             
-        company_name = df['Company'].iloc[0]
-        logger.info(f"Processing data for {company_name} with epsilon={epsilon}")
-        
-        # Calculate Private Metrics
-        avg_salary = compute_private_mean(df['Salary'], epsilon=epsilon, upper_bound=150000)
-        avg_satisfaction = compute_private_mean(df['Satisfaction'], epsilon=epsilon, upper_bound=10)
-        
-        results.append({
-            'Company': company_name,
-            'Avg Salary (Private)': avg_salary,
-            'Avg Satisfaction (Private)': avg_satisfaction,
-            'Avg Salary (True)': df['Salary'].mean(),
-            'Avg Satisfaction (True)': df['Satisfaction'].mean()
-        })
-        
-    return results
+        valid.append(df)
+    
+    if not valid:
+        return []
+    logger.info(f"Processing data for {len(valid)} companies with epsilon={epsilon}")
+    
+    # Calculate Private Metrics: one grouped pass over all companies, one group per frame
+    frame_ids = np.repeat(np.arange(len(valid)), [len(df) for df in valid])
+    stats = grouped_private_means(valid, frame_ids, {'Salary': (0, 150000), 'Satisfaction': (0, 10)}, epsilon)
+    stats.insert(0, 'Company', [df['Company'].iloc[0] for df in valid])
+    stats = stats.rename(columns={
+        'Salary (Private)': 'Avg Salary (Private)',
+        'Satisfaction (Private)': 'Avg Satisfaction (Private)',
+        'Salary (True)': 'Avg Salary (True)',
+        'Satisfaction (True)': 'Avg Satisfaction (True)'
+    })
+    return stats[['Company', 'Avg Salary (Private)', 'Avg Satisfaction (Private)',
+                  'Avg Salary (True)', 'Avg Satisfaction (True)']].to_dict('records')
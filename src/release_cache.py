@@ -0,0 +1,154 @@
+"""
+Cache of differentially private releases.
+
+A noisy answer is drawn once per (dataset version, query, epsilon) and then
+served from the cache. Asking again returns the same value, so a user cannot
+average the noise away by repeating a query, and the repeat spends no extra
+budget. Releases are stored in SQLite (in memory or in a local file) with
+least-recently-used eviction.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Optional, Tuple, Union
+import numpy as np
+import pandas as pd
+from src.cohorts import COHORT_INDEX
+from src.privacy import compute_private_mean
+from src.utils import setup_logger
+
+logger = setup_logger(__name__)
+
+DEFAULT_MAX_ENTRIES = 10_000
+
+def _to_builtin(value):
+    if isinstance(value, np.integer):
+        return int(value)
+    if isinstance(value, np.floating):
+        return float(value)
+    raise TypeError(f"Release value of type {type(value).__name__} is not JSON serializable")
+
+class ReleaseCache:
+    """
+    SQLite-backed LRU store of released answers keyed by (dataset version, query, epsilon).
+
+    Args:
+        path (str): Database file, or ':memory:' for a per-process cache.
+        max_entries (int): Least recently used releases beyond this are evicted.
+    """
+
+    def __init__(self, path: str = ':memory:', max_entries: int = DEFAULT_MAX_ENTRIES):
+        if path != ':memory:' and os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        # Streamlit reruns on different threads; the lock serializes access to the connection
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL" if path != ':memory:' else "PRAGMA journal_mode=MEMORY")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS releases ("
+                           "key TEXT PRIMARY KEY, query TEXT, epsilon REAL, value TEXT, last_used INTEGER)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS releases_last_used ON releases (last_used)")
+
+    @staticmethod
+    def key(version: Any, query: str, epsilon: float, **params) -> str:
+        """Stable key for a release; params are any query options that change the answer."""
+        token = json.dumps([version, query, float(epsilon), params], sort_keys=True, default=str)
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    def get(self, version: Any, query: str, epsilon: float, **params) -> Optional[Any]:
+        """Returns the stored release, or None."""
+        key = self.key(version, query, epsilon, **params)
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM releases WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._conn.execute("UPDATE releases SET last_used = ? WHERE key = ?", (time.time_ns(), key))
+        return json.loads(row[0])
+
+    def put(self, version: Any, query: str, epsilon: float, value: Any, **params) -> None:
+        """Stores a release, evicting the least recently used ones beyond max_entries."""
+        self._store(self.key(version, query, epsilon, **params), query, epsilon, value, replace=True)
+
+    def _store(self, key: str, query: str, epsilon: float, value: Any, replace: bool) -> str:
+        # Returns the payload stored under key after the write; with replace=False an
+        # existing release wins over value
+        payload = json.dumps(value, default=_to_builtin)
+        with self._lock:
+            self._conn.execute(f"INSERT OR {'REPLACE' if replace else 'IGNORE'} INTO releases VALUES (?, ?, ?, ?, ?)",
+                               (key, query, float(epsilon), payload, time.time_ns()))
+            stored = self._conn.execute("SELECT value FROM releases WHERE key = ?", (key,)).fetchone()[0]
+            excess = len(self) - self.max_entries
+            if excess > 0:
+                self._conn.execute("DELETE FROM releases WHERE key IN "
+                                   "(SELECT key FROM releases ORDER BY last_used LIMIT ?)", (excess,))
+        return stored
+
+    def get_or_release(self, version: Any, query: str, epsilon: float, release: Callable[[], Any], **params) -> Any:
+        """
+        Returns the stored release, or calls release() and stores its result.
+
+        Concurrent misses (threads, or processes sharing the database file) may each call
+        release(), but only the first stored value is kept and every caller returns it,
+        so no second noise draw is ever served.
+        """
+        cached = self.get(version, query, epsilon, **params)
+        if cached is not None:
+            return cached
+        value = release()
+        # Return the stored form so first and repeated answers are identical
+        return json.loads(self._store(self.key(version, query, epsilon, **params), query, epsilon, value, replace=False))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM releases")
+
+    def __len__(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM releases").fetchone()[0]
+
+    def close(self) -> None:
+        self._conn.close()
+
+# In-memory default used when no cache= is passed; the app passes its own file-backed cache
+RELEASE_CACHE = ReleaseCache()
+
+def series_version(series: pd.Series) -> str:
+    """Content hash of a Series (values, index and name)."""
+    digest = hashlib.sha256(repr(series.name).encode())
+    digest.update(pd.util.hash_pandas_object(series, index=True).to_numpy().tobytes())
+    return digest.hexdigest()
+
+def cached_overlap(compute_fn: Callable[..., dict], left_df: pd.DataFrame, right_df: pd.DataFrame,
+                   epsilon: float = 1.0, fpr: float = None, cache: ReleaseCache = None, **kwargs) -> dict:
+    """
+    Cached front for the compute_*_overlap functions, e.g.
+    cached_overlap(compute_fraud_overlap, bank_df, insurer_df, epsilon=1.0).
+
+    The intersection backend is not part of the key: every exact backend gives the
+    same true overlap, so switching backends must not buy a fresh noise draw.
+    """
+    cache = RELEASE_CACHE if cache is None else cache
+    version = (COHORT_INDEX.fingerprint(left_df), COHORT_INDEX.fingerprint(right_df))
+    return cache.get_or_release(version, compute_fn.__name__, epsilon,
+                                lambda: compute_fn(left_df, right_df, epsilon=epsilon, fpr=fpr, **kwargs), fpr=fpr,
+                                # A Bloom filter's capacity changes the estimate; only keyed when set
+                                **({'capacity': kwargs['capacity']} if kwargs.get('capacity') else {}))
+
+def cached_private_mean(series: pd.Series, epsilon: float = 1.0, lower_bound: float = 0, upper_bound: float = 200000,
+                        cache: ReleaseCache = None, version: Union[str, Tuple, None] = None) -> float:
+    """
+    Cached compute_private_mean. Pass version (e.g. the dataset fingerprint and column)
+    to skip hashing the series.
+    """
+    cache = RELEASE_CACHE if cache is None else cache
+    version = series_version(series) if version is None else version
+    return cache.get_or_release(version, 'compute_private_mean', epsilon,
+                                lambda: compute_private_mean(series, epsilon, lower_bound, upper_bound),
+                                lower_bound=lower_bound, upper_bound=upper_bound)
@@ -0,0 +1,120 @@
+import importlib.util
+import os
+from typing import Dict, Iterator, List, Optional, Sequence
+import pandas as pd
+from src.data_gen import DEFAULT_CHUNK_SIZE, write_chunks
+from src.utils import setup_logger, span
+
+logger = setup_logger(__name__)
+
+DATASETS = ('bank', 'insurer', 'brokerage')
+FORMATS = ('parquet', 'csv')
+# Parquet when pyarrow is installed; CSV keeps working without it
+DEFAULT_FORMAT = 'parquet' if importlib.util.find_spec('pyarrow') is not None else 'csv'
+
+def _parquet():
+    try:
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise ImportError("Parquet storage requires pyarrow (pip install pyarrow).") from e
+    return pq
+
+def file_format(path: str) -> str:
+    """Returns 'parquet' or 'csv' from the file extension."""
+    return 'parquet' if path.endswith('.parquet') else 'csv'
+
+def dataset_path(name: str, data_dir: str = "data", fmt: str = DEFAULT_FORMAT) -> str:
+    """Returns the path of a dataset, e.g. data/bank_data.parquet."""
+    if fmt not in FORMATS:
+        raise ValueError(f"Unsupported storage format '{fmt}'. Expected one of {FORMATS}.")
+    return os.path.join(data_dir, f"{name}_data.{fmt}")
+
+def find_dataset(name: str, data_dir: str = "data") -> Optional[str]:
+    """Returns the existing file for a dataset, preferring Parquet over CSV, or None."""
+    for fmt in FORMATS:
+        path = dataset_path(name, data_dir, fmt)
+        if os.path.exists(path):
+            return path
+    return None
+
+def read_schema(path: str) -> List[str]:
+    """Returns a dataset's column names without reading any rows."""
+    if file_format(path) == 'parquet':
+        return list(_parquet().read_schema(path).names)
+    return list(pd.read_csv(path, nrows=0).columns)
+
+def read_dataset(path: str, columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+    """
+    Loads a dataset, reading only the requested columns.
+
+    Parquet files are memory-mapped and only the requested column chunks are
+    decoded; CSV files are still parsed row by row but unrequested columns are
+    skipped.
+
+    Args:
+        path (str): CSV or Parquet file.
+        columns (Optional[Sequence[str]]): Columns to load. None loads everything.
+
+    Returns:
+        pd.DataFrame: The loaded columns, in file order.
+    """
+    with span('load', path=os.path.basename(path)) as s:
+        if file_format(path) == 'parquet':
+            table = _parquet().read_table(path, columns=None if columns is None else list(columns), memory_map=True)
+            df = table.to_pandas()
+        elif columns is None:
+            df = pd.read_csv(path)
+        else:
+            df = pd.read_csv(path, usecols=list(columns))
+        s.rows = len(df)
+    return df
+
+def iter_dataset(path: str, columns: Sequence[str], chunksize: int = DEFAULT_CHUNK_SIZE) -> Iterator[pd.DataFrame]:
+    """Streams the requested columns of a dataset in chunks of at most chunksize rows."""
+    if file_format(path) == 'parquet':
+        for batch in _parquet().ParquetFile(path, memory_map=True).iter_batches(batch_size=chunksize, columns=list(columns)):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, usecols=list(columns), chunksize=chunksize)
+
+def migrate_csv(csv_path: str, parquet_path: Optional[str] = None, chunksize: int = DEFAULT_CHUNK_SIZE) -> str:
+    """
+    Converts a CSV dataset to Parquet, streaming it in chunks.
+
+    The Parquet file is written next to the CSV under a temporary name and renamed
+    into place when complete, so an interrupted migration never leaves a partial file
+    that later loads would pick up. The CSV is left untouched.
+
+    Returns:
+        str: Path of the Parquet file.
+    """
+    if parquet_path is None:
+        parquet_path = os.path.splitext(csv_path)[0] + '.parquet'
+    tmp = parquet_path + '.tmp'
+    rows = write_chunks(pd.read_csv(csv_path, chunksize=chunksize), tmp, file_format='parquet')
+    os.replace(tmp, parquet_path)
+    logger.info(f"Migrated {rows} rows from {csv_path} to {parquet_path}")
+    return parquet_path
+
+def migrate_data_dir(data_dir: str = "data", chunksize: int = DEFAULT_CHUNK_SIZE) -> Dict[str, str]:
+    """
+    Migrates every CSV dataset in data_dir that has no up-to-date Parquet copy.
+
+    Returns:
+        Dict[str, str]: Dataset name -> Parquet path, for the datasets migrated.
+    """
+    migrated = {}
+    for name in DATASETS:
+        csv_path = dataset_path(name, data_dir, 'csv')
+        parquet_path = dataset_path(name, data_dir, 'parquet')
+        if not os.path.exists(csv_path):
+            continue
+        if os.path.exists(parquet_path) and os.path.getmtime(parquet_path) >= os.path.getmtime(csv_path):
+            continue
+        migrated[name] = migrate_csv(csv_path, parquet_path, chunksize)
+    return migrated
+
+if __name__ == "__main__":
+    # Convert the CSVs in data/ to Parquet: python -m src.storage
+    for name, path in migrate_data_dir().items():
+        print(f"{name}: {path}")
@@ -1,8 +1,33 @@
+import hashlib
+import json
 import logging
+import os
 import sys
-from typing import Optional
+import threading
+import time
+import tracemalloc
+from collections import deque
+from typing import Any, Dict, List, Optional
 
-def setup_logger(name: str = "privacy_insights", log_level: int = logging.INFO, log_file: Optional[str] = None) -> logging.Logger:
+class JsonFormatter(logging.Formatter):
+    """Formats records as one JSON object per line; span records carry their measurements."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            'ts': self.formatTime(record),
+            'logger': record.name,
+            'level': record.levelname,
+            'message': record.getMessage(),
+        }
+        span_record = getattr(record, 'span', None)
+        if span_record is not None:
+            payload['span'] = span_record
+        if record.exc_info:
+            payload['exc_info'] = self.formatException(record.exc_info)
+        return json.dumps(payload, default=str)
+
+def setup_logger(name: str = "privacy_insights", log_level: int = logging.INFO, log_file: Optional[str] = None,
+                 json_format: Optional[bool] = None) -> logging.Logger:
     """
     Configures and returns a logger instance.
 
@@ -10,6 +35,8 @@ def setup_logger(name: str = "privacy_insights", log_level: int = logging.INFO,
         name (str): Name of the logger.
         log_level (int): Logging level (default: logging.INFO).
         log_file (Optional[str]): Path to a log file. If None, logs only to console.
+        json_format (Optional[bool]): Emit JSON lines instead of plain text. Defaults to
+            the PRIVACY_INSIGHTS_JSON_LOGS environment variable ("1" enables it).
 
     Returns:
         logging.Logger: Configured logger.
@@ -22,7 +49,12 @@ def setup_logger(name: str = "privacy_insights", log_level: int = logging.INFO,
         # Console Handler
         console_handler = logging.StreamHandler(sys.stdout)
         console_handler.setLevel(log_level)
-        formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+        if json_format is None:
+            json_format = os.environ.get('PRIVACY_INSIGHTS_JSON_LOGS') == '1'
+        if json_format:
+            formatter = JsonFormatter()
+        else:
+            formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
         console_handler.setFormatter(formatter)
         logger.addHandler(console_handler)
 
@@ -34,3 +66,147 @@ def setup_logger(name: str = "privacy_insights", log_level: int = logging.INFO,
             logger.addHandler(file_handler)
 
     return logger
+
+# --- Span instrumentation ---------------------------------------------------
+# Off by default; span() then returns a shared no-op, so instrumented code pays
+# one function call and a flag check per stage.
+
+MAX_SPANS = 1000
+
+_perf_logger = setup_logger("privacy_insights.perf", log_level=logging.DEBUG)
+_instrumentation = {'enabled': os.environ.get('PRIVACY_INSIGHTS_PROFILE') == '1', 'memory': True}
+_spans = deque(maxlen=MAX_SPANS)
+_span_stack = threading.local()
+
+class _NoopSpan:
+    rows = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+_NOOP_SPAN = _NoopSpan()
+
+class Span:
+    """
+    Times one stage. Use as a context manager; set .rows inside the block if the row
+    count is only known there.
+
+    Records wall time, rows processed and, when memory tracking is on, the peak Python
+    heap (tracemalloc, which also sees NumPy buffers) above the level at entry.
+
+    The tracemalloc peak is process wide, so memory is only tracked for spans on the
+    main thread; spans in worker threads (e.g. the precompute pool) record peak_mb as
+    None rather than resetting each other's peak. A main-thread peak still includes
+    whatever other threads allocate while the span is open.
+    """
+
+    def __init__(self, name: str, rows: Optional[int] = None, **attrs):
+        self.name = name
+        self.rows = rows
+        self.attrs = attrs
+        self._child_peak = 0
+
+    def __enter__(self):
+        stack = getattr(_span_stack, 'spans', None)
+        if stack is None:
+            stack = _span_stack.spans = []
+        self._parent = stack[-1] if stack else None
+        stack.append(self)
+        self._memory = (_instrumentation['memory'] and tracemalloc.is_tracing()
+                        and threading.current_thread() is threading.main_thread())
+        if self._memory:
+            current, peak = tracemalloc.get_traced_memory()
+            if self._parent is not None:
+                # reset_peak() below would hide the parent's peak so far; carry it up
+                self._parent._child_peak = max(self._parent._child_peak, peak)
+            self._mem_start = current
+            tracemalloc.reset_peak()
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        seconds = time.perf_counter() - self._start
+        _span_stack.spans.pop()
+        record = {
+            'name': self.name,
+            'seconds': round(seconds, 6),
+            'rows': self.rows,
+            'rows_per_second': round(self.rows / seconds) if self.rows and seconds > 0 else None,
+            'peak_mb': None,
+            'parent': self._parent.name if self._parent is not None else None,
+            'thread': threading.current_thread().name,
+            'error': exc_type.__name__ if exc_type is not None else None,
+        }
+        if self._memory:
+            peak = max(tracemalloc.get_traced_memory()[1], self._child_peak)
+            record['peak_mb'] = round(max(peak - self._mem_start, 0) / 2**20, 3)
+            if self._parent is not None:
+                self._parent._child_peak = max(self._parent._child_peak, peak)
+        record.update(self.attrs)
+        _spans.append(record)
+        _perf_logger.debug(f"span {self.name}: {seconds * 1e3:.2f} ms", extra={'span': record})
+        return False
+
+def span(name: str, rows: Optional[int] = None, **attrs):
+    """Returns a timing context manager for a stage, or a no-op when instrumentation is off."""
+    if not _instrumentation['enabled']:
+        return _NOOP_SPAN
+    return Span(name, rows, **attrs)
+
+def enable_instrumentation(enabled: bool = True, memory: bool = True) -> None:
+    """
+    Turns span recording on or off, process wide.
+
+    Args:
+        enabled (bool): Record spans.
+        memory (bool): Also track peak memory with tracemalloc (slows allocation-heavy code).
+            Only main-thread spans record it; see Span.
+    """
+    _instrumentation['enabled'] = enabled
+    _instrumentation['memory'] = memory
+    if enabled and memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    elif tracemalloc.is_tracing() and not (enabled and memory):
+        tracemalloc.stop()
+
+def instrumentation_enabled() -> bool:
+    return _instrumentation['enabled']
+
+def recent_spans(n: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Most recent span records, oldest first."""
+    spans = list(_spans)
+    return spans if n is None else spans[-n:]
+
+def clear_spans() -> None:
+    _spans.clear()
+
+# (path, size, mtime_ns) -> content hash, so unchanged files are hashed only once per process
+_content_hashes = {}
+
+def file_fingerprint(path: str, content_hash: bool = True) -> str:
+    """
+    Returns a fingerprint of a file's current version.
+
+    Args:
+        path (str): File to fingerprint.
+        content_hash (bool): Include a SHA-256 of the contents. The hash is computed
+            once per (path, size, mtime) and reused while those stay the same.
+
+    Returns:
+        str: "size-mtime_ns" or "size-mtime_ns-sha256".
+    """
+    st = os.stat(path)
+    key = (os.path.abspath(path), st.st_size, st.st_mtime_ns)
+    fingerprint = f"{st.st_size}-{st.st_mtime_ns}"
+    if not content_hash:
+        return fingerprint
+    if key not in _content_hashes:
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+        _content_hashes[key] = digest.hexdigest()
+    return f"{fingerprint}-{_content_hashes[key]}"
@@ -0,0 +1,61 @@
+import pytest
+import numpy as np
+import pandas as pd
+from src.bloom import BloomFilter, approximate_overlap, bloom_capacity
+from src.fraud_analysis import compute_fraud_overlap
+
+def test_bloom_has_no_false_negatives():
+    keys = np.arange(5000, dtype=np.uint64)
+    bloom = BloomFilter(len(keys), fpr=0.01)
+    bloom.add(keys)
+    assert bloom.contains(keys).all()
+    others = np.arange(5000, 105000, dtype=np.uint64)
+    assert bloom.contains(others).mean() < 0.02
+
+def test_approximate_overlap_within_bound():
+    rng = np.random.default_rng(1)
+    left = rng.integers(0, 2**63, size=50000, dtype=np.uint64)
+    right = np.concatenate([left[:20000], rng.integers(0, 2**63, size=30000, dtype=np.uint64)])
+    approx = approximate_overlap(left, right, fpr=0.01, capacity=len(left))
+    assert abs(approx['estimate'] - 20000) <= approx['error_bound']
+    assert approx['filter_bytes'] < left.nbytes
+
+def test_small_probe_against_large_filter_stays_within_bound():
+    rng = np.random.default_rng(2)
+    left = rng.integers(0, 2**63, size=200_000, dtype=np.uint64)
+    right = np.concatenate([left[:1000], rng.integers(0, 2**63, size=1000, dtype=np.uint64)])
+    for capacity in (200_000, 1_000_000):
+        approx = approximate_overlap(left, right, fpr=0.01, capacity=capacity)
+        assert abs(approx['estimate'] - 1000) <= approx['error_bound']
+    with pytest.raises(ValueError):
+        approximate_overlap(left, right, capacity=100_000)
+
+def test_one_key_moves_estimate_by_at_most_sensitivity():
+    rng = np.random.default_rng(3)
+    left = rng.integers(0, 2**63, size=20_000, dtype=np.uint64)
+    right = np.concatenate([left[:1000], rng.integers(0, 2**63, size=19_000, dtype=np.uint64)])
+    base = approximate_overlap(left, right, capacity=20_001)
+    fresh = rng.integers(0, 2**63, size=2, dtype=np.uint64)
+    neighbours = [
+        (left, right[1:]),                       # probing party drops a shared customer
+        (left, np.append(right, fresh[0])),      # probing party adds a customer
+        (left[1:], right),                       # publishing party drops a shared customer
+        (np.append(left, fresh[1]), right),      # publishing party adds a customer
+    ]
+    for l, r in neighbours:
+        approx = approximate_overlap(l, r, capacity=20_001)
+        assert abs(approx['estimate'] - base['estimate']) <= base['sensitivity'] + 1e-9
+
+def test_overlap_above_default_capacity():
+    n = 1_200_000
+    # The last 100 bank rows repeat earlier customers; published keys are not de-duplicated
+    keys = pd.Series(np.r_[np.arange(n - 100), np.arange(100)])
+    bank = pd.DataFrame({'Customer_ID_Hash': keys, 'Is_Flagged_Fraud': np.ones(n, dtype=np.int64)})
+    insurer = pd.DataFrame({'Customer_ID_Hash': np.r_[np.arange(20_000), np.arange(n, n + 20_000)],
+                            'Is_Flagged_Fraud': 1})
+    result = compute_fraud_overlap(bank, insurer, epsilon=100.0, fpr=0.01)
+    assert result['Bank Risky Count'] == n
+    assert abs(result['True Overlap'] - 20_000) <= result['Approx Error Bound']
+    assert result['Bloom Filter Bytes'] == BloomFilter(bloom_capacity(n), 0.01).size_bytes
+    fixed = compute_fraud_overlap(bank, insurer, epsilon=100.0, fpr=0.01, capacity=4_000_000)
+    assert fixed['Bloom Filter Bytes'] > result['Bloom Filter Bytes']
@@ -0,0 +1,24 @@
+import numpy as np
+import pandas as pd
+from src.charts import MAX_BINS, downsample, histogram, nice_step
+
+def test_histogram_matches_numpy_and_stays_bounded():
+    values = np.random.default_rng(0).integers(0, 101, 100_000)
+    bins = histogram(values, step=5)
+    assert bins['bin_start'].iloc[0] == 0 and (bins['bin_end'] - bins['bin_start'] == 5).all()
+    expected, _ = np.histogram(values, bins=np.arange(0, 110, 5))
+    assert bins['count'].tolist() == expected.tolist()
+    assert bins['count'].sum() == len(values)
+
+    # A step too fine for the range is widened; the default picks a round width
+    assert len(histogram(np.r_[0, 1e9, np.nan], step=1)) <= MAX_BINS + 1
+    assert nice_step(0, 8700, 30) == 500
+    assert len(histogram(np.random.default_rng(1).exponential(1000, 1_000_000))) <= 31
+
+def test_downsample_is_bounded_and_deterministic():
+    df = pd.DataFrame({'x': np.arange(10_000), 'y': np.arange(10_000) * 2})
+    sample = downsample(df, ['x'], max_points=500)
+    assert len(sample) == 500 and list(sample.columns) == ['x']
+    assert sample['x'].is_monotonic_increasing
+    assert sample.equals(downsample(df, ['x'], max_points=500))
+    assert len(downsample(df.head(10), max_points=500)) == 10
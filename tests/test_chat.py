@@ -1,5 +1,5 @@
 import pytest
-from src.fraud_analysis import simulate_cortex_chat
+from src.fraud_analysis import simulate_cortex_chat, classify_intents, get_intent_classifier, _classify_intent
 
 def test_chat_fraud_overlap():
     results = {
@@ -100,3 +100,10 @@ def test_intent_compare_vs_phrase():
     }
     msg = simulate_cortex_chat("Compare bank vs brokerage", results)
     assert "Cohort sizes:" in msg
+
+def test_classify_intents_batch_matches_single_and_reuses_model():
+    queries = ["How many overlapping fraudsters?", "Explain epsilon", "Download excel", "tell me a joke"]
+    batch = classify_intents(queries)
+    assert batch == [_classify_intent(q.lower()) for q in queries]
+    assert batch[1] == 'privacy' and batch[3] == ''
+    assert get_intent_classifier() is get_intent_classifier()
@@ -0,0 +1,58 @@
+import asyncio
+from src.chat_service import ChatClient, ChatService, run_load
+
+def test_sessions_and_batching_over_localhost():
+    async def scenario():
+        service = ChatService(max_delay=0.01)
+        port = await service.start('127.0.0.1', 0)
+        try:
+            fraud, inclusion = await ChatClient.connect(port=port), await ChatClient.connect(port=port)
+            await fraud.set_context('fraud', {'Bank Risky Count': 10, 'Insurer Risky Count': 8,
+                                              'True Overlap': 3, 'Private Overlap': 3.5})
+            await inclusion.set_context('inclusion', {'Bank Invisible Count': 12, 'Insurer Good Payer Count': 20,
+                                                      'True Overlap': 5, 'Private Overlap': 5.2})
+            a, b = await asyncio.gather(fraud.chat('fraud', "How many overlapping fraudsters did we find?"),
+                                        inclusion.chat('inclusion', "Bank risky count"))
+            assert "3.5" in a['answer']
+            assert "Bank 'Invisible' count: 12." in b['answer']
+            # Both queries arrived within the batching window
+            assert service.batches == 1
+
+            load = await run_load('127.0.0.1', port, n_clients=10, queries_per_client=5)
+            assert load['requests'] == 50
+            stats = await fraud.stats()
+            assert stats['count'] >= 54 and 0 < stats['p50_ms'] <= stats['p99_ms']
+            assert 'error' in await fraud.request({'type': 'nope'})
+            # Valid JSON that is not an object gets an error, and the connection stays usable
+            assert 'error' in await fraud.request([])
+            assert 'error' in await fraud.request("x")
+            assert (await fraud.stats())['count'] > 0
+            await fraud.close()
+            await inclusion.close()
+        finally:
+            await service.close()
+
+    asyncio.run(scenario())
+
+def test_bad_session_does_not_fail_its_batch():
+    async def scenario():
+        service = ChatService(max_delay=0.05)
+        port = await service.start('127.0.0.1', 0)
+        try:
+            good, bad = await ChatClient.connect(port=port), await ChatClient.connect(port=port)
+            await good.set_context('good', {'Bank Risky Count': 10, 'Insurer Risky Count': 8,
+                                            'True Overlap': 3, 'Private Overlap': 3.5})
+            await bad.set_context('bad', {'Bank Risky Count': 10, 'Insurer Risky Count': 8,
+                                          'True Overlap': 3, 'Private Overlap': 'x'})
+            question = "difference between private and true"
+            # The bad query is queued first, so it fails before the good one is answered
+            failed, ok = await asyncio.gather(bad.chat('bad', question), good.chat('good', question))
+            assert service.batches == 1
+            assert 'answer' in ok and 'error' not in ok
+            assert 'error' in failed
+            await good.close()
+            await bad.close()
+        finally:
+            await service.close()
+
+    asyncio.run(scenario())
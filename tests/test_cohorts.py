@@ -0,0 +1,65 @@
+import pytest
+import pandas as pd
+from src.cohorts import CohortIndex, FRAUD_FLAGGED, THIN_CREDIT
+from src.fraud_analysis import compute_fraud_overlap
+
+def make_bank():
+    return pd.DataFrame({
+        'Customer_ID_Hash': ['A', 'B', 'C', 'D'],
+        'Is_Flagged_Fraud': [1, 0, 1, 1],
+        'Credit_History_Months': [5, 20, 2, 30]
+    })
+
+def test_cohort_is_materialized_once():
+    index = CohortIndex()
+    bank = make_bank()
+    first = index.get(bank, FRAUD_FLAGGED)
+    second = index.get(bank, FRAUD_FLAGGED)
+    assert first is second
+    assert (index.hits, index.misses) == (1, 1)
+    assert first.size == 3
+    assert list(first.rows(bank, ['Customer_ID_Hash'], n=2)['Customer_ID_Hash']) == ['A', 'C']
+
+def test_changed_data_gets_new_cohort():
+    index = CohortIndex()
+    bank = make_bank()
+    index.get(bank, FRAUD_FLAGGED)
+    changed = bank.assign(Is_Flagged_Fraud=[0, 0, 0, 1])
+    assert index.get(changed, FRAUD_FLAGGED).size == 1
+    # Equal content under a different object reuses the cached cohort
+    assert index.get(make_bank(), FRAUD_FLAGGED).size == 3
+    assert index.hits == 1
+
+def test_in_place_edits_get_new_cohorts():
+    bank = make_bank()
+    insurer = pd.DataFrame({'Customer_ID_Hash': ['A', 'C', 'E'], 'Is_Flagged_Fraud': [1, 1, 0]})
+    assert compute_fraud_overlap(bank, insurer, epsilon=100.0)['True Overlap'] == 2
+    bank.loc[0, 'Is_Flagged_Fraud'] = 0
+    assert compute_fraud_overlap(bank, insurer, epsilon=100.0)['True Overlap'] == 1
+    bank['Is_Flagged_Fraud'] = [0, 0, 0, 0]
+    assert compute_fraud_overlap(bank, insurer, epsilon=100.0)['True Overlap'] == 0
+
+def test_unrelated_columns_are_not_fingerprinted():
+    index = CohortIndex()
+    bank = make_bank()
+    index.get(bank, FRAUD_FLAGGED)
+    # Only the hash and predicate columns key a cohort
+    index.get(bank.assign(Customer_ID_Raw='changed'), FRAUD_FLAGGED)
+    assert index.hits == 1
+    assert index.fingerprint(bank) != index.fingerprint(bank.assign(Customer_ID_Raw='changed'))
+
+def test_lru_eviction():
+    index = CohortIndex(max_entries=1)
+    bank = make_bank()
+    index.get(bank, FRAUD_FLAGGED)
+    index.get(bank, THIN_CREDIT)
+    assert len(index) == 1
+    index.get(bank, FRAUD_FLAGGED)
+    assert index.misses == 3
+
+def test_failed_build_releases_its_lock():
+    index = CohortIndex()
+    bank = make_bank()
+    with pytest.raises(KeyError):
+        index.get(bank, ('Missing_Column', '==', 1))
+    assert not index._building
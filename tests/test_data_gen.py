@@ -0,0 +1,41 @@
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+from src.data_gen import (RowStreams, build_customer_ids, hash_customer_id, generate_bank_data, generate_insurer_data,
+                          generate_rows, iter_insurer_data, write_chunks)
+
+def test_build_customer_ids_matches_serial_hashing():
+    ids, hashed = build_customer_ids("Test Insurer", 50, overlap_count=20, n_jobs=2, batch_size=7)
+    assert ids[0] == "Global Bank_CUST_00000"
+    assert ids[20] == "Test Insurer_CUST_00020"
+    assert hashed == [hash_customer_id(i) for i in ids]
+
+def test_parallel_generation_is_identical():
+    serial = generate_insurer_data("Test Insurer", n_customers=300, seed=7)
+    parallel = generate_insurer_data("Test Insurer", n_customers=300, seed=7, n_jobs=2)
+    assert serial.equals(parallel)
+
+def test_chunked_generation_keeps_overlap_across_chunks(tmp_path):
+    path = str(tmp_path / "insurer.csv")
+    rows = write_chunks(iter_insurer_data("Test Insurer", n_customers=100, chunk_size=30, seed=7), path)
+    df = pd.read_csv(path)
+    assert rows == len(df) == 100
+    assert df['Customer_ID_Raw'].str.startswith("Global Bank_CUST_").sum() == 50
+    assert df['Customer_ID_Raw'].iloc[49] == "Global Bank_CUST_00049"
+    assert df['Customer_ID_Raw'].iloc[50] == "Test Insurer_CUST_00050"
+
+def test_row_streams_reproduce_any_range():
+    draw = lambda rng, n: rng.normal(size=n)
+    full = RowStreams(7, 0, 25, shard_rows=5).draw(0, draw)
+    assert np.array_equal(RowStreams(7, 3, 17, shard_rows=5).draw(0, draw), full[3:17])
+    # Shard streams are the SeedSequence.spawn children
+    child = np.random.SeedSequence(7).spawn(3)[2].spawn(1)[0]
+    assert np.array_equal(draw(np.random.default_rng(child), 5), full[10:15])
+
+def test_row_ranges_and_threads_match_full_table():
+    full = generate_bank_data("Global Bank", n_customers=400, seed=3)
+    parts = [generate_rows('bank', "Global Bank", lo, hi, 400, seed=3) for lo, hi in [(0, 150), (150, 151), (151, 400)]]
+    assert pd.concat(parts, ignore_index=True).equals(full)
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        frames = list(pool.map(lambda seed: generate_bank_data("Global Bank", n_customers=400, seed=seed), [3] * 4))
+    assert all(df.equals(full) for df in frames)
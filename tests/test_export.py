@@ -0,0 +1,32 @@
+import io
+import zipfile
+import pandas as pd
+from src.data_gen import generate_bank_data, generate_insurer_data
+from src.export import export_bytes, export_sheets
+from src.fraud_analysis import compute_fraud_overlap
+
+def _sheets():
+    bank = generate_bank_data("Global Bank", n_customers=300, seed=5)
+    insurer = generate_insurer_data("Test Insurer", n_customers=200, seed=6)
+    results = compute_fraud_overlap(bank, insurer, epsilon=1.0)
+    return results, export_sheets('fraud', results, {'bank': bank, 'insurer': insurer})
+
+def test_export_uses_the_given_release():
+    results, sheets = _sheets()
+    assert list(sheets) == ['Summary', 'BankSample', 'InsurerSample']
+    assert sheets['Summary'].iloc[0].to_dict() == results
+    assert len(sheets['BankSample']) <= 100 and sheets['BankSample'].shape[1] == 2
+
+def test_export_formats():
+    results, sheets = _sheets()
+    xlsx = zipfile.ZipFile(io.BytesIO(export_bytes(sheets, 'xlsx')))
+    sheet_xml = xlsx.read('xl/worksheets/sheet2.xml').decode()
+    assert sheets['BankSample']['Customer_ID_Hash'].iloc[0] in sheet_xml
+
+    archive = zipfile.ZipFile(io.BytesIO(export_bytes(sheets, 'csv')))
+    assert sorted(archive.namelist()) == ['BankSample.csv', 'InsurerSample.csv', 'Summary.csv']
+    assert pd.read_csv(archive.open('Summary.csv'))['Private Overlap'].iloc[0] == results['Private Overlap']
+
+    archive = zipfile.ZipFile(io.BytesIO(export_bytes(sheets, 'parquet')))
+    pd.testing.assert_frame_equal(pd.read_parquet(io.BytesIO(archive.read('BankSample.parquet'))),
+                                  sheets['BankSample'].reset_index(drop=True), check_dtype=False)
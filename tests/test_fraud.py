@@ -1,7 +1,9 @@
 import pytest
+import numpy as np
 import pandas as pd
 from src.data_gen import generate_bank_data, generate_insurer_data, generate_brokerage_data
-from src.fraud_analysis import compute_fraud_overlap, compute_inclusion_overlap, compute_trading_overlap
+from src.fraud_analysis import compute_fraud_overlap, compute_inclusion_overlap, compute_trading_overlap, fraud_overlap_counts
+from src.utils import file_fingerprint
 
 def test_data_generation_columns():
     """Test that generated data has correct columns for the new use case."""
@@ -99,3 +101,24 @@ def test_trading_overlap_logic():
     })
     results = compute_trading_overlap(bank, broker, epsilon=100.0)
     assert results['True Overlap'] == 1
+
+def test_overlap_counts_release_reuses_intersection():
+    bank = pd.DataFrame({'Customer_ID_Hash': ['A', 'B', 'C'], 'Is_Flagged_Fraud': [1, 1, 0]})
+    insurer = pd.DataFrame({'Customer_ID_Hash': ['A', 'B', 'D'], 'Is_Flagged_Fraud': [1, 0, 1]})
+    counts = fraud_overlap_counts(bank, insurer)
+    for epsilon in (0.1, 1.0, 100.0):
+        results = counts.release(epsilon)
+        assert results['True Overlap'] == 1
+        assert results['Bank Risky Count'] == 2
+        assert results['Private Overlap'] >= 0
+    curve = counts.sweep(np.geomspace(0.1, 10, 50), trials=200)
+    assert len(curve) == 50
+    assert curve['abs_error_p95'].iloc[0] > curve['abs_error_p95'].iloc[-1]
+
+def test_file_fingerprint_tracks_changes(tmp_path):
+    path = tmp_path / "data.csv"
+    path.write_text("a\n1\n")
+    first = file_fingerprint(str(path))
+    assert file_fingerprint(str(path)) == first
+    path.write_text("a\n1\n2\n")
+    assert file_fingerprint(str(path)) != first
@@ -0,0 +1,28 @@
+import pytest
+import numpy as np
+import pandas as pd
+from src.data_gen import generate_bank_data
+from src.fraud_analysis import compute_fraud_overlap
+from src.id_codec import encode_hashes, decode_hashes, compact_hash_column, restore_hash_column, hex_to_key64, key64_collision_bound
+
+def test_binary_round_trip():
+    df = generate_bank_data("Test Bank", n_customers=50)
+    compact = compact_hash_column(df, encoding='binary')
+    assert compact['Customer_ID_Hash'].memory_usage(deep=True) < df['Customer_ID_Hash'].memory_usage(deep=True)
+    restored = restore_hash_column(compact)
+    assert restored['Customer_ID_Hash'].tolist() == df['Customer_ID_Hash'].tolist()
+
+def test_key64_is_leading_bits():
+    h = "00" * 7 + "ff" + "ab" * 24
+    assert hex_to_key64([h])[0] == np.uint64(255)
+    assert key64_collision_bound(10_000_000) < 1e-5
+    with pytest.raises(ValueError):
+        decode_hashes(encode_hashes(pd.Series([h]), 'key64'))
+
+@pytest.mark.parametrize("encoding", ['binary', 'key64'])
+def test_overlap_same_under_compact_encodings(encoding):
+    bank = generate_bank_data("Global Bank", n_customers=200, seed=1)
+    insurer = bank.sample(frac=1.0, random_state=0).reset_index(drop=True)
+    expected = compute_fraud_overlap(bank, insurer, epsilon=100.0)['True Overlap']
+    results = compute_fraud_overlap(compact_hash_column(bank, encoding), compact_hash_column(insurer, encoding), epsilon=100.0)
+    assert results['True Overlap'] == expected
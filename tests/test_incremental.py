@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+from src.data_gen import generate_bank_data, generate_brokerage_data, generate_insurer_data
+from src.fraud_analysis import fraud_overlap_counts, inclusion_overlap_counts, trading_overlap_counts
+from src.incremental import IncrementalOverlaps
+
+FULL = {'fraud': (fraud_overlap_counts, 'insurer'), 'inclusion': (inclusion_overlap_counts, 'insurer'),
+        'trading': (trading_overlap_counts, 'brokerage')}
+
+def _assert_matches_full(state, frames):
+    for analysis, (counts_fn, partner) in FULL.items():
+        full = counts_fn(frames['bank'], frames[partner])
+        incremental = state.counts(analysis)
+        assert (incremental.true_overlap, incremental.left_size, incremental.right_size) == \
+            (full.true_overlap, full.left_size, full.right_size), analysis
+
+def test_deltas_match_full_recompute():
+    rng = np.random.default_rng(0)
+    frames = {
+        'bank': generate_bank_data("Global Bank", n_customers=400, seed=1),
+        'insurer': generate_insurer_data("Test Insurer", n_customers=300, seed=2),
+        'brokerage': generate_brokerage_data("Test Broker", n_customers=300, seed=3),
+    }
+    # Share customers across parties so the overlaps are non-trivial
+    for name in ('insurer', 'brokerage'):
+        frames[name]['Customer_ID_Hash'] = frames['bank']['Customer_ID_Hash'].iloc[:300].to_numpy()
+    state = IncrementalOverlaps()
+    for name, df in frames.items():
+        state.load(name, df)
+    _assert_matches_full(state, frames)
+
+    flags = {'bank': 'Is_Flagged_Fraud', 'insurer': 'Consistent_Payer', 'brokerage': 'Is_Risky_Trading'}
+    for day in range(5):
+        for name, df in frames.items():
+            # Flip some flags, drop some rows and append some rows (partly existing customers elsewhere)
+            changed = df.sample(20, random_state=day).copy()
+            changed[flags[name]] = 1 - changed[flags[name]]
+            if name == 'bank':
+                changed['Credit_History_Months'] = rng.integers(0, 24, len(changed))
+            gone = df['Customer_ID_Hash'].drop(changed.index).sample(10, random_state=day + 100)
+            appended = frames['bank'].sample(15, random_state=day + 200)[df.columns.intersection(frames['bank'].columns)].copy()
+            appended = appended.reindex(columns=df.columns).fillna({c: 1 for c in df.columns})
+            appended['Customer_ID_Hash'] = appended['Customer_ID_Hash'] + f"-{name}-{day}"
+            state.apply(name, upserts=pd.concat([changed, appended]), removed=gone)
+
+            df = df.drop(gone.index)
+            df.loc[changed.index] = changed
+            frames[name] = pd.concat([df, appended], ignore_index=True)
+        _assert_matches_full(state, frames)
+
+def test_save_and_open_round_trip(tmp_path):
+    bank = generate_bank_data("Global Bank", n_customers=200, seed=1)
+    insurer = generate_insurer_data("Test Insurer", n_customers=200, seed=2)
+    insurer['Customer_ID_Hash'] = bank['Customer_ID_Hash'].to_numpy()
+    state = IncrementalOverlaps()
+    state.load('bank', bank)
+    state.load('insurer', insurer)
+    path = str(tmp_path / "cohorts.parquet")
+    state.save(path)
+    restored = IncrementalOverlaps.open(path)
+    assert restored.overlaps == state.overlaps
+    assert restored.counts('fraud').release(1.0)['True Overlap'] == fraud_overlap_counts(bank, insurer).true_overlap
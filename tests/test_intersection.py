@@ -0,0 +1,32 @@
+import pytest
+import numpy as np
+import pandas as pd
+from src.intersection import BACKENDS, intersect, intersection_size
+from src.fraud_analysis import compute_trading_overlap
+
+@pytest.mark.parametrize("backend", ['set', 'sort', 'hash'])
+def test_backends_agree_on_strings(backend):
+    left = pd.Series(['A', 'B', 'B', 'C', None])
+    right = pd.Series(['B', 'C', 'C', 'D', None])
+    assert intersection_size(left, right, backend=backend) == 2
+    assert sorted(intersect(left, right, backend=backend)) == ['B', 'C']
+
+@pytest.mark.parametrize("backend", ['set', 'sort', 'hash'])
+def test_backends_agree_on_int_keys(backend):
+    rng = np.random.default_rng(0)
+    left = rng.integers(0, 5000, size=3000).astype(np.uint64)
+    right = rng.integers(0, 5000, size=3000).astype(np.uint64)
+    expected = len(set(left.tolist()) & set(right.tolist()))
+    assert intersection_size(left, right, backend=backend) == expected
+
+def test_empty_and_unknown_backend():
+    assert intersection_size([], ['A'], backend='sort') == 0
+    with pytest.raises(ValueError):
+        intersection_size(['A'], ['A'], backend='nope')
+
+@pytest.mark.parametrize("backend", sorted(BACKENDS))
+def test_overlap_functions_route_through_backend(backend):
+    bank = pd.DataFrame({'Customer_ID_Hash': ['X', 'Y', 'Z'], 'Is_Flagged_Fraud': [1, 0, 1]})
+    broker = pd.DataFrame({'Customer_ID_Hash': ['X', 'A', 'Z'], 'Is_Risky_Trading': [1, 0, 1]})
+    results = compute_trading_overlap(bank, broker, epsilon=100.0, backend=backend)
+    assert results['True Overlap'] == 2
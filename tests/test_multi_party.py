@@ -0,0 +1,24 @@
+import pytest
+import pandas as pd
+from src.multi_party import compute_multi_party_overlap
+
+def test_pairwise_and_k_way_counts():
+    cohorts = {
+        'Bank': pd.Series(['A', 'B', 'C', 'D']),
+        'Insurer': pd.Series(['B', 'C', 'E']),
+        'Brokerage': pd.Series(['C', 'D', 'E', 'E']),
+    }
+    results = compute_multi_party_overlap(cohorts, epsilon=100.0)
+    pairwise = results['True Pairwise']
+    assert pairwise.loc['Bank', 'Insurer'] == 2
+    assert pairwise.loc['Bank', 'Brokerage'] == 2
+    assert pairwise.loc['Insurer', 'Brokerage'] == 2
+    assert results['Cohort Sizes'] == {'Bank': 4, 'Insurer': 3, 'Brokerage': 2 + 1}
+    # B, C, D, E are each in >= 2 parties; only C is in all three
+    assert results['True K-Way'] == {2: 4, 3: 1}
+    assert results['True All-Party Overlap'] == 1
+    assert results['Total Epsilon'] == pytest.approx(100.0 * 5)
+
+def test_too_many_parties():
+    with pytest.raises(ValueError):
+        compute_multi_party_overlap({f"P{i}": ['A'] for i in range(65)})
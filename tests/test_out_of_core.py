@@ -0,0 +1,43 @@
+import pytest
+import src.out_of_core as ooc
+from src.data_gen import generate_bank_data, generate_insurer_data
+from src.fraud_analysis import compute_fraud_overlap
+
+@pytest.fixture
+def csv_pair(tmp_path):
+    bank = generate_bank_data("Global Bank", n_customers=600, seed=1)
+    insurer = generate_insurer_data("Test Insurer", n_customers=500, seed=2)
+    insurer.loc[:249, 'Is_Flagged_Fraud'] = bank.loc[:249, 'Is_Flagged_Fraud'].to_numpy()
+    bank_path, insurer_path = tmp_path / "bank.csv", tmp_path / "insurer.csv"
+    bank.to_csv(bank_path, index=False)
+    insurer.to_csv(insurer_path, index=False)
+    return bank, insurer, str(bank_path), str(insurer_path)
+
+def test_matches_in_memory_result(csv_pair, tmp_path):
+    bank, insurer, bank_path, insurer_path = csv_pair
+    expected = compute_fraud_overlap(bank, insurer, epsilon=100.0)
+    results = ooc.compute_fraud_overlap_ooc(bank_path, insurer_path, str(tmp_path / "work"), epsilon=100.0,
+                                            n_partitions=8, chunksize=100)
+    assert set(results) == set(expected)
+    assert results['True Overlap'] == expected['True Overlap'] > 0
+    assert results['Bank Risky Count'] == expected['Bank Risky Count']
+
+def test_resumes_after_interruption(csv_pair, tmp_path, monkeypatch):
+    bank, insurer, bank_path, insurer_path = csv_pair
+    workdir = str(tmp_path / "work")
+    real_iter = ooc.iter_dataset
+
+    def failing_iter(path, columns, chunksize):
+        for i, chunk in enumerate(real_iter(path, columns, chunksize)):
+            if i == 3:
+                raise KeyboardInterrupt
+            yield chunk
+
+    monkeypatch.setattr(ooc, 'iter_dataset', failing_iter)
+    with pytest.raises(KeyboardInterrupt):
+        ooc.out_of_core_overlap(bank_path, ooc.FRAUD_FLAGGED, insurer_path, ooc.FRAUD_FLAGGED, workdir, n_partitions=8, chunksize=100)
+    monkeypatch.setattr(ooc, 'iter_dataset', real_iter)
+    counts = ooc.out_of_core_overlap(bank_path, ooc.FRAUD_FLAGGED, insurer_path, ooc.FRAUD_FLAGGED, workdir, n_partitions=8, chunksize=100)
+    expected = compute_fraud_overlap(bank, insurer, epsilon=100.0)
+    assert counts['overlap'] == expected['True Overlap']
+    assert counts['left_rows'] == expected['Bank Risky Count']
@@ -0,0 +1,32 @@
+import os
+import pandas as pd
+from src.data_gen import generate_bank_data, generate_brokerage_data, generate_insurer_data
+from src.powerbi import load_config, run_pipeline
+
+def _data_dir(tmp_path):
+    data_dir = tmp_path / "data"
+    data_dir.mkdir()
+    generate_bank_data("Global Bank", n_customers=300, seed=1).to_csv(data_dir / "bank_data.csv", index=False)
+    generate_insurer_data("Test Insurer", n_customers=200, seed=2).to_csv(data_dir / "insurer_data.csv", index=False)
+    generate_brokerage_data("Test Broker", n_customers=200, seed=3).to_csv(data_dir / "brokerage_data.csv", index=False)
+    return data_dir
+
+def test_only_outputs_with_changed_inputs_are_rewritten(tmp_path):
+    data_dir = _data_dir(tmp_path)
+    config = load_config(data_dir=str(data_dir), out_dir=str(tmp_path / "powerbi"))
+    assert set(run_pipeline(config).values()) == {'written'}
+    assert set(run_pipeline(config).values()) == {'unchanged'}
+
+    generate_brokerage_data("Test Broker", n_customers=250, seed=4).to_csv(data_dir / "brokerage_data.csv", index=False)
+    status = run_pipeline(config)
+    assert {name for name, s in status.items() if s == 'written'} == {'trading_summary', 'brokerage_customers'}
+    assert len(pd.read_csv(tmp_path / "powerbi" / "brokerage_customers.csv")) == 250
+
+def test_parquet_output(tmp_path):
+    data_dir = _data_dir(tmp_path)
+    config = load_config(data_dir=str(data_dir), out_dir=str(tmp_path / "powerbi"), format='parquet')
+    run_pipeline(config)
+    summary = pd.read_parquet(tmp_path / "powerbi" / "fraud_summary.parquet")
+    assert {'Bank Risky Count', 'Insurer Risky Count', 'True Overlap', 'Private Overlap'} <= set(summary.columns)
+    assert list(pd.read_parquet(tmp_path / "powerbi" / "bank_customers.parquet").columns)[0] == 'Customer_ID_Hash'
+    assert not any(name.endswith('.tmp') for name in os.listdir(tmp_path / "powerbi"))
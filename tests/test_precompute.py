@@ -0,0 +1,27 @@
+import threading
+import pytest
+from src.data_gen import generate_bank_data, generate_insurer_data
+from src.fraud_analysis import fraud_overlap_counts
+from src.precompute import Precompute, FAILED, READY
+
+def test_jobs_run_concurrently():
+    # Each job waits for the other; run one after another they would time out
+    barrier = threading.Barrier(2, timeout=5)
+    jobs = Precompute({'a': lambda: (barrier.wait(), 'a')[1], 'b': lambda: (barrier.wait(), 'b')[1]})
+    assert jobs.wait(timeout=10)
+    assert jobs.result('a') == 'a' and jobs.result('b') == 'b'
+    assert jobs.status('a') == READY
+
+def test_precomputed_counts_match_and_failures_surface():
+    bank = generate_bank_data("Global Bank", n_customers=300, seed=1)
+    insurer = generate_insurer_data("Test Insurer", n_customers=200, seed=2)
+
+    def boom():
+        raise ValueError("bad data")
+
+    jobs = Precompute({'fraud': lambda: fraud_overlap_counts(bank, insurer), 'broken': boom})
+    jobs.wait()
+    assert jobs.result('fraud').true_overlap == fraud_overlap_counts(bank, insurer).true_overlap
+    assert jobs.status('broken') == FAILED
+    with pytest.raises(ValueError):
+        jobs.result('broken')
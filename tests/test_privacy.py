@@ -1,7 +1,7 @@
 import pytest
 import pandas as pd
 import numpy as np
-from src.privacy import add_laplace_noise, compute_private_mean, aggregate_insights
+from src.privacy import add_laplace_noise, compute_private_mean, aggregate_insights, grouped_private_means, laplace_mechanism, release, error_quantiles
 
 def test_add_laplace_noise_zero_epsilon():
     """Test that zero or negative epsilon returns the raw value (warning case)."""
@@ -38,3 +38,47 @@ def test_aggregate_insights():
     assert results[0]['Company'] == 'A'
     assert results[1]['Company'] == 'B'
     assert 'Avg Salary (Private)' in results[0]
+
+@pytest.mark.parametrize("mechanism", ["laplace", "gaussian", "geometric"])
+def test_batch_release(mechanism):
+    values = np.arange(10_000)
+    noisy = release(values, epsilon=np.full(10_000, 0.5), sensitivity=1.0, mechanism=mechanism)
+    assert noisy.shape == values.shape
+    assert not np.array_equal(noisy, values)
+    # Unbiased noise: the batch mean stays close to the true mean
+    assert abs(noisy.mean() - values.mean()) < 1.0
+    if mechanism == "geometric":
+        assert noisy.dtype == np.int64
+
+def test_batch_release_skips_non_positive_epsilon():
+    noisy = laplace_mechanism([5.0, 5.0], epsilon=[0.0, 0.1])
+    assert noisy[0] == 5.0
+    with pytest.raises(ValueError):
+        release([1.0], mechanism="exponential")
+
+def test_grouped_private_means_long_table():
+    df = pd.DataFrame({
+        'Company': ['A', 'B', 'A', 'C', 'B', 'A'],
+        'Salary': [100.0, 200.0, 300.0, 400.0, 500.0, 1_000_000.0],
+        'Satisfaction': [1, 2, 3, 4, 5, 6],
+    })
+    stats = grouped_private_means(df, 'Company', {'Salary': (0, 150000), 'Satisfaction': (0, 10)}, epsilon=1e6)
+    assert list(stats.index) == ['A', 'B', 'C']
+    assert stats.loc['B', 'Salary (True)'] == 350.0
+    # True means are unclipped; private means see Salary clipped to 150000
+    assert stats.loc['A', 'Salary (True)'] == pytest.approx(1_000_400 / 3)
+    assert stats.loc['A', 'Salary (Private)'] == pytest.approx(150_400 / 3, rel=1e-3)
+    assert stats.loc['C', 'Satisfaction (Private)'] == pytest.approx(4.0, rel=1e-3)
+
+def test_error_quantiles_match_laplace():
+    np.random.seed(0)
+    epsilons = [0.1, 1.0, 10.0]
+    curve = error_quantiles(1000, epsilons, trials=20000, quantiles=(0.5, 0.95))
+    assert list(curve['epsilon']) == epsilons
+    # |Laplace(b)| has quantile q at -b * ln(1 - q)
+    for q, col in [(0.5, 'abs_error_p50'), (0.95, 'abs_error_p95')]:
+        expected = -np.log(1 - q) / np.array(epsilons)
+        assert np.allclose(curve[col], expected, rtol=0.05)
+    assert np.allclose(curve['relative_error_p50'], curve['abs_error_p50'] / 1000)
+    # Error shrinks as the budget grows
+    assert curve['mean_abs_error'].is_monotonic_decreasing
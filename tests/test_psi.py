@@ -0,0 +1,34 @@
+import pytest
+import pandas as pd
+from src.psi import MAX_MODP_ITEMS, MODP, X25519, PSIParty, run_psi
+from src.fraud_analysis import compute_fraud_overlap
+
+@pytest.mark.parametrize('group', [X25519, MODP])
+def test_blinding_commutes(group):
+    a, b = PSIParty('a', group), PSIParty('b', group)
+    x = a.hash_and_blind(['hash1'])
+    y = b.hash_and_blind(['hash1'])
+    assert b.blind(x) == a.blind(y)
+    assert x != y
+    assert b.blind(a.hash_and_blind(['hash2'])) != b.blind(x)
+
+def test_run_psi_matches_set_intersection():
+    left = ['A', 'B', 'C', 'D', None]
+    right = ['C', 'D', 'E']
+    result = run_psi(left, right, n_jobs=2, batch_size=2)
+    assert sorted(result['intersection']) == ['C', 'D']
+    assert result['exponentiations'] == 2 * (4 + 3)
+    assert result['exps_per_second'] > 0
+
+def test_modp_fallback_rejects_large_inputs():
+    assert sorted(run_psi(['A', 'B'], ['B', 'C'], group=MODP)['intersection']) == ['B']
+    with pytest.raises(ValueError, match='cryptography'):
+        run_psi(range(MAX_MODP_ITEMS + 1), ['A'], group=MODP)
+
+def test_psi_backend_returns_same_result_dict():
+    bank = pd.DataFrame({'Customer_ID_Hash': ['A', 'B', 'C'], 'Is_Flagged_Fraud': [1, 1, 0]})
+    insurer = pd.DataFrame({'Customer_ID_Hash': ['A', 'B', 'D'], 'Is_Flagged_Fraud': [1, 0, 1]})
+    exact = compute_fraud_overlap(bank, insurer, epsilon=100.0)
+    private = compute_fraud_overlap(bank, insurer, epsilon=100.0, backend='psi')
+    assert set(private) == set(exact)
+    assert private['True Overlap'] == exact['True Overlap'] == 1
@@ -0,0 +1,55 @@
+import threading
+import pandas as pd
+from src.fraud_analysis import compute_fraud_overlap
+from src.release_cache import ReleaseCache, cached_overlap, cached_private_mean
+
+def _frames():
+    bank = pd.DataFrame({'Customer_ID_Hash': ['A', 'B', 'C'], 'Is_Flagged_Fraud': [1, 1, 0]})
+    insurer = pd.DataFrame({'Customer_ID_Hash': ['A', 'B', 'D'], 'Is_Flagged_Fraud': [1, 0, 1]})
+    return bank, insurer
+
+def test_repeated_queries_replay_the_same_release(tmp_path):
+    bank, insurer = _frames()
+    cache = ReleaseCache(str(tmp_path / "releases.sqlite"))
+    first = cached_overlap(compute_fraud_overlap, bank, insurer, epsilon=0.1, cache=cache)
+    assert all(cached_overlap(compute_fraud_overlap, bank, insurer, epsilon=0.1, cache=cache) == first for _ in range(5))
+    # Switching exact backends must not buy a fresh draw
+    assert cached_overlap(compute_fraud_overlap, bank, insurer, epsilon=0.1, backend='hash', cache=cache) == first
+    assert cache.misses == 1 and cache.hits == 6
+    cache.close()
+
+    # Persisted across processes
+    reopened = ReleaseCache(str(tmp_path / "releases.sqlite"))
+    assert cached_overlap(compute_fraud_overlap, bank, insurer, epsilon=0.1, cache=reopened) == first
+    mean = cached_private_mean(pd.Series([10.0, 20.0, 30.0]), epsilon=0.5, cache=reopened)
+    assert cached_private_mean(pd.Series([10.0, 20.0, 30.0]), epsilon=0.5, cache=reopened) == mean
+
+def test_lru_eviction():
+    cache = ReleaseCache(max_entries=2)
+    for eps in (1.0, 2.0):
+        cache.put('v1', 'q', eps, {'x': eps})
+    assert cache.get('v1', 'q', 1.0) == {'x': 1.0}
+    cache.put('v1', 'q', 3.0, {'x': 3.0})
+    assert len(cache) == 2
+    assert cache.get('v1', 'q', 2.0) is None
+    assert cache.get('v1', 'q', 1.0) == {'x': 1.0}
+
+def test_concurrent_misses_return_one_release():
+    cache = ReleaseCache()
+    barrier = threading.Barrier(4)
+    results = []
+
+    def release():
+        # Every thread has missed before any of them stores
+        barrier.wait()
+        return {'noisy': threading.get_ident()}
+
+    def query():
+        results.append(cache.get_or_release('v1', 'q', 1.0, release))
+    threads = [threading.Thread(target=query) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len({r['noisy'] for r in results}) == 1
+    assert cache.get('v1', 'q', 1.0) == results[0]
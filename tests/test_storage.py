@@ -0,0 +1,27 @@
+import os
+import pandas as pd
+from src.data_gen import generate_bank_data
+from src.storage import dataset_path, find_dataset, migrate_data_dir, read_dataset, read_schema
+
+def test_migrate_and_prune_columns(tmp_path):
+    bank = generate_bank_data("Global Bank", n_customers=300, seed=3)
+    csv_path = dataset_path('bank', str(tmp_path), 'csv')
+    bank.to_csv(csv_path, index=False)
+    assert find_dataset('bank', str(tmp_path)) == csv_path
+
+    migrated = migrate_data_dir(str(tmp_path), chunksize=100)
+    parquet_path = migrated['bank']
+    assert find_dataset('bank', str(tmp_path)) == parquet_path
+    assert read_schema(parquet_path) == list(bank.columns)
+
+    loaded = read_dataset(parquet_path, ['Customer_ID_Hash', 'Is_Flagged_Fraud'])
+    assert list(loaded.columns) == ['Customer_ID_Hash', 'Is_Flagged_Fraud']
+    assert loaded['Customer_ID_Hash'].tolist() == bank['Customer_ID_Hash'].tolist()
+    assert loaded['Is_Flagged_Fraud'].tolist() == bank['Is_Flagged_Fraud'].tolist()
+
+def test_migration_skips_up_to_date_copies(tmp_path):
+    pd.DataFrame({'Customer_ID_Hash': ['a', 'b'], 'Risk_Score': [1, 2]}).to_csv(
+        dataset_path('bank', str(tmp_path), 'csv'), index=False)
+    assert set(migrate_data_dir(str(tmp_path))) == {'bank'}
+    assert migrate_data_dir(str(tmp_path)) == {}
+    assert not os.path.exists(dataset_path('insurer', str(tmp_path), 'parquet'))
@@ -0,0 +1,54 @@
+import json
+import logging
+import threading
+import numpy as np
+import pytest
+from src.utils import JsonFormatter, clear_spans, enable_instrumentation, recent_spans, span
+
+@pytest.fixture
+def instrumentation():
+    clear_spans()
+    enable_instrumentation(True)
+    yield
+    enable_instrumentation(False)
+    clear_spans()
+
+def test_disabled_spans_record_nothing():
+    enable_instrumentation(False)
+    clear_spans()
+    with span('stage', rows=10) as s:
+        s.rows = 20
+    assert recent_spans() == []
+
+def test_nested_spans_record_time_rows_and_memory(instrumentation):
+    with span('outer') as outer:
+        with span('inner', rows=5, backend='sort'):
+            buf = np.ones(2_000_000)
+            del buf
+        outer.rows = 7
+    inner, outer = recent_spans()
+    assert (inner['name'], inner['parent'], inner['rows'], inner['backend']) == ('inner', 'outer', 5, 'sort')
+    assert outer['rows'] == 7 and outer['seconds'] >= inner['seconds']
+    # The 16 MB buffer freed inside inner still counts toward the outer peak
+    assert inner['peak_mb'] >= 15 and outer['peak_mb'] >= 15
+
+def test_worker_thread_spans_leave_the_main_peak_alone(instrumentation):
+    def worker():
+        with span('worker'):
+            np.ones(1000)
+    with span('main'):
+        buf = np.ones(2_000_000)
+        del buf
+        thread = threading.Thread(target=worker)
+        thread.start()
+        thread.join()
+    worker_record, main_record = recent_spans()
+    assert worker_record['peak_mb'] is None
+    # The worker span did not reset the peak the main span reads
+    assert main_record['peak_mb'] >= 15
+
+def test_json_formatter_includes_span():
+    record = logging.LogRecord('perf', logging.DEBUG, __file__, 1, 'span x', None, None)
+    record.span = {'name': 'x', 'seconds': 0.5}
+    payload = json.loads(JsonFormatter().format(record))
+    assert payload['message'] == 'span x' and payload['span']['seconds'] == 0.5